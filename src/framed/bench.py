@@ -0,0 +1,171 @@
+import contextlib
+import dataclasses
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from . import __version__
+from . import instrument
+from . import registry
+
+# Report order; 'total' is the whole render_job call
+STAGES = ['decode', 'resize', 'device_frame', 'background', 'text', 'compose', 'final_resize', 'encode', 'total']
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+SAMPLE_RAWS = TEMPLATES_DIR / "_raw_samples" / "ja"
+
+
+def installed_templates() -> list[str]:
+    """Templates known to the registry (built-in and plugins)."""
+    return registry.names()
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: list[float]) -> dict:
+    ms = [s * 1000 for s in samples]
+    return {
+        'count': len(ms),
+        'p50_ms': round(percentile(ms, 50), 3),
+        'p95_ms': round(percentile(ms, 95), 3),
+        'max_ms': round(max(ms), 3),
+        'total_ms': round(sum(ms), 3),
+    }
+
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def _bench_config(template: str, raw_dir: Path, output_dir: Path):
+    """Config for rendering the sample screenshots with `template` (its samples/framed.yaml if any)."""
+    from .config import load_config
+
+    info = registry.get(template)
+    framed_yaml = info.path / "samples" / "framed.yaml" if info and info.path else None
+    if framed_yaml and framed_yaml.exists():
+        config = load_config(str(framed_yaml))
+    else:
+        data = {
+            'template': template,
+            'config': {'project': 'N/A', 'scheme': 'N/A'},
+            'devices': [{'name': ''}],
+            'languages': ['ja'],
+            'screenshots': {p.stem: {'title': {'ja': p.stem}, 'subtitle': {'ja': p.stem}}
+                            for p in sorted(raw_dir.glob("*.png"))},
+        }
+        path = output_dir / "framed.yaml"
+        with open(path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(data, f, allow_unicode=True)
+        config = load_config(str(path))
+    return dataclasses.replace(config, template=template, raw_dir=str(raw_dir), output_dir=str(output_dir),
+                               devices=[{'name': ''}], languages=['ja'])
+
+
+def bench_template(template: str, iterations: int, warmup: int = 1, raw_dir: Path = SAMPLE_RAWS) -> dict:
+    """Render every sample screenshot `iterations` times and summarize each stage."""
+    from .processor import Processor
+
+    with tempfile.TemporaryDirectory(prefix="framed_bench_") as temp_dir:
+        output_dir = Path(temp_dir)
+        config = _bench_config(template, raw_dir, output_dir)
+        # Encode inline so the encode stage is measured on the rendering thread
+        processor = Processor(config, verbose=False, background_encode=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            jobs = processor._collect_jobs()
+        if not jobs:
+            return {'images': 0, 'stages': {}}
+
+        for _ in range(warmup):
+            for job in jobs:
+                processor.render_job(job)
+
+        recorder = instrument.StageRecorder()
+        previous = instrument.install(recorder)
+        try:
+            for _ in range(iterations):
+                for job in jobs:
+                    start = time.perf_counter()
+                    processor.render_job(job)
+                    recorder.add('total', start, time.perf_counter())
+        finally:
+            instrument.install(previous)
+
+    stages = {name: summarize(recorder.samples[name]) for name in STAGES if recorder.samples.get(name)}
+    # Stages added by templates but not part of the standard list
+    # ('render_job' wraps the whole render, the same time as 'total')
+    for name, samples in recorder.samples.items():
+        if name != 'render_job':
+            stages.setdefault(name, summarize(samples))
+    return {'images': len(jobs), 'stages': stages}
+
+
+def run_bench(templates: list[str], iterations: int, warmup: int = 1) -> dict:
+    results = {}
+    for template in templates:
+        print(f"⏱️  Benchmarking {template} ({iterations} iteration(s))...")
+        results[template] = bench_template(template, iterations, warmup)
+    return {
+        'version': __version__,
+        'python': sys.version.split()[0],
+        'iterations': iterations,
+        'peak_rss_mb': peak_rss_mb(),
+        'templates': results,
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float = 0.15, floor_ms: float = 1.0) -> list[str]:
+    """
+    Stages whose p50 got slower than the baseline by more than `tolerance`
+    (and by at least `floor_ms`, to ignore noise on tiny stages).
+    """
+    regressions = []
+    for template, result in report.get('templates', {}).items():
+        base_stages = baseline.get('templates', {}).get(template, {}).get('stages', {})
+        for name, stats in result.get('stages', {}).items():
+            base = base_stages.get(name)
+            if not base:
+                continue
+            before, after = base['p50_ms'], stats['p50_ms']
+            if after > before * (1 + tolerance) and after - before >= floor_ms:
+                regressions.append(f"{template}/{name}: p50 {before:.1f} ms -> {after:.1f} ms "
+                                   f"(+{(after / before - 1) * 100 if before else 100:.0f}%)")
+    return regressions
+
+
+def format_report(report: dict) -> str:
+    lines = []
+    for template, result in report['templates'].items():
+        lines.append(f"\n📊 {template} ({result['images']} images x {report['iterations']} iterations)")
+        lines.append(f"   {'stage':<14}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'count':>8}")
+        for name, stats in result['stages'].items():
+            lines.append(f"   {name:<14}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['max_ms']:>10.1f}{stats['count']:>8}")
+    if report.get('peak_rss_mb') is not None:
+        lines.append(f"\n🧠 Peak RSS: {report['peak_rss_mb']:.1f} MB")
+    return "\n".join(lines)
+
+
+def load_report(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_report(report: dict, path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,259 @@
+from pathlib import Path
+import numpy as np
+from PIL import Image, ImageDraw
+
+SCREEN_CORNER_RADIUS = 80
+PATCH_GAP = 64  # Columns this close are blended as one patch (a patch may blend up to PATCH_GAP² extra pixels)
+
+
+class _FrameLayout:
+    """Everything about a (bezel, screen size) pair that does not depend on the screenshot pixels."""
+
+    def __init__(self, bezel: Image.Image, screen_size: tuple[int, int]):
+        width, height = screen_size
+        self.offset = ((bezel.width - width) // 2, (bezel.height - height) // 2)
+        self.region = (self.offset[0], self.offset[1], self.offset[0] + width, self.offset[1] + height)
+
+        # Rounded screen mask (built once instead of per screenshot)
+        self.mask = Image.new('L', screen_size, 0)
+        ImageDraw.Draw(self.mask).rounded_rectangle((0, 0, width, height), radius=SCREEN_CORNER_RADIUS, fill=255)
+
+        # Outside the screen region a frame is always "bezel over transparent",
+        # so that part is composed once and only the screen region is redrawn per frame.
+        self.base = Image.new('RGBA', bezel.size, (0, 0, 0, 0))
+        self.base.paste(bezel, (0, 0), bezel)
+        self.bezel_crop = bezel.crop(self.region)
+
+        # Reusable output buffer for callers that consume the frame immediately
+        self.buffer = None
+
+
+def _div255(values: np.ndarray) -> np.ndarray:
+    """round(values / 255) in place for uint16 values up to 255 * 255, as Pillow's blending computes it."""
+    values += 128
+    values += values >> 8
+    values >>= 8
+    return values
+
+
+class _Patch:
+    """A rectangle of the frame box that needs blending, with its premultiplied bezel pixels."""
+
+    def __init__(self, rect: tuple, premul: np.ndarray, alpha: np.ndarray, mask: np.ndarray | None = None):
+        x0, y0, x1, y1 = rect
+        self.rect = rect
+        self.premul = np.ascontiguousarray(premul[y0:y1, x0:x1])  # bezel color * alpha
+        self.inv = (255 - alpha[y0:y1, x0:x1].astype(np.uint16))[..., None]
+        if mask is not None:
+            self.mask = mask[..., None].astype(np.uint16)  # Rounded screen mask (screen patches only)
+            self.mask_inv = 255 - self.mask
+
+    def bezel_over(self, under: np.ndarray) -> Image.Image:
+        """The bezel blended over `under` (uint16 RGB, consumed)."""
+        under *= self.inv
+        under += self.premul
+        return Image.fromarray(_div255(under).astype(np.uint8))
+
+
+class _ScaledLayout:
+    """A (bezel, screen size) layout resampled once to a final on-canvas frame size."""
+
+    def __init__(self, layout: _FrameLayout, bezel: Image.Image, frame_size: tuple[int, int]):
+        fx = frame_size[0] / bezel.width
+        fy = frame_size[1] / bezel.height
+        left, top, right, bottom = layout.region
+        self.screen_box = (round(left * fx), round(top * fy), round(right * fx), round(bottom * fy))
+        screen_size = (self.screen_box[2] - self.screen_box[0], self.screen_box[3] - self.screen_box[1])
+
+        self.screen_size = screen_size
+        self.bezel = bezel.resize(frame_size, Image.Resampling.LANCZOS)
+        self.mask = Image.new('L', screen_size, 0)
+        radius = SCREEN_CORNER_RADIUS * (fx + fy) / 2
+        ImageDraw.Draw(self.mask).rounded_rectangle((0, 0, screen_size[0], screen_size[1]), radius=radius, fill=255)
+        self._build_patches(frame_size)
+
+    def _build_patches(self, frame_size: tuple[int, int]):
+        """
+        Split the frame box into the rectangles compose_into has to blend: the bezel
+        bands around the screen, and the parts of the screen holding its rounded corners
+        or visible bezel (e.g. the Dynamic Island). The rest of the screen is covered by
+        the screenshot as is, and the bezel is kept premultiplied per rectangle.
+        """
+        width, height = frame_size
+        left, top, right, bottom = self.screen_box
+        alpha = np.asarray(self.bezel.getchannel('A'))
+        premul = np.asarray(self.bezel.convert('RGB')).astype(np.uint16) * alpha[..., None].astype(np.uint16)
+        mask = np.asarray(self.mask)
+
+        self.frame_patches = [
+            _Patch(rect, premul, alpha)
+            for rect in ((0, 0, width, top), (0, bottom, width, height), (0, top, left, bottom), (right, top, width, bottom))
+            if rect[2] > rect[0] and rect[3] > rect[1] and alpha[rect[1]:rect[3], rect[0]:rect[2]].any()
+        ]
+
+        # Over the screen: rows with the same runs of columns to blend (rounded corners,
+        # bezel edges, the Dynamic Island) are grouped into one patch per run
+        needed = (alpha[top:bottom, left:right] != 0) | (mask != 255)
+        groups = []  # [first row, last row + 1, runs [[start, end], ...], pixels actually needed]
+        starts = np.flatnonzero(np.r_[True, (needed[1:] != needed[:-1]).any(axis=1)])
+        for y0, y1 in zip(starts.tolist(), starts[1:].tolist() + [len(needed)]):  # Segments of identical rows
+            runs = _runs(np.flatnonzero(needed[y0]))
+            used = (y1 - y0) * sum(end - start for start, end in runs)
+            group = groups[-1] if groups else None
+            if group and group[1] == y0 and len(group[2]) == len(runs):
+                union = [[min(a, c), max(b, d)] for (a, b), (c, d) in zip(group[2], runs)]
+                area = (y1 - group[0]) * sum(end - start for start, end in union)
+                if area - group[3] - used <= PATCH_GAP * PATCH_GAP:  # Blending a little extra beats another patch
+                    group[1:] = [y1, union, group[3] + used]
+                    continue
+            if runs:
+                groups.append([y0, y1, [list(run) for run in runs], used])
+
+        self.screen_patches = [
+            _Patch((left + start, top + y0, left + end, top + y1), premul, alpha, mask[y0:y1, start:end])
+            for y0, y1, runs, _ in groups for start, end in runs
+        ]
+
+
+def _offset(rect: tuple, x: int, y: int) -> tuple:
+    return (rect[0] + x, rect[1] + y, rect[2] + x, rect[3] + y)
+
+
+def _runs(columns: np.ndarray) -> list[tuple[int, int]]:
+    """(start, end) runs of sorted column indices; gaps up to PATCH_GAP are bridged."""
+    if not columns.size:
+        return []
+    breaks = np.flatnonzero(np.diff(columns) > PATCH_GAP)
+    starts = np.r_[columns[0], columns[breaks + 1]]
+    ends = np.r_[columns[breaks], columns[-1]] + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+class BezelCache:
+    """
+    Process-wide cache for device frame composition.
+    The bezel PNG is decoded once per file, the screen mask is built once per
+    (bezel, screen size), and a frame buffer can be reused between screenshots.
+    """
+
+    def __init__(self):
+        self._bezels = {}
+        self._layouts = {}
+        self._scaled = {}
+        self.stats = {'bezel_hits': 0, 'bezel_misses': 0, 'mask_hits': 0, 'mask_misses': 0}
+
+    def _bezel_key(self, bezel_path: Path):
+        stat = bezel_path.stat()
+        # Include mtime/size so a replaced bezel.png is picked up
+        return (str(bezel_path.resolve()), stat.st_mtime_ns, stat.st_size)
+
+    def bezel(self, bezel_path: Path) -> Image.Image:
+        """Return the decoded RGBA bezel for a file, decoding it only once."""
+        if not bezel_path.exists():
+            raise FileNotFoundError(f"Bezel file not found at {bezel_path}")
+
+        key = self._bezel_key(bezel_path)
+        bezel = self._bezels.get(key)
+        if bezel is None:
+            self.stats['bezel_misses'] += 1
+            bezel = Image.open(bezel_path).convert("RGBA")
+            self._bezels[key] = bezel
+        else:
+            self.stats['bezel_hits'] += 1
+        return bezel
+
+    def _layout(self, bezel_path: Path, screen_size: tuple[int, int]) -> _FrameLayout:
+        bezel = self.bezel(bezel_path)
+        if bezel.width < screen_size[0] or bezel.height < screen_size[1]:
+            raise ValueError(f"Bezel {bezel.size} is smaller than screenshot {screen_size}")
+
+        key = (self._bezel_key(bezel_path), screen_size)
+        layout = self._layouts.get(key)
+        if layout is None:
+            self.stats['mask_misses'] += 1
+            layout = _FrameLayout(bezel, screen_size)
+            self._layouts[key] = layout
+        else:
+            self.stats['mask_hits'] += 1
+        return layout
+
+    def frame(self, bezel_path: Path, screenshot: Image.Image, reuse_buffer: bool = False) -> Image.Image:
+        """
+        Composite a screenshot into the bezel.
+
+        With reuse_buffer=True the returned image is a shared buffer that is
+        overwritten by the next reuse_buffer call, so the caller must be done
+        with it before rendering the next screenshot.
+        """
+        layout = self._layout(bezel_path, screenshot.size)
+
+        if reuse_buffer:
+            if layout.buffer is None:
+                layout.buffer = layout.base.copy()
+            frame = layout.buffer
+        else:
+            frame = layout.base.copy()
+
+        # Clear the screen region, then screenshot (rounded) + bezel on top
+        frame.paste((0, 0, 0, 0), layout.region)
+        frame.paste(screenshot, layout.offset, layout.mask)
+        frame.paste(layout.bezel_crop, layout.offset, layout.bezel_crop)
+        return frame
+
+    def compose_into(self, canvas: Image.Image, bezel_path: Path, screenshot: Image.Image,
+                     screen_size: tuple[int, int], box: tuple[int, int, int, int]):
+        """
+        Draw the framed device straight into canvas at box (x, y, width, height).
+
+        Geometry is that of a frame built for screen_size, scaled to the box. The
+        bezel is resampled once per box size (cached) and the raw screenshot is
+        resampled exactly once, directly to its final on-canvas size.
+        """
+        x, y, width, height = box
+        layout = self._layout(bezel_path, screen_size)
+        key = (self._bezel_key(bezel_path), screen_size, (width, height))
+        scaled = self._scaled.get(key)
+        if scaled is None:
+            scaled = _ScaledLayout(layout, self.bezel(bezel_path), (width, height))
+            self._scaled[key] = scaled
+
+        left, top, _, _ = scaled.screen_box
+        shot = screenshot.resize(scaled.screen_size, Image.Resampling.LANCZOS)
+        if canvas.mode != 'RGB':
+            canvas.paste(shot, (x + left, y + top), scaled.mask)
+            canvas.paste(scaled.bezel, (x, y), scaled.bezel)
+            return
+
+        # Only the patches are blended (with Image.paste's rounding, so the pixels are
+        # the same as pasting the screenshot through the mask and the bezel over it);
+        # the clear part of the bezel, most of the frame, is never walked.
+        if shot.mode != 'RGB':
+            shot = shot.convert('RGB')
+        under_screen = [np.asarray(canvas.crop(_offset(p.rect, x, y)), dtype=np.uint16) for p in scaled.screen_patches]
+        canvas.paste(shot, (x + left, y + top))
+
+        for patch, under in zip(scaled.screen_patches, under_screen):
+            x0, y0, x1, y1 = patch.rect
+            corner = np.asarray(shot.crop((x0 - left, y0 - top, x1 - left, y1 - top)), dtype=np.uint16)
+            under *= patch.mask_inv
+            corner *= patch.mask
+            under += corner
+            canvas.paste(patch.bezel_over(_div255(under)), (x + x0, y + y0))
+
+        for patch in scaled.frame_patches:
+            under = np.asarray(canvas.crop(_offset(patch.rect, x, y)), dtype=np.uint16)
+            canvas.paste(patch.bezel_over(under), (x + patch.rect[0], y + patch.rect[1]))
+
+    def summary(self, stats: dict | None = None) -> str:
+        """Format hit/miss counts (this cache's own, or aggregated counts from worker processes)."""
+        s = self.stats if stats is None else {k: stats.get(k, 0) for k in self.stats}
+        return (f"bezel {s['bezel_hits']} hits / {s['bezel_misses']} misses, "
+                f"mask {s['mask_hits']} hits / {s['mask_misses']} misses")
+
+
+_bezel_cache = BezelCache()
+
+
+def get_bezel_cache() -> BezelCache:
+    """Return the process-wide bezel cache."""
+    return _bezel_cache
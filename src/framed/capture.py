@@ -0,0 +1,219 @@
+import plistlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from .simctl import Simctl
+from .instrument import span
+
+
+@dataclass(frozen=True)
+class Simulator:
+    model: str  # Configured device name, e.g. "iPhone 17"
+    sim_id: str  # Name or UDID accepted by `simctl`
+    destination: str  # xcodebuild -destination value
+    cloned: bool = False
+
+
+class SimulatorPool:
+    """
+    Hands out simulators per device model so several captures can run at once.
+    The configured device itself is always used; extra capacity for the same model
+    comes from clones created up front. simctl can only clone a shut-down device,
+    so a booted original is shut down first (listed in `shut_down`), and clones
+    left behind by an interrupted run are reused instead of cloned again.
+    """
+
+    def __init__(self, xcrun: str = "xcrun"):
+        self.xcrun = xcrun
+        self._free = {}
+        self._cond = threading.Condition()
+        self.clones = []
+        # Originals that were booted and had to be shut down for cloning
+        self.shut_down = []
+
+    def prepare(self, model: str, count: int):
+        """Make `count` simulators of this model available (fewer if cloning fails)."""
+        sims = [Simulator(model, model, f"platform=iOS Simulator,name={model}")]
+        existing = Simctl.device_udids(self.xcrun) if count > 1 else {}
+        source_ready = False
+        for i in range(1, count):
+            clone_name = f"{model} (framed {i + 1})"
+            udid = existing.get(clone_name)
+            if udid:
+                print(f"  ♻️  Reusing {clone_name}")
+            else:
+                if not source_ready:
+                    if Simctl.device_states(self.xcrun).get(model) == "Booted":
+                        print(f"  💤 Shutting down {model} to clone it")
+                        Simctl.shutdown_device(model, xcrun=self.xcrun)
+                        self.shut_down.append(model)
+                    source_ready = True
+                udid = Simctl.clone_device(model, clone_name, xcrun=self.xcrun)
+                if not udid:
+                    print(f"  ⚠️  Could not clone {model}; running {len(sims)} capture(s) at a time on it")
+                    break
+                print(f"  🧬 Cloned {model} -> {clone_name}")
+            clone = Simulator(model, udid, f"platform=iOS Simulator,id={udid}", cloned=True)
+            sims.append(clone)
+            self.clones.append(clone)
+        with self._cond:
+            self._free.setdefault(model, []).extend(sims)
+
+    def acquire(self, model: str) -> Simulator:
+        """Block until a simulator of this model is free and reserve it."""
+        with self._cond:
+            while not self._free.get(model):
+                self._cond.wait()
+            return self._free[model].pop(0)
+
+    def release(self, sim: Simulator):
+        with self._cond:
+            self._free[sim.model].append(sim)
+            self._cond.notify_all()
+
+    def cleanup(self):
+        """Delete every clone created by this pool."""
+        for clone in self.clones:
+            Simctl.delete_device(clone.sim_id, xcrun=self.xcrun)
+        self.clones = []
+
+
+SIMULATOR_POLICIES = ('keep', 'restore', 'shutdown')
+APPEARANCES = ('light', 'dark')
+
+
+class SimulatorSessions:
+    """
+    Brings each simulator into capture state once per run: boot (waiting on
+    `bootstatus`), status bar override and appearance. Later captures on the same
+    simulator skip whatever is already in place.
+
+    On close, `policy` decides what happens to the simulators:
+      keep     - leave them running for the next run (default)
+      restore  - shut down the ones this run booted
+      shutdown - shut down every simulator used
+    """
+
+    def __init__(self, xcrun: str = "xcrun", policy: str = 'keep', appearance: str | None = None):
+        if policy not in SIMULATOR_POLICIES:
+            raise ValueError(f"Unknown simulator policy '{policy}' (expected one of {', '.join(SIMULATOR_POLICIES)})")
+        if appearance is not None and appearance not in APPEARANCES:
+            raise ValueError(f"Unknown appearance '{appearance}' (expected one of {', '.join(APPEARANCES)})")
+        self.xcrun = xcrun
+        self.policy = policy
+        self.appearance = appearance
+        self._lock = threading.Lock()
+        self._initial_states = None
+        self._sessions = {}
+        # Booted before the run but shut down since (see SimulatorPool.shut_down)
+        self._was_booted = set()
+
+    def note_shut_down(self, sim_id: str):
+        """Record that `sim_id` was booted before the run and has been shut down since."""
+        with self._lock:
+            self._was_booted.add(sim_id)
+
+    def prepare(self, sim: Simulator, label: str = ""):
+        """Make `sim` ready for capture. Callers hold the simulator exclusively (see SimulatorPool)."""
+        with span('prepare_simulator', simulator=sim.sim_id):
+            self._prepare(sim, label)
+
+    def _prepare(self, sim: Simulator, label: str):
+        with self._lock:
+            if self._initial_states is None:
+                # One `simctl list` for the whole run
+                self._initial_states = Simctl.device_states(self.xcrun)
+            booted = self._initial_states.get(sim.sim_id) == "Booted"
+            session = self._sessions.setdefault(sim.sim_id, {
+                'sim': sim,
+                'booted': booted,
+                'was_booted': booted or sim.sim_id in self._was_booted,
+                'booted_here': False,
+                'status_bar': False,
+                'appearance': None,
+            })
+
+        if not session['booted']:
+            print(f"    🚀 {label}Booting device: {sim.sim_id}...")
+            if not Simctl.wait_for_boot(sim.sim_id, xcrun=self.xcrun):
+                print(f"    ⚠️  {label}bootstatus failed for {sim.sim_id}, continuing anyway")
+            session['booted'] = True
+            session['booted_here'] = True
+
+        if not session['status_bar']:
+            print(f"    🕐 {label}Setting status bar to 9:41...")
+            try:
+                Simctl.set_status_bar(sim.sim_id, xcrun=self.xcrun)
+                session['status_bar'] = True
+                print(f"    ✅ {label}Status bar set successfully")
+            except Exception as e:
+                print(f"    ⚠️  {label}Failed to set status bar: {e}")
+
+        if self.appearance and session['appearance'] != self.appearance:
+            try:
+                Simctl.set_dark_mode(sim.sim_id, self.appearance == 'dark', xcrun=self.xcrun)
+                session['appearance'] = self.appearance
+            except Exception as e:
+                print(f"    ⚠️  {label}Failed to set appearance: {e}")
+
+    def close(self):
+        """Apply the shutdown policy to every simulator prepared in this run."""
+        for session in self._sessions.values():
+            sim = session['sim']
+            if sim.cloned:
+                continue  # Deleted by SimulatorPool.cleanup
+            if self.policy == 'shutdown' or (self.policy == 'restore' and session['booted_here']
+                                               and not session['was_booted']):
+                print(f"  💤 Shutting down {sim.sim_id}")
+                Simctl.shutdown_device(sim.sim_id, xcrun=self.xcrun)
+        self._sessions = {}
+
+
+def write_locale_xctestrun(xctestrun: Path, languages: list[str]) -> Path:
+    """
+    Derive a multi-configuration .xctestrun from the one produced by build-for-testing,
+    with one test configuration per language (named after the language). The UI tests
+    then run for every language in a single `test-without-building` invocation, and
+    the result bundle records which configuration produced each attachment.
+
+    xcodebuild only runs test plans referenced by the scheme, so the per-language
+    configurations are written into the .xctestrun, which is what a test plan compiles to.
+    A test-plan based (FormatVersion 2) file keeps everything but its configurations;
+    one with several configurations can't be mapped to languages and raises ValueError.
+    """
+    with open(xctestrun, 'rb') as f:
+        data = plistlib.load(f)
+
+    if data.get('__xctestrun_metadata__', {}).get('FormatVersion', 1) >= 2:
+        configurations = data.get('TestConfigurations', [])
+        if len(configurations) != 1:
+            names = ', '.join(str(c.get('Name')) for c in configurations) or "none"
+            raise ValueError(f"{xctestrun.name} has {len(configurations)} test configurations ({names}); "
+                             f"multi_locale needs exactly one to derive the languages from")
+        base = configurations[0]
+        out = dict(data)
+    else:
+        targets = [dict(target, BlueprintName=target.get('BlueprintName', name))
+                   for name, target in data.items() if name != '__xctestrun_metadata__']
+        base = {'TestTargets': targets}
+        out = {
+            'TestPlan': {'Name': 'framed_locales', 'IsDefault': True},
+            '__xctestrun_metadata__': {'FormatVersion': 2},
+        }
+
+    configurations = []
+    for lang in languages:
+        locale_args = ['-AppleLanguages', f'({lang})', '-AppleLocale', lang]
+        configurations.append(dict(base, Name=lang, TestTargets=[
+            dict(target,
+                 CommandLineArguments=list(target.get('CommandLineArguments', [])) + locale_args,
+                 UITargetAppCommandLineArguments=list(target.get('UITargetAppCommandLineArguments', [])) + locale_args)
+            for target in base['TestTargets']
+        ]))
+    out['TestConfigurations'] = configurations
+
+    # Must live next to the original: paths inside are relative to __TESTROOT__
+    out_path = xctestrun.with_name("framed_locales.xctestrun")
+    with open(out_path, 'wb') as f:
+        plistlib.dump(out, f)
+    return out_path
@@ -14,48 +14,136 @@ def init():
 
 @main.command()
 @click.option('--skip-capture', is_flag=True, help='Skip simulator capture and process existing raw screenshots only.')
-def run(skip_capture):
+@click.option('--jobs', '-j', default=1, show_default=True, help='Number of parallel render processes (0 = one per CPU).')
+@click.option('--force', is_flag=True, help='Re-render every output, ignoring the render manifest.')
+@click.option('--capture-jobs', default=1, show_default=True, help='Number of simulators capturing in parallel (clones are created as needed).')
+@click.option('--trace', 'trace_path', default=None, help='Write a Chrome/Perfetto trace of the run to this JSON file.')
+def run(skip_capture, jobs, force, capture_jobs, trace_path):
     """Run the full screenshot generation pipeline"""
     from .config import load_config
     from .runner import Runner
+    from . import instrument
     
+    recorder = instrument.TraceRecorder() if trace_path else None
+    if recorder:
+        instrument.install(recorder)
     try:
         config = load_config()
         runner = Runner(config)
-        runner.run(skip_capture=skip_capture)
+        runner.run(skip_capture=skip_capture, jobs=jobs, force=force, capture_jobs=capture_jobs)
         click.echo("✅ Pipeline completed!")
     except Exception as e:
         click.echo(f"❌ Error: {e}", err=True)
         sys.exit(1)
+    finally:
+        if recorder:
+            instrument.install(None)
+            recorder.save(trace_path)
+            click.echo(f"🧵 Trace written to {trace_path} (open in https://ui.perfetto.dev)")
+
+@main.command()
+@click.option('--config', 'config_path', default='framed.yaml', show_default=True, help='Configuration file to watch.')
+@click.option('--interval', default=0.2, show_default=True, help='Polling interval in seconds.')
+def watch(config_path, interval):
+    """Re-render affected screenshots whenever the config, raw screenshots or templates change"""
+    from .watch import Watcher
+
+    Watcher(config_path, interval=max(0.05, interval)).run()
+
+@main.command()
+@click.option('--config', 'config_path', default='framed.yaml', show_default=True, help='Configuration file to compile.')
+@click.option('--json', 'json_path', default=None, help="Write the plan as JSON to this file ('-' for stdout).")
+def plan(config_path, json_path):
+    """Show every render the config resolves to (dry run, no images are read)"""
+    from .config import load_config
+
+    try:
+        render_plan = load_config(config_path).plan
+    except Exception as e:
+        click.echo(f"❌ Error: {e}", err=True)
+        sys.exit(1)
+
+    if json_path == '-':
+        click.echo(render_plan.to_json())
+        return
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            f.write(render_plan.to_json())
+        click.echo(f"💾 Plan written to {json_path} ({len(render_plan.jobs)} jobs)")
+        return
+
+    click.echo(f"\n📋 Render plan: {len(render_plan.jobs)} jobs ({render_plan.raw_dir} -> {render_plan.final_dir})\n")
+    for job in render_plan.jobs:
+        missing = [src for src in job.sources if not src.exists()]
+        mark = "⚠️ " if missing else "✨"
+        sources = ", ".join(src.name for src in job.sources)
+        click.echo(f"  {mark} {job.output_dir.name}/{job.output_name}  <- {sources}  [{job.template}]")
+        for text_config in job.text_configs:
+            title = text_config.get('title_text', '').replace('\n', ' ')
+            click.echo(f"       {title}")
+    click.echo("")
+
+@main.command()
+@click.option('--config', 'config_path', default=None, help="Config used by requests without 'config' (warmed up at start).")
+@click.option('--host', default='127.0.0.1', show_default=True, help='Address to listen on.')
+@click.option('--port', default=8787, show_default=True, help='HTTP port to listen on.')
+@click.option('--socket', 'socket_path', default=None, help='Listen on this Unix socket instead of a TCP port.')
+@click.option('--jobs', '-j', default=0, show_default=True, help='Number of render worker processes (0 = one per CPU).')
+def serve(config_path, host, port, socket_path, jobs):
+    """Run a render daemon that keeps fonts and bezels warm between requests"""
+    from .server import serve as run_server
+
+    run_server(config_path, host, port, socket_path, jobs)
+
+@main.command()
+@click.option('--template', '-t', 'templates', multiple=True, help='Template to benchmark (repeatable, default: all installed).')
+@click.option('--iterations', '-n', default=5, show_default=True, help='Renders of every sample screenshot per template.')
+@click.option('--warmup', default=1, show_default=True, help='Untimed iterations first (fills font and bezel caches).')
+@click.option('--json', 'json_path', default=None, help='Write the machine-readable report to this file.')
+@click.option('--baseline', default=None, help='Report JSON to compare against; exits non-zero on a regression.')
+@click.option('--tolerance', default=0.15, show_default=True, help='Allowed p50 slowdown per stage vs the baseline (0.15 = 15%).')
+def bench(templates, iterations, warmup, json_path, baseline, tolerance):
+    """Benchmark rendering of the sample screenshots per stage"""
+    from . import bench as benchmark
+
+    names = list(templates) or benchmark.installed_templates()
+    unknown = [name for name in names if name not in benchmark.installed_templates()]
+    if unknown:
+        click.echo(f"❌ Template(s) not found: {', '.join(unknown)}", err=True)
+        sys.exit(1)
+
+    report = benchmark.run_bench(names, iterations=max(1, iterations), warmup=max(0, warmup))
+    click.echo(benchmark.format_report(report))
+
+    if json_path:
+        benchmark.save_report(report, json_path)
+        click.echo(f"\n💾 Report written to {json_path}")
+
+    if baseline:
+        regressions = benchmark.compare(report, benchmark.load_report(baseline), tolerance=tolerance)
+        if regressions:
+            click.echo(f"\n⚠️  {len(regressions)} stage(s) slower than {baseline}:")
+            for line in regressions:
+                click.echo(f"   - {line}")
+            sys.exit(1)
+        click.echo(f"\n✅ No regressions vs {baseline}")
 
 @main.command(name="list-templates")
 def list_templates():
     """List all available templates"""
-    from pathlib import Path
-    import yaml
-    
-    templates_dir = Path(__file__).parent / "templates"
-    if not templates_dir.exists():
+    from . import registry
+
+    templates = registry.discover()
+    if not templates:
         click.echo("❌ No templates found.")
         return
         
     click.echo("\n📋 Available Templates:\n")
     
-    for item in templates_dir.iterdir():
-        if item.is_dir() and not item.name.startswith('__'):
-            config_path = item / "template.yaml"
-            desc = "No description available"
-            
-            if config_path.exists():
-                try:
-                    with open(config_path, 'r', encoding='utf-8') as f:
-                        data = yaml.safe_load(f)
-                        desc = data.get('description', desc)
-                except:
-                    pass
-            
-            click.echo(f"  ✨ {item.name}:")
-            click.echo(f"      {desc}")
+    for name, info in templates.items():
+        source = "" if info.source == "built-in" else f" ({info.source})"
+        click.echo(f"  ✨ {name}{source}:")
+        click.echo(f"      {info.description}")
 
     click.echo("")
 
@@ -63,34 +151,23 @@ def list_templates():
 @click.option('--name', default='standard', help='Name of the template to inspect')
 def template_help(name):
     """Show available settings for a template"""
-    import yaml
-    from pathlib import Path
-    
-    template_dir = Path(__file__).parent / "templates" / name
-    config_path = template_dir / "template.yaml"
+    from . import registry
     
-    if not config_path.exists():
+    info = registry.get(name)
+    if info is None or info.path is None or not (info.path / "template.yaml").exists():
         click.echo(f"❌ Template '{name}' not found or has no template.yaml")
         return
 
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
-            
-        click.echo(f"\n🎨 Template: {name}")
-        click.echo(f"   {data.get('description', 'No description available')}")
-        click.echo("\n🛠  Available Settings (for template_settings):")
-        
-        defaults = data.get('defaults', {})
-        if not defaults:
-            click.echo("   (No configurable settings)")
-        else:
-            for key, value in defaults.items():
-                click.echo(f"   - {key}: (default: {value})")
-        click.echo("")
-        
-    except Exception as e:
-        click.echo(f"❌ Error reading template config: {e}", err=True)
+    click.echo(f"\n🎨 Template: {name}")
+    click.echo(f"   {info.description}")
+    click.echo("\n🛠  Available Settings (for template_settings):")
+    
+    if not info.defaults:
+        click.echo("   (No configurable settings)")
+    else:
+        for key, value in info.defaults.items():
+            click.echo(f"   - {key}: (default: {value})")
+    click.echo("")
 
 @main.command(name="generate-samples")
 @click.option('--template', '-t', default=None, help='Generate samples for a specific template only')
@@ -99,9 +176,9 @@ def generate_samples(template):
     from pathlib import Path
     from .config import load_config, Config
     from .processor import Processor
+    from . import registry
     import shutil
     
-    templates_dir = Path(__file__).parent / "templates"
     framed_root = Path(__file__).parent.parent.parent
     sample_raws = framed_root / "sample_raws" / "ja"
     
@@ -115,11 +192,10 @@ def generate_samples(template):
     generated = 0
     templates_to_process = []
     
-    for item in sorted(templates_dir.iterdir()):
-        if item.is_dir() and not item.name.startswith('__'):
-            if template and item.name != template:
-                continue
-            templates_to_process.append(item)
+    for name, info in registry.discover().items():
+        if info.path is None or (template and name != template):
+            continue
+        templates_to_process.append(info.path)
     
     if template and not templates_to_process:
         click.echo(f"❌ Template '{template}' not found")
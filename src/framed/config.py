@@ -1,7 +1,13 @@
 from dataclasses import dataclass
+from functools import cached_property
 import yaml
 from pathlib import Path
 from typing import List, Dict, Any
+from . import registry
+
+CAPTURE_MODES = ('test', 'build_once', 'multi_locale')
+EXTRACT_BACKENDS = ('auto', 'bulk', 'legacy')
+
 
 @dataclass
 class Config:
@@ -17,6 +23,25 @@ class Config:
     template: str = 'standard'
     template_defaults: Dict[str, Any] = None
     groups: List[Dict[str, Any]] = None  # For multi-device cascade output
+    extract_concurrency: int = 8  # Max concurrent xcresulttool calls per bundle
+    extract_backend: str = 'auto'  # 'auto' (by Xcode version), 'bulk' or 'legacy'
+    xcresult_cache_dir: str | None = None  # Optional on-disk cache of xcresulttool objects
+    simulator_policy: str = 'keep'  # After capture: 'keep' simulators running, 'restore' or 'shutdown'
+    appearance: str | None = None  # 'light' / 'dark' to force the simulator appearance
+    image_format: str = 'png'  # Output encoding: 'png' or 'jpeg'
+    png_compress_level: int = 6  # zlib level 0-9 (lower = faster, larger)
+    png_optimize: bool = False  # Extra PNG size pass (slow)
+    png_quantize: int = 0  # Palette colors for a quantized PNG (0 = full color)
+    jpeg_quality: int = 90
+    encode_threads: int = 2  # Background threads encoding finished images
+    group_memory_budget_mb: int = 256  # Device frames a group render may hold in memory at once
+    capture_mode: str = 'test'  # 'test' (xcodebuild test per capture), 'build_once' (build-for-testing + test-without-building) or 'multi_locale'
+
+    @cached_property
+    def plan(self):
+        """The compiled RenderPlan (see plan.py); recompiled for copies made with dataclasses.replace."""
+        from .plan import compile_plan
+        return compile_plan(self)
 
 def load_config(path: str = "framed.yaml") -> Config:
     """Load configuration from a YAML file"""
@@ -32,17 +57,9 @@ def load_config(path: str = "framed.yaml") -> Config:
     # Template Configuration (Root level preferred, fallback to config section)
     template_name = data.get('template') or config_section.get('template', 'standard')
     
-    # Load Template Defaults
-    template_config_path = Path(__file__).parent / "templates" / template_name / "template.yaml"
-    template_defaults = {}
-    
-    if template_config_path.exists():
-        try:
-            with open(template_config_path, 'r', encoding='utf-8') as f:
-                tmpl_data = yaml.safe_load(f)
-                template_defaults = tmpl_data.get('defaults', {})
-        except Exception as e:
-            print(f"⚠️ Failed to load template config: {e}")
+    # Load Template Defaults (template.yaml, found through the template registry)
+    info = registry.get(template_name)
+    template_defaults = dict(info.defaults) if info else {}
 
     # Merge Global Template Settings
     # Root level 'template_settings' preferred, fallback to config section
@@ -61,7 +78,7 @@ def load_config(path: str = "framed.yaml") -> Config:
     # No, Processor looks at 'meta' (screenshot config). It falls back to defaults if not found.
     # So we should inject template_defaults into the Config object so Processor can use them as fallback.
     
-    return Config(
+    config = Config(
         project=config_section.get('project'),
         scheme=config_section.get('scheme'),
         output_dir=config_section.get('output_dir', 'docs/screenshots'),
@@ -73,5 +90,38 @@ def load_config(path: str = "framed.yaml") -> Config:
         languages=data.get('languages', ['en']),
         raw_config=data, # Keeps original structure
         template_defaults=template_defaults, # New field
-        groups=data.get('groups', None)  # Multi-device cascade groups
+        groups=data.get('groups', None),  # Multi-device cascade groups
+        extract_concurrency=int(config_section.get('extract_concurrency', 8)),
+        extract_backend=config_section.get('extract_backend', 'auto'),
+        xcresult_cache_dir=config_section.get('xcresult_cache_dir'),
+        capture_mode=config_section.get('capture_mode', 'test'),
+        simulator_policy=config_section.get('simulator_policy', 'keep'),
+        appearance=config_section.get('appearance'),
+        image_format=config_section.get('image_format', 'png'),
+        png_compress_level=int(config_section.get('png_compress_level', 6)),
+        png_optimize=bool(config_section.get('png_optimize', False)),
+        png_quantize=int(config_section.get('png_quantize', 0) or 0),
+        jpeg_quality=int(config_section.get('jpeg_quality', 90)),
+        encode_threads=int(config_section.get('encode_threads', 2)),
+        group_memory_budget_mb=int(config_section.get('group_memory_budget_mb', 256))
     )
+    _validate(config)
+    # Resolve every render up front: Processor only executes the plan
+    config.plan
+    return config
+
+
+def _validate(config: Config):
+    """Reject unknown capture settings now rather than after a (slow) build-for-testing."""
+    from .capture import APPEARANCES, SIMULATOR_POLICIES
+
+    choices = {
+        'capture_mode': (config.capture_mode, CAPTURE_MODES),
+        'extract_backend': (config.extract_backend, EXTRACT_BACKENDS),
+        'simulator_policy': (config.simulator_policy, SIMULATOR_POLICIES),
+        'appearance': (config.appearance, (None,) + APPEARANCES),
+    }
+    for name, (value, allowed) in choices.items():
+        if value not in allowed:
+            expected = ', '.join(str(a) for a in allowed if a is not None)
+            raise ValueError(f"Unknown {name} '{value}' in config (expected one of {expected})")
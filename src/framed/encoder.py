@@ -0,0 +1,85 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image
+
+from .config import Config
+from .instrument import stage
+
+FORMATS = ('png', 'jpeg')
+
+
+class Encoder:
+    """
+    Writes final images with the encoder settings from framed.yaml:
+      image_format        'png' (default) or 'jpeg'
+      png_compress_level  zlib level 0-9 (default 6, Pillow's default)
+      png_optimize        extra PNG size pass (slow)
+      png_quantize        palette colors for a quantized PNG (0 = off)
+      jpeg_quality        JPEG quality (default 90)
+
+    With background=True, encoding runs on a small thread pool so that saving one
+    image overlaps with rendering the next (zlib and libjpeg release the GIL).
+    """
+
+    def __init__(self, config: Config, background: bool = False):
+        self.format = (config.image_format or 'png').lower()
+        if self.format == 'jpg':
+            self.format = 'jpeg'
+        if self.format not in FORMATS:
+            raise ValueError(f"Unknown image_format '{config.image_format}' (expected png or jpeg)")
+        self.png_compress_level = config.png_compress_level
+        self.png_optimize = config.png_optimize
+        self.png_quantize = config.png_quantize
+        self.jpeg_quality = config.jpeg_quality
+        self.threads = max(1, config.encode_threads)
+        self.background = background
+        self._pool = None
+
+    @property
+    def settings(self) -> dict:
+        """Everything that affects the encoded bytes (part of the render fingerprint)."""
+        if self.format == 'jpeg':
+            return {'format': 'jpeg', 'quality': self.jpeg_quality}
+        return {'format': 'png', 'compress_level': self.png_compress_level,
+                'optimize': self.png_optimize, 'quantize': self.png_quantize}
+
+    def output_name(self, name: str) -> str:
+        """File name for the configured format (e.g. 01_inbox.png -> 01_inbox.jpg)."""
+        if self.format == 'jpeg':
+            return str(Path(name).with_suffix('.jpg'))
+        return name
+
+    def encode(self, image: Image.Image, path: Path):
+        with stage('encode'):
+            # Outputs may be hardlinked to identical ones (see Processor._pending_jobs):
+            # write a new file instead of overwriting the shared one in place
+            Path(path).unlink(missing_ok=True)
+            if self.format == 'jpeg':
+                image.convert('RGB').save(path, 'JPEG', quality=self.jpeg_quality)
+                return
+            if self.png_quantize:
+                image = image.convert('RGB').quantize(colors=self.png_quantize)
+            image.save(path, 'PNG', compress_level=self.png_compress_level, optimize=self.png_optimize)
+
+    def submit(self, image: Image.Image, path: Path) -> Future:
+        """Encode in the background (or inline when background is off); the future holds the path."""
+        if not self.background:
+            future = Future()
+            try:
+                self.encode(image, path)
+                future.set_result(path)
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="framed-encode")
+        return self._pool.submit(self._encode_to, image, path)
+
+    def _encode_to(self, image: Image.Image, path: Path) -> Path:
+        self.encode(image, path)
+        return path
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -0,0 +1,134 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .config import Config
+from .plan import RenderJob
+from . import instrument
+
+
+@dataclass
+class JobResult:
+    job: RenderJob
+    output: Path | None = None
+    error: str | None = None
+    cache_stats: dict = field(default_factory=dict)
+    trace_events: list = field(default_factory=list)  # Recorded in a worker process (--trace)
+    group_peak_bytes: int = 0  # Peak device frame memory of a 'group' job
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _execute(processor, job: RenderJob) -> JobResult:
+    """Run a job, turning any exception into a per-job error."""
+    before = processor.cache_stats()
+    processor.group_peak_bytes = 0
+    try:
+        output = processor.render_job(job)
+        result = JobResult(job, output=output)
+    except Exception as e:
+        result = JobResult(job, error=f"{type(e).__name__}: {e}")
+    result.cache_stats = {k: v - before.get(k, 0) for k, v in processor.cache_stats().items()}
+    result.group_peak_bytes = processor.group_peak_bytes
+    return result
+
+
+# Per-process Processor used by pool workers (created once by the initializer)
+_worker_processor = None
+
+
+def _init_worker(config: Config, trace: bool = False):
+    global _worker_processor
+    from .processor import Processor
+    if trace:
+        instrument.install(instrument.TraceRecorder())
+    # Workers encode inline: the pool already overlaps encoding with other renders
+    _worker_processor = Processor(config, verbose=False, background_encode=False)
+
+
+def _run_in_worker(job: RenderJob) -> JobResult:
+    result = _execute(_worker_processor, job)
+    result.trace_events = instrument.drain()
+    return result
+
+
+def resolve_jobs(jobs: int) -> int:
+    """Map the --jobs value to a worker count (0 means one per CPU)."""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+class RenderEngine:
+    """
+    Executes render jobs either in-process or on a process pool.
+    Results are always yielded in job order, regardless of completion order,
+    and a failing job never stops the others.
+    """
+
+    def __init__(self, processor, jobs: int = 1):
+        self.processor = processor
+        self.workers = resolve_jobs(jobs)
+        self._pool = None
+
+    def run(self, jobs: Iterable[RenderJob]) -> Iterator[JobResult]:
+        jobs = list(jobs)
+        if self.workers == 1 or len(jobs) <= 1:
+            for job in jobs:
+                yield _execute(self.processor, job)
+            return
+
+        workers = min(self.workers, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.processor.config, instrument.tracing())) as pool:
+            futures = [pool.submit(_run_in_worker, job) for job in jobs]
+            for job, future in zip(jobs, futures):
+                try:
+                    result = future.result()
+                    instrument.merge(result.trace_events)
+                    result.trace_events = []
+                    yield result
+                except Exception as e:
+                    # e.g. a worker crashed (BrokenProcessPool)
+                    yield JobResult(job, error=f"{type(e).__name__}: {e}")
+
+    # --- Incremental use (jobs arrive while other work, e.g. capture, is running) ---
+
+    def start(self):
+        """
+        Open a pool for submit(). With a single worker, jobs render on one background
+        thread in this process, so they still overlap with the caller's work.
+        """
+        if self._pool is not None:
+            return
+        if self.workers == 1:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="framed-render")
+        else:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.processor.config, instrument.tracing()))
+
+    def submit(self, job: RenderJob) -> Future:
+        self.start()
+        if self.workers == 1:
+            return self._pool.submit(_execute, self.processor, job)
+        return self._pool.submit(_run_in_worker, job)
+
+    @staticmethod
+    def result(job: RenderJob, future: Future) -> JobResult:
+        """Wait for a submitted job; pool failures become a per-job error."""
+        try:
+            result = future.result()
+            instrument.merge(result.trace_events)
+            result.trace_events = []
+            return result
+        except Exception as e:
+            return JobResult(job, error=f"{type(e).__name__}: {e}")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
@@ -1,111 +1,336 @@
 import subprocess
 import os
+import re
 import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from .instrument import span, traced_run
+
+DEFAULT_CONCURRENCY = 8
+
+# `xcresulttool export attachments` (bulk export + manifest) ships with Xcode 16.3
+BULK_EXPORT_MIN_XCODE = (16, 3)
+
+# e.g. "inbox_0_1A2B3C4D-....png" -> "inbox"
+_SUGGESTED_NAME = re.compile(r'^(?P<name>.+)_\d+_[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}$')
+
+class ObjectCache:
+    """
+    Parsed `xcresulttool get object` results keyed by (bundle identity, object id),
+    kept in memory and optionally persisted under cache_dir so that re-extracting
+    the same bundle in a later run needs no `get` calls at all.
+    """
+
+    def __init__(self, cache_dir: Path | str | None = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._objects = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _disk_path(self, bundle_id: str, object_id: str) -> Path:
+        # Object ids aren't guaranteed to be filename-safe
+        name = hashlib.sha1(object_id.encode('utf-8')).hexdigest()
+        return self.cache_dir / bundle_id / f"{name}.json"
+
+    def get(self, bundle_id: str, object_id: str):
+        key = (bundle_id, object_id)
+        with self._lock:
+            obj = self._objects.get(key)
+        if obj is None and self.cache_dir:
+            try:
+                with open(self._disk_path(bundle_id, object_id), 'r', encoding='utf-8') as f:
+                    obj = json.load(f)
+                with self._lock:
+                    self._objects[key] = obj
+            except (OSError, ValueError):
+                obj = None
+        with self._lock:
+            if obj is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return obj
+
+    def put(self, bundle_id: str, object_id: str, obj):
+        with self._lock:
+            self._objects[(bundle_id, object_id)] = obj
+        if self.cache_dir:
+            path = self._disk_path(bundle_id, object_id)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(obj, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"   ⚠️  Could not write xcresult cache entry: {e}")
+
+    def summary(self) -> str:
+        return f"{self.hits} hits, {self.misses} misses"
+
+
 class Extractor:
-    def process_xcresult(self, xcresult_path: Path, output_dir: Path):
-        """Extract screenshots from an xcresult bundle."""
+    def __init__(self, max_workers: int = DEFAULT_CONCURRENCY, xcrun: str = "xcrun", backend: str = "auto",
+                 cache: ObjectCache | None = None):
+        # Upper bound on concurrent xcresulttool subprocesses
+        self.max_workers = max(1, max_workers)
+        # Overridable so extraction can be exercised with a fake `xcrun` script
+        self.xcrun = xcrun
+        # 'auto' (pick by Xcode version), 'bulk' or 'legacy'
+        self.backend = backend
+        self._xcode_version = None
+        self._version_lock = threading.Lock()
+        # Memoized `get object` results (shared across bundles and, with a cache_dir, across runs)
+        self.cache = cache or ObjectCache()
+        self._bundle_ids = {}
+
+    def process_xcresult(self, xcresult_path: Path, output_dir: Path | None, configuration_dirs: dict | None = None):
+        """
+        Extract screenshots from an xcresult bundle. With configuration_dirs
+        ({test configuration name: dir}) attachments are split by the test plan
+        configuration that produced them instead of all going to output_dir.
+        """
         if not xcresult_path.exists():
             return
 
+        if self._use_bulk_export():
+            with span('extract', backend='bulk'):
+                if self._export_attachments_bulk(xcresult_path, output_dir, configuration_dirs):
+                    return
+            print("    ⚠️  Bulk attachment export failed, falling back to legacy extraction")
+
+        with span('extract', backend='legacy'):
+            self._process_xcresult_legacy(xcresult_path, output_dir, configuration_dirs)
+
+    @staticmethod
+    def _output_dir(configuration, output_dir, configuration_dirs):
+        """Where an attachment from `configuration` goes (None = not wanted)."""
+        if configuration_dirs is None:
+            return output_dir
+        return configuration_dirs.get(configuration, output_dir)
+
+    def _use_bulk_export(self) -> bool:
+        if self.backend == 'bulk':
+            return True
+        if self.backend == 'legacy':
+            return False
+        return self.xcode_version() >= BULK_EXPORT_MIN_XCODE
+
+    def xcode_version(self) -> tuple[int, int]:
+        """Installed Xcode version as (major, minor), (0, 0) if it can't be determined."""
+        # Captures share one Extractor: detect once, and only publish the final value
+        with self._version_lock:
+            if self._xcode_version is None:
+                version = (0, 0)
+                try:
+                    res = traced_run([self.xcrun, 'xcodebuild', '-version'], capture_output=True, text=True, check=True)
+                    match = re.search(r'Xcode (\d+)(?:\.(\d+))?', res.stdout)
+                    if match:
+                        version = (int(match.group(1)), int(match.group(2) or 0))
+                except (OSError, subprocess.CalledProcessError):
+                    pass
+                self._xcode_version = version
+            return self._xcode_version
+
+    def _export_attachments_bulk(self, xcresult_path: Path, output_dir: Path | None, configuration_dirs: dict | None = None) -> bool:
+        """
+        Export every attachment with a single `xcresulttool export attachments` call,
+        then map the manifest's suggested names back to `{attachment.name}.png`.
+        Returns False if the bulk export is unavailable or its output can't be read.
+        """
+        with tempfile.TemporaryDirectory(prefix="framed_attachments_") as temp_dir:
+            export_dir = Path(temp_dir)
+            try:
+                traced_run([
+                    self.xcrun, 'xcresulttool', 'export', 'attachments',
+                    '--path', str(xcresult_path),
+                    '--output-path', str(export_dir)
+                ], check=True, capture_output=True, text=True)
+                with open(export_dir / "manifest.json", 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError, subprocess.CalledProcessError):
+                return False
+
+            # Manifest order follows the tests; if a name repeats, the last one wins (as in legacy mode)
+            exported = {}
+            for test in manifest:
+                for attachment in test.get('attachments', []):
+                    file_name = attachment.get('exportedFileName')
+                    name = self._attachment_name(attachment.get('suggestedHumanReadableName') or file_name or "")
+                    target_dir = self._output_dir(attachment.get('configurationName'), output_dir, configuration_dirs)
+                    if name and file_name and target_dir and (export_dir / file_name).exists():
+                        exported[target_dir / f"{name}.png"] = export_dir / file_name
+
+            for out_path, src in exported.items():
+                shutil.move(str(src), str(out_path))
+        return True
+
+    @staticmethod
+    def _attachment_name(suggested_name: str) -> str:
+        """Recover `attachment.name` from xcresulttool's suggested file name."""
+        stem = Path(suggested_name).stem
+        match = _SUGGESTED_NAME.match(stem)
+        return match.group('name') if match else stem
+
+    def _process_xcresult_legacy(self, xcresult_path: Path, output_dir: Path | None, configuration_dirs: dict | None = None):
+        """Walk the legacy object graph and export attachments one payloadRef at a time."""
         # 1. Get Root Info
-        root_json = self._run_xcresulttool(['get', 'object', '--path', str(xcresult_path), '--format', 'json'])
-        if not root_json: 
+        root_json = self._get_object(xcresult_path)
+        if not root_json:
             print("Failed to get root json")
             return
-        
+
+        # 2. Collect (configuration name, test summary ref) pairs (cheap, a couple of sequential calls)
+        summary_refs = []
+
         # 'actions' -> _values -> 'actionResult' -> 'testsRef'
         actions = root_json.get('actions', {}).get('_values', [])
-        
+
         for action in actions:
             action_result = action.get('actionResult', {})
             if action_result:
                 # testsRef is directly inside actionResult
                 tests_ref = action_result.get('testsRef', {}).get('id', {}).get('_value')
                 if tests_ref:
-                    self._traverse_tests(xcresult_path, tests_ref, output_dir)
+                    self._traverse_tests(xcresult_path, tests_ref, summary_refs)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # 3. Fetch every test summary concurrently (one subprocess each)
+            summaries = pool.map(lambda item: self._process_test_summary(xcresult_path, item[1]), summary_refs)
+
+            # Attachments are collected in traversal order; if a name repeats, the last one wins (as before)
+            attachments = {}
+            for (configuration, _), activity_summaries in zip(summary_refs, summaries):
+                target_dir = self._output_dir(configuration, output_dir, configuration_dirs)
+                if target_dir:
+                    self._walk_activity_summaries(activity_summaries, attachments.setdefault(target_dir, {}))
+
+            # 4. Export attachments concurrently
+            exports = [
+                pool.submit(self._export_attachment, xcresult_path, payload_ref, target_dir / f"{name}.png")
+                for target_dir, named_refs in attachments.items()
+                for name, payload_ref in named_refs.items()
+            ]
+            for future in exports:
+                future.result()
 
-    def _traverse_action_result(self, xcresult_path, ref_id, output_dir):
+    def _traverse_action_result(self, xcresult_path, ref_id, summary_refs):
         # Get Action Result
-        res = self._run_xcresulttool(['get', 'object', '--path', str(xcresult_path), '--id', ref_id, '--format', 'json'])
-        if not res: 
+        res = self._get_object(xcresult_path, ref_id)
+        if not res:
             return
-        
+
         # Look for TestRef
         tests_ref = res.get('testsRef', {}).get('id', {}).get('_value')
         if tests_ref:
-            self._traverse_tests(xcresult_path, tests_ref, output_dir)
-            
-    def _traverse_tests(self, xcresult_path, ref_id, output_dir):
-        res = self._run_xcresulttool(['get', 'object', '--path', str(xcresult_path), '--id', ref_id, '--format', 'json'])
-        if not res: 
+            self._traverse_tests(xcresult_path, tests_ref, summary_refs)
+
+    def _traverse_tests(self, xcresult_path, ref_id, summary_refs):
+        res = self._get_object(xcresult_path, ref_id)
+        if not res:
             return
-        
+
         # 'summaries' -> _values -> 'testableSummaries' -> ...
         summaries = res.get('summaries', {}).get('_values', [])
-        
+
         for summary in summaries:
+            # One ActionTestPlanRunSummary per test plan configuration
+            configuration = summary.get('name', {}).get('_value')
             testables = summary.get('testableSummaries', {}).get('_values', [])
             for testable in testables:
                 # Tests (Groups)
                 tests = testable.get('tests', {}).get('_values', [])
-                self._walk_tests_groups(xcresult_path, tests, output_dir)
+                self._walk_tests_groups(tests, summary_refs, configuration)
 
-    def _walk_tests_groups(self, xcresult_path, nodes, output_dir):
+    def _walk_tests_groups(self, nodes, summary_refs, configuration=None):
         for node in nodes:
             # Check for subtests or direct activitySummaries (unlikely in groups but possible)
             subtests = node.get('subtests', {}).get('_values', [])
             if subtests:
-                self._walk_tests_groups(xcresult_path, subtests, output_dir)
-            
-            # Check if this node is a test case with a summaryRef
+                self._walk_tests_groups(subtests, summary_refs, configuration)
+
             # Check if this node is a test case with a summaryRef
             summary_ref = node.get('summaryRef', {}).get('id', {}).get('_value')
             if summary_ref:
-                # Fetch the detailed summary for this test case
-                self._process_test_summary(xcresult_path, summary_ref, output_dir)
+                # The detailed summary is fetched later, concurrently with the others
+                summary_refs.append((configuration, summary_ref))
+
+    def _process_test_summary(self, xcresult_path, ref_id):
+        res = self._get_object(xcresult_path, ref_id)
+        if not res:
+            return []
 
-    def _process_test_summary(self, xcresult_path, ref_id, output_dir):
-        res = self._run_xcresulttool(['get', 'object', '--path', str(xcresult_path), '--id', ref_id, '--format', 'json'])
-        if not res: 
-            return
-        
         # Now we look for activitySummaries
-        activity_summaries = res.get('activitySummaries', {}).get('_values', [])
-        self._walk_activity_summaries(xcresult_path, activity_summaries, output_dir)
+        return res.get('activitySummaries', {}).get('_values', [])
 
-    def _walk_activity_summaries(self, xcresult_path, nodes, output_dir):
+    def _walk_activity_summaries(self, nodes, attachments):
         for node in nodes:
-            self._extract_from_activity_summaries(xcresult_path, node, output_dir)
-            
+            self._extract_from_activity_summaries(node, attachments)
+
             # Recurse into subactivities
             sub_activities = node.get('subactivities', {}).get('_values', [])
             if sub_activities:
-                self._walk_activity_summaries(xcresult_path, sub_activities, output_dir)
+                self._walk_activity_summaries(sub_activities, attachments)
 
-    def _extract_from_activity_summaries(self, xcresult_path, node, output_dir):
+    def _extract_from_activity_summaries(self, node, attachments):
         # Find attachments
-        attachments = node.get('attachments', {}).get('_values', [])
-        for attachment in attachments:
+        for attachment in node.get('attachments', {}).get('_values', []):
             name = attachment.get('name', {}).get('_value')
-            filename = attachment.get('filename', {}).get('_value')
             payload_ref = attachment.get('payloadRef', {}).get('id', {}).get('_value')
-            
+
             if name and payload_ref:
-                out_name = f"{name}.png"
-                out_path = output_dir / out_name
-                
-                subprocess.run([
-                    'xcrun', 'xcresulttool', 'export', '--legacy',
-                    '--path', str(xcresult_path),
-                    '--id', payload_ref,
-                    '--output-path', str(out_path),
-                    '--type', 'file'
-                ], check=False, capture_output=True, text=True)
+                attachments[name] = payload_ref
+
+    def _export_attachment(self, xcresult_path, payload_ref, out_path):
+        traced_run([
+            self.xcrun, 'xcresulttool', 'export', '--legacy',
+            '--path', str(xcresult_path),
+            '--id', payload_ref,
+            '--output-path', str(out_path),
+            '--type', 'file'
+        ], check=False, capture_output=True, text=True)
+
+    def _bundle_identity(self, xcresult_path: Path) -> str:
+        """
+        Content identity of a bundle. Info.plist is unique per result bundle, so the
+        same bundle is recognized even when it has been copied or moved.
+        """
+        key = str(xcresult_path)
+        bundle_id = self._bundle_ids.get(key)
+        if bundle_id is None:
+            h = hashlib.sha256()
+            try:
+                h.update((Path(xcresult_path) / "Info.plist").read_bytes())
+            except OSError:
+                h.update(str(Path(xcresult_path).resolve()).encode('utf-8'))
+            bundle_id = h.hexdigest()[:32]
+            self._bundle_ids[key] = bundle_id
+        return bundle_id
+
+    def _get_object(self, xcresult_path: Path, ref_id: str | None = None):
+        """`xcresulttool get object` (root object when ref_id is None), served from the cache when possible."""
+        bundle_id = self._bundle_identity(xcresult_path)
+        object_id = ref_id or "root"
+        obj = self.cache.get(bundle_id, object_id)
+        if obj is not None:
+            return obj
+
+        args = ['get', 'object', '--path', str(xcresult_path)]
+        if ref_id:
+            args += ['--id', ref_id]
+        obj = self._run_xcresulttool(args + ['--format', 'json'])
+        if obj is not None:
+            self.cache.put(bundle_id, object_id, obj)
+        return obj
 
     def _run_xcresulttool(self, args):
-        cmd = ['xcrun', 'xcresulttool'] + args
+        cmd = [self.xcrun, 'xcresulttool'] + args
         if args[0] == 'get' and '--legacy' not in args:
              # Insert --legacy after 'object' if present, else after 'get'
              if 'object' in args:
@@ -113,10 +338,10 @@ class Extractor:
                  args.insert(idx + 1, '--legacy')
              else:
                  args.insert(1, '--legacy')
-             cmd = ['xcrun', 'xcresulttool'] + args
+             cmd = [self.xcrun, 'xcresulttool'] + args
 
         try:
-            res = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            res = traced_run(cmd, capture_output=True, text=True, check=True)
             return json.loads(res.stdout)
         except subprocess.CalledProcessError as e:
             print(f"   stderr: {e.stderr}")
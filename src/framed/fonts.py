@@ -0,0 +1,53 @@
+import os
+from PIL import ImageFont
+
+# Process-wide registry of parsed fonts, keyed by (path, size, index).
+# Parsing large .ttc collections is expensive, so each one is loaded once per run.
+_fonts = {}
+_failed = set()
+_default_font = None
+
+stats = {'hits': 0, 'misses': 0}
+
+
+def get_font(path: str, size: int, index: int = 0):
+    """Return a parsed FreeType font, loading it only on first use. Raises if it can't be loaded."""
+    key = (path, size, index)
+    font = _fonts.get(key)
+    if font is not None:
+        stats['hits'] += 1
+        return font
+    if key in _failed:
+        raise OSError(f"Font could not be loaded: {path}")
+
+    stats['misses'] += 1
+    try:
+        font = ImageFont.truetype(path, size, index=index)
+    except Exception:
+        _failed.add(key)
+        raise
+    _fonts[key] = font
+    return font
+
+
+def load_font(candidates: list[str], size: int):
+    """Return the first loadable font among candidates, falling back to Pillow's default font."""
+    global _default_font
+    for path in candidates:
+        if os.path.exists(path):
+            try:
+                return get_font(path, size, index=0)
+            except Exception:
+                continue
+
+    if _default_font is None:
+        _default_font = ImageFont.load_default()
+    return _default_font
+
+
+def clear():
+    """Drop all cached fonts (e.g. after font files changed on disk)."""
+    global _default_font
+    _fonts.clear()
+    _failed.clear()
+    _default_font = None
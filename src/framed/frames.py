@@ -0,0 +1,102 @@
+import weakref
+from collections import OrderedDict
+from typing import Callable, Iterator
+from PIL import Image
+
+MB = 1024 * 1024
+
+
+class FrameBudgetExceeded(MemoryError):
+    """A group needed more device frames alive at once than group_memory_budget_mb allows."""
+
+
+def image_bytes(image: Image.Image) -> int:
+    """Approximate size of an image's pixel buffer."""
+    return image.width * image.height * len(image.getbands())
+
+
+class GroupFrames:
+    """
+    Device frames of a group, built lazily: frame i is decoded, resized and
+    composited into the bezel only when a template asks for it.
+
+    Templates should take one frame at a time (`for frame in frames:`) and
+    composite it into their output canvas before moving on. Frames still
+    referenced count against `budget_bytes`, except the last one handed out
+    (typically still bound to the template's loop variable while the next is
+    built). Recently used frames are kept for re-access while they fit and
+    rebuilt otherwise. If the frames a template keeps alive would exceed the
+    budget, FrameBudgetExceeded is raised, before building the frame when its
+    size is known from an earlier build (or another frame of the group).
+    """
+
+    def __init__(self, loaders: list[Callable[[], Image.Image]], budget_bytes: int):
+        self._loaders = loaders
+        self.budget_bytes = budget_bytes
+        self._cache = OrderedDict()  # index -> frame, least recently used first
+        self._live = {}  # id(frame) -> bytes, for frames not yet garbage collected
+        self._current = None  # id() of the frame handed out last
+        self.live_bytes = 0
+        self.peak_bytes = 0
+        self.built = 0
+        self._sizes = {}  # index -> bytes of the frame last built for it
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def __iter__(self) -> Iterator[Image.Image]:
+        for i in range(len(self._loaders)):
+            yield self[i]
+
+    def __getitem__(self, index: int) -> Image.Image:
+        if index < 0:
+            index += len(self._loaders)
+        if not 0 <= index < len(self._loaders):
+            raise IndexError("group frame index out of range")
+
+        frame = self._cache.get(index)
+        if frame is not None:
+            self._cache.move_to_end(index)
+            self._current = id(frame)
+            return frame
+
+        # Make room before building: frames of a group usually share one size
+        self._make_room(self._sizes.get(index) or max(self._sizes.values(), default=0))
+        frame = self._loaders[index]()
+        nbytes = image_bytes(frame)
+        self._sizes[index] = nbytes
+        self._make_room(nbytes)
+
+        self.built += 1
+        self._track(frame, nbytes)
+        self._cache[index] = frame
+        self._current = id(frame)
+        return frame
+
+    def _make_room(self, nbytes: int):
+        """Drop cached frames (oldest first) until `nbytes` more fit, or raise if they can't."""
+        while self._cache and self._held_bytes() + nbytes > self.budget_bytes:
+            self._cache.popitem(last=False)
+        held = self._held_bytes()
+        if held and held + nbytes > self.budget_bytes:
+            raise FrameBudgetExceeded(
+                f"group frames need {(held + nbytes) / MB:.0f} MB "
+                f"(budget {self.budget_bytes / MB:.0f} MB); composite one frame at a time "
+                f"or raise group_memory_budget_mb")
+
+    def _held_bytes(self) -> int:
+        """Live frame memory, not counting the frame handed out last."""
+        return self.live_bytes - self._live.get(self._current, 0)
+
+    def _track(self, frame: Image.Image, nbytes: int):
+        self._live[id(frame)] = nbytes
+        self.live_bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.live_bytes)
+        weakref.finalize(frame, self._release, id(frame))
+
+    def _release(self, key: int):
+        self.live_bytes -= self._live.pop(key, 0)
+
+    def close(self):
+        """Drop cached frames (frames still referenced elsewhere stay counted until freed)."""
+        self._cache.clear()
@@ -0,0 +1,161 @@
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import nullcontext
+
+# Timing hooks for the pipeline: coarse spans (capture, extract, render_job, ...),
+# render stages (decode, resize, text, ...) and subprocess calls.
+# Nothing is measured unless a recorder is installed, so `with span(...)`
+# costs one global lookup and a shared no-op context manager when disabled.
+
+_NULL = nullcontext()
+_recorder = None
+
+
+class StageRecorder:
+    """Collects the duration of every stage occurrence, by stage name. Thread-safe."""
+
+    def __init__(self):
+        self.samples = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, args: dict | None = None):
+        with self._lock:
+            self.samples.setdefault(name, []).append(end - start)
+
+    def clear(self):
+        with self._lock:
+            self.samples = {}
+
+
+class TraceRecorder:
+    """
+    Records every span as a Chrome / Perfetto trace event ("X" complete events).
+    Timestamps come from perf_counter, a system-wide monotonic clock, so events
+    recorded in render worker processes line up with the main process.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, start: float, end: float, args: dict | None = None):
+        thread = threading.current_thread()
+        event = {
+            'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': thread.ident,
+            'ts': start * 1e6, 'dur': (end - start) * 1e6,
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+            self._threads[(event['pid'], thread.ident)] = thread.name
+
+    def drain(self) -> list[dict]:
+        """Take the events recorded so far (used to ship worker events to the main process)."""
+        with self._lock:
+            events, self.events = self.events, []
+            names, self._threads = self._threads, {}
+        return events + [self._thread_name(pid, tid, name) for (pid, tid), name in names.items()]
+
+    def merge(self, events: list[dict]):
+        with self._lock:
+            self.events.extend(events)
+
+    @staticmethod
+    def _thread_name(pid, tid, name) -> dict:
+        return {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+
+    def save(self, path: str):
+        with self._lock:
+            events = [dict(e) for e in self.events]
+            events += [self._thread_name(pid, tid, name) for (pid, tid), name in self._threads.items()]
+        # Start the timeline at zero
+        origin = min((e['ts'] for e in events if 'ts' in e), default=0)
+        for event in events:
+            if 'ts' in event:
+                event['ts'] = round(event['ts'] - origin, 3)
+                event['dur'] = round(event['dur'], 3)
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'args': {'name': 'framed'}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+class _Stage:
+    __slots__ = ('name', 'args', 'recorder', 'start')
+
+    def __init__(self, name, args, recorder):
+        self.name = name
+        self.args = args
+        self.recorder = recorder
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+
+def span(name: str, **args):
+    """Context manager timing one occurrence of `name` (no-op unless a recorder is installed)."""
+    recorder = _recorder
+    if recorder is None:
+        return _NULL
+    return _Stage(name, args, recorder)
+
+
+# Render stages (see bench.py) use the same hook
+stage = span
+
+
+def traced_run(cmd: list, **kwargs) -> subprocess.CompletedProcess:
+    """subprocess.run, recorded as a span with the command line and exit code when tracing."""
+    recorder = _recorder
+    if recorder is None:
+        return subprocess.run(cmd, **kwargs)
+
+    args = {'cmd': subprocess.list2cmdline([str(c) for c in cmd]), 'exit_code': None}
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(cmd, **kwargs)
+        args['exit_code'] = result.returncode
+        return result
+    except subprocess.CalledProcessError as e:
+        args['exit_code'] = e.returncode
+        raise
+    except OSError as e:
+        args['error'] = str(e)
+        raise
+    finally:
+        # e.g. "xcrun simctl boot" / "xcodebuild test-without-building"
+        words = [os.path.basename(str(cmd[0]))] + [str(c) for c in cmd[1:3] if not str(c).startswith('-')]
+        recorder.add(' '.join(words), start, time.perf_counter(), args)
+
+
+def tracing() -> bool:
+    """True when a TraceRecorder is installed (render workers then trace too)."""
+    return isinstance(_recorder, TraceRecorder)
+
+
+def drain() -> list[dict]:
+    """Events recorded by this process's TraceRecorder since the last drain."""
+    return _recorder.drain() if isinstance(_recorder, TraceRecorder) else []
+
+
+def merge(events: list[dict]):
+    """Add events recorded elsewhere (a render worker) to the installed TraceRecorder."""
+    if events and isinstance(_recorder, TraceRecorder):
+        _recorder.merge(events)
+
+
+def install(recorder):
+    """Route stage timings to `recorder` (None disables). Returns the previous recorder."""
+    global _recorder
+    previous = _recorder
+    _recorder = recorder
+    return previous
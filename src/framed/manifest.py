@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from . import __version__
+
+MANIFEST_NAME = "manifest.json"
+
+
+class FileHasher:
+    """Content hashes for input files, memoized by (path, mtime, size) for the lifetime of a run."""
+
+    def __init__(self):
+        self._digests = {}
+
+    def digest(self, path: Path | str | None) -> str | None:
+        if not path:
+            return None
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None  # Missing file: hashes as "absent"
+
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        digest = self._digests.get(key)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self._digests[key] = digest
+        return digest
+
+
+class RenderManifest:
+    """
+    Records, for every output under output_dir/framed, a fingerprint of
+    everything that went into it (source PNGs, resolved text config, template,
+    bezel and fonts). Outputs whose fingerprint is unchanged can be skipped.
+    """
+
+    def __init__(self, final_dir: Path):
+        self.final_dir = Path(final_dir)
+        self.path = self.final_dir / MANIFEST_NAME
+        self.hasher = FileHasher()
+        self.entries = {}
+        # Fingerprint -> keys of the outputs recorded with it (for find())
+        self._by_fingerprint = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.entries = data.get('outputs', {})
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable manifest {self.path}: {e}")
+            self.entries = {}
+        for key, entry in self.entries.items():
+            self._by_fingerprint.setdefault(entry.get('fingerprint'), set()).add(key)
+
+    def _key(self, output: Path) -> str:
+        try:
+            return Path(output).relative_to(self.final_dir).as_posix()
+        except ValueError:
+            return Path(output).as_posix()
+
+    def fingerprint(self, sources: list[Path], params: dict, files: list) -> str:
+        """Hash source bytes, resolved render parameters and auxiliary files (bezel, fonts)."""
+        payload = {
+            'version': __version__,
+            'sources': [self.hasher.digest(p) for p in sources],
+            'params': params,
+            'files': {str(p): self.hasher.digest(p) for p in files if p},
+        }
+        blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def is_current(self, output: Path, fingerprint: str) -> bool:
+        entry = self.entries.get(self._key(output))
+        return bool(entry) and entry.get('fingerprint') == fingerprint and Path(output).exists()
+
+    def find(self, fingerprint: str, exclude=()) -> Path | None:
+        """An existing output recorded with this fingerprint (other than those in `exclude`)."""
+        for key in sorted(self._by_fingerprint.get(fingerprint, ())):
+            output = self.final_dir / key
+            if output not in exclude and output.exists():
+                return output
+        return None
+
+    def record(self, output: Path, fingerprint: str):
+        key = self._key(output)
+        old = self.entries.get(key)
+        if old is not None:
+            self._by_fingerprint.get(old.get('fingerprint'), set()).discard(key)
+        self.entries[key] = {'fingerprint': fingerprint}
+        self._by_fingerprint.setdefault(fingerprint, set()).add(key)
+
+    def save(self):
+        self.final_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': __version__, 'outputs': self.entries}, f, indent=2, sort_keys=True, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def link_or_copy(src: Path, dst: Path) -> str:
+    """
+    Materialize dst as a hardlink to src, or a copy where linking isn't possible
+    (other filesystem, no link support). Returns 'linked' or 'copied'.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+        return 'linked'
+    except OSError:
+        shutil.copy2(src, dst)
+        return 'copied'
@@ -0,0 +1,194 @@
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class RenderJob:
+    """
+    One independent render producing a single output file, with every input
+    resolved: source paths, text/style config per screen and sequence position.
+    Jobs compare and hash by their identity fields; the resolved configs are
+    read-only by convention (templates receive copies).
+    """
+    kind: str  # 'image' or 'group'
+    src_dir: Path  # Raw screenshot directory for this device/language
+    output_dir: Path
+    output_name: str
+    lang: str
+    device: str = ""
+    key: str = ""  # Screenshot key ('image' jobs)
+    group_index: int = -1  # Index into config.groups ('group' jobs)
+    sources: tuple = ()  # Source PNG per screen (one for 'image' jobs)
+    keys: tuple = ()  # Screenshot key per source
+    index: int = 0  # Position in the screenshots list (Panoramic context)
+    total: int = 1
+    template: str = ""
+    text_configs: tuple = field(default=(), compare=False)  # Resolved config per source
+    group: dict | None = field(default=None, compare=False)  # Raw group entry ('group' jobs)
+
+    @property
+    def src(self) -> Path:
+        """Source image for 'image' jobs, source directory for 'group' jobs."""
+        return self.sources[0] if self.kind == 'image' else self.src_dir
+
+    @property
+    def output(self) -> Path:
+        return self.output_dir / self.output_name
+
+    def describe(self) -> str:
+        name = self.key if self.kind == 'image' else f"group #{self.group_index + 1}"
+        return f"{self.output_dir.name}/{name}"
+
+    def to_dict(self) -> dict:
+        data = {
+            'kind': self.kind,
+            'device': self.device,
+            'lang': self.lang,
+            'output': self.output.as_posix(),
+            'template': self.template,
+            'inputs': [{'key': key, 'source': src.as_posix(), 'params': config}
+                       for key, src, config in zip(self.keys, self.sources, self.text_configs)],
+        }
+        if self.kind == 'image':
+            data.update(key=self.key, index=self.index, total=self.total)
+        else:
+            data['group_index'] = self.group_index
+        return data
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    """Every render of a config, in execution order (per device/language: groups, then screenshots)."""
+    raw_dir: Path
+    final_dir: Path
+    jobs: tuple = ()
+
+    def for_dir(self, device: str, lang: str) -> list[RenderJob]:
+        """Jobs reading from one raw/{device}_{lang} directory."""
+        return [job for job in self.jobs if job.device == device and job.lang == lang]
+
+    def dirs(self) -> list[tuple[str, str]]:
+        """(device, lang) of every source directory, in execution order."""
+        return list(dict.fromkeys((job.device, job.lang) for job in self.jobs))
+
+    def has_screenshots(self) -> bool:
+        """Whether the config lists any screenshots (without them nothing is rendered, not even groups)."""
+        return any(job.kind == 'image' for job in self.jobs)
+
+    def to_dict(self) -> dict:
+        return {
+            'raw_dir': self.raw_dir.as_posix(),
+            'final_dir': self.final_dir.as_posix(),
+            'jobs': [job.to_dict() for job in self.jobs],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+
+def resolve_text(text_map: dict | str | None, lang: str) -> str:
+    """
+    Resolve text for a given language with fallback.
+    e.g. if lang is 'en-US' but map only has 'en', it will return 'en' value.
+    """
+    if not text_map:
+        return ""
+
+    if isinstance(text_map, str):
+        return text_map
+
+    # 1. Exact match
+    val = text_map.get(lang)
+    if val is not None:
+        return val
+
+    # 2. Base language fallback (e.g. en-US -> en)
+    if '-' in lang:
+        base_lang = lang.split('-')[0]
+        val = text_map.get(base_lang)
+        if val is not None:
+            return val
+
+    return ""
+
+
+def resolve_text_config(defaults: dict, meta: dict, lang: str, group: dict | None = None) -> dict:
+    """Resolve the template config for one screenshot: defaults < group < per-screenshot overrides."""
+    # Start with a copy of defaults (so we inherit every template setting)
+    text_config = dict(defaults or {})
+
+    # Merge group configuration (allows passing custom params like panorama_index)
+    if group:
+        text_config.update(group)
+
+    # Override with meta (screenshot specific config)
+    for name in ('background_color', 'text_color', 'subtitle_color', 'panoramic_color'):
+        if name in meta:
+            text_config[name] = meta[name]
+
+    # Resolve text with fallback
+    text_config['title_text'] = resolve_text(meta.get('title'), lang)
+    text_config['subtitle_text'] = resolve_text(meta.get('subtitle'), lang)
+    return text_config
+
+
+def image_output_name(key: str, index: int) -> str:
+    # Prefix with index to ensure order (e.g. 01_inbox.png), using 1-based indexing for display.
+    # However, if 'key' is "1", "2", etc., use that directly.
+    if key.isdigit():
+        return f"{key}.png"
+    return f"{index + 1:02d}_{key}.png"
+
+
+def compile_plan(config) -> RenderPlan:
+    """Resolve a Config into its RenderPlan. Reads no files: missing sources are skipped when the plan runs."""
+    from .encoder import Encoder
+
+    # Use custom raw_dir if specified, otherwise default to output_dir/raw
+    if config.raw_dir:
+        raw_dir = Path(config.raw_dir)
+    else:
+        raw_dir = Path(config.output_dir) / "raw"
+    final_dir = Path(config.output_dir) / "framed"
+
+    encoder = Encoder(config)
+    screenshots = (config.raw_config or {}).get('screenshots') or {}
+    defaults = config.template_defaults or {}
+
+    jobs = []
+    for device in config.devices:
+        dev_name = device['name']
+        for lang in config.languages:
+            # If raw_dir is set and no device name is given, raw_dir points directly
+            # to the screenshots (e.g. raw_samples/ja/); otherwise raw/{device}_{lang}/
+            if config.raw_dir and not dev_name:
+                src_dir = raw_dir
+                dst_dir = final_dir / (lang if lang else "ja")  # Fallback to 'ja' if lang is empty
+            else:
+                src_dir = raw_dir / f"{dev_name}_{lang}"
+                dst_dir = final_dir / f"{dev_name}_{lang}"
+
+            for group_index, group in enumerate(config.groups or []):
+                keys = tuple(group.get('screens', []))
+                jobs.append(RenderJob(
+                    'group', src_dir, dst_dir, encoder.output_name(group.get('output', 'output.png')), lang,
+                    device=dev_name, group_index=group_index,
+                    sources=tuple(src_dir / f"{key}.png" for key in keys), keys=keys,
+                    template=group.get('template', config.template),
+                    text_configs=tuple(resolve_text_config(defaults, screenshots.get(key, {}), lang, group) for key in keys),
+                    group=group,
+                ))
+
+            # Iterate through config items, not files, to support source_key aliasing
+            for index, (key, meta) in enumerate(screenshots.items()):
+                source_key = meta.get('source_key', key)
+                jobs.append(RenderJob(
+                    'image', src_dir, dst_dir, encoder.output_name(image_output_name(key, index)), lang,
+                    device=dev_name, key=key,
+                    sources=(src_dir / f"{source_key}.png",), keys=(source_key,),
+                    index=index, total=len(screenshots), template=config.template,
+                    text_configs=(resolve_text_config(defaults, meta, lang),),
+                ))
+
+    return RenderPlan(raw_dir, final_dir, tuple(jobs))
@@ -1,270 +1,389 @@
 import os
+import threading
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 from .config import Config
-
-from .templates.standard import StandardTemplate
-from .templates.panoramic import PanoramicTemplate
-from .templates.perspective import PerspectiveTemplate
+from .bezel import get_bezel_cache
+from .engine import RenderEngine
+from .plan import RenderJob
+from .manifest import RenderManifest, link_or_copy
+from .encoder import Encoder
+from .frames import GroupFrames, MB
+from .instrument import span, stage
+from . import registry, text
 
 class Processor:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, jobs: int = 1, force: bool = False, verbose: bool = True, background_encode: bool = True,
+                 templates: dict | None = None):
         self.config = config
+        self.plan = config.plan  # Every render, fully resolved (see plan.py)
+        self.jobs = jobs  # Number of render worker processes (0 = one per CPU)
+        self.force = force  # Re-render even if the manifest says an output is up to date
+        self.verbose = verbose
         self.bezel_path = Path(__file__).parent.parent.parent / "resources" / "bezel.png"
+        self.bezel_cache = get_bezel_cache()
+        self._stream = None  # State of a start_streaming() session
+        self.encoder = Encoder(config, background=background_encode)
+        self._encodes = {}  # Output path -> in-flight background encode
+        self.group_peak_bytes = 0  # Largest amount of group frame memory held at once
 
-        
-        # Select Template
-        if config.template == 'panoramic':
-            self.template = PanoramicTemplate(config)
-            print("  🎨 Using Panoramic Template")
-        elif config.template == 'perspective':
-            self.template = PerspectiveTemplate(config)
-            print("  🎨 Using Perspective Template")
-        else:
-            self.template = StandardTemplate(config)
-            print("  🎨 Using Standard Template")
+        # Template instances by name (groups may pick another). `templates` hands over warm
+        # instances (e.g. from framed watch) made for a config with the same templates and fonts.
+        self._templates = dict(templates or {})
+        for template in self._templates.values():
+            template.config = config
+
+        # Select Template (its module is only imported now, see registry.py)
+        self.template = self._template(config.template)
+        if verbose: print(f"  🎨 Using {config.template.capitalize()} Template")
         
         # Device specific constants for bezel composition
         self.SCREENSHOT_WIDTH = 1206
         self.SCREENSHOT_HEIGHT = 2622
     
-    def _resolve_text(self, text_map: dict | str | None, lang: str) -> str:
-        """
-        Resolve text for a given language with fallback.
-        e.g. if lang is 'en-US' but map only has 'en', it will return 'en' value.
-        """
-        if not text_map:
-            return ""
-        
-        if isinstance(text_map, str):
-            return text_map
-            
-        # 1. Exact match
-        val = text_map.get(lang)
-        if val is not None: 
-            return val
-        
-        # 2. Base language fallback (en-US -> en)
-        if '-' in lang:
-            base_lang = lang.split('-')[0]
-            val = text_map.get(base_lang)
-            if val is not None:
-                return val
-                
-        return ""
+    def _dirs(self) -> tuple[Path, Path]:
+        """(raw_dir, final_dir) for this config."""
+        return self.plan.raw_dir, self.plan.final_dir
 
     def process(self):
         """Apply frames and text to extracted screenshots."""
-        # Use custom raw_dir if specified, otherwise default to output_dir/raw
-        if self.config.raw_dir:
-            raw_dir = Path(self.config.raw_dir)
-        else:
-            raw_dir = Path(self.config.output_dir) / "raw"
-        
-        final_dir = Path(self.config.output_dir) / "framed"
-        
-        screenshot_config = self.config.raw_config.get('screenshots', {})
-        if not screenshot_config:
+        if not self.plan.has_screenshots():
             print("⚠️ No 'screenshots' config found. Skipping processing.")
             return
 
+        self.render(self._collect_jobs(), RenderManifest(self.plan.final_dir))
+
+    def render(self, jobs: list[RenderJob], manifest: RenderManifest) -> int:
+        """Render the jobs whose outputs are out of date and report; returns the number of outputs written."""
+        # Skip outputs whose inputs hash the same as last time
+        fingerprints = {}
+        dedup = self._dedup_state()
+        pending, skipped = self._pending_jobs(jobs, manifest, fingerprints, dedup)
+
+        # Render (in-process or on a process pool); results come back in job order
+        engine = RenderEngine(self, jobs=self.jobs)
+        if engine.workers > 1 and len(pending) > 1:
+            print(f"  ⚙️  Rendering {len(pending)} images with {engine.workers} workers...")
+
+        return self._report(engine.run(pending), manifest, fingerprints, dedup, len(pending), skipped)
+
+    def start_streaming(self) -> bool:
+        """
+        Begin a streaming session: renders for each device/language are queued with
+        submit_captured() as soon as its screenshots are extracted, so they overlap
+        with the captures still running. Returns False if there is nothing to render.
+        """
+        if not self.plan.has_screenshots():
+            print("⚠️ No 'screenshots' config found. Skipping processing.")
+            return False
+
+        raw_dir, final_dir = self._dirs()
+        engine = RenderEngine(self, jobs=self.jobs)
+        engine.start()
+        self._stream = {
+            'lock': threading.Lock(),
+            'engine': engine,
+            'manifest': RenderManifest(final_dir),
+            'fingerprints': {},
+            'dedup': self._dedup_state(),
+            'submitted': [],
+            'skipped': 0,
+        }
+        print(f"  ⚙️  Rendering in the background as captures finish ({engine.workers} worker(s))")
+        return True
+
+    def submit_captured(self, device_name: str, lang: str):
+        """Queue the renders of one freshly extracted raw/{device}_{lang} directory. Thread-safe."""
+        stream = self._stream
+        with stream['lock']:
+            jobs = self._collect_dir_jobs(device_name, lang)
+            pending, skipped = self._pending_jobs(jobs, stream['manifest'], stream['fingerprints'], stream['dedup'])
+            stream['skipped'] += skipped
+            for job in pending:
+                stream['submitted'].append((job, stream['engine'].submit(job)))
 
+    def finish_streaming(self):
+        """Wait for every queued render, then save the manifest and report (same as process())."""
+        stream = self._stream
+        self._stream = None
+        engine = stream['engine']
+        try:
+            results = (engine.result(job, future) for job, future in stream['submitted'])
+            self._report(results, stream['manifest'], stream['fingerprints'], stream['dedup'],
+                         len(stream['submitted']), stream['skipped'])
+        finally:
+            engine.shutdown()
+
+    @staticmethod
+    def _dedup_state() -> dict:
+        """Identical-render tracking for one run (see _pending_jobs)."""
+        return {
+            'renders': {},  # Fingerprint -> the job rendering it this run
+            'copies': {},  # Rendering job -> jobs that get its file linked/copied once written
+            'reused': 0,  # Renders saved
+            'outputs': set(),  # Outputs (re)written this run: stale until then, so never reused from
+        }
+
+    def _pending_jobs(self, jobs: list[RenderJob], manifest: RenderManifest, fingerprints: dict, dedup: dict) -> tuple[list[RenderJob], int]:
+        """
+        Fingerprint jobs (into `fingerprints`) and return (jobs to render, jobs skipped as unchanged).
 
-        for device in self.config.devices:
-            dev_name = device['name']
-            for lang in self.config.languages:
-                # If raw_dir is set and points to a specific directory, use it directly
-                # Otherwise use the traditional {device}_{lang} naming
-                if self.config.raw_dir and not dev_name:
-                    # raw_dir points directly to screenshots (e.g., raw_samples/ja/)
-                    # lang might be empty string to avoid double suffix
-                    src_dir = raw_dir
-                    # For output, use a clean name
-                    output_suffix = lang if lang else "ja"  # Fallback to 'ja' if lang is empty
-                    dst_dir = final_dir / output_suffix
-                else:
-                    # Traditional behavior: raw/device_lang/
-                    src_dir = raw_dir / f"{dev_name}_{lang}"
-                    dst_dir = final_dir / f"{dev_name}_{lang}"
-                
-
-                if not src_dir.exists():
+        Jobs with the same fingerprint produce identical files (e.g. 'en-US' falling back
+        to the 'en' texts, or devices sharing raw screenshots), so only the first one is
+        rendered; the others are linked to its output in _report. An up-to-date output
+        from an earlier run with the same fingerprint is reused right away, unless this
+        run writes that output too (its file may still be the old render, e.g. while
+        streaming).
+        """
+        pending = []
+        skipped = 0
+        with span('fingerprint', jobs=len(jobs)):
+            for job in jobs:
+                fingerprint = self._fingerprint(job, manifest)
+                fingerprints[job] = fingerprint
+                if not self.force and manifest.is_current(job.output, fingerprint):
+                    skipped += 1
                     continue
-                    
-                print(f"🎨 Processing {dev_name} ({lang})...")
-                dst_dir.mkdir(parents=True, exist_ok=True)
-                
-                # Check for group-based processing
-                if self.config.groups:
-                    self._process_groups(src_dir, dst_dir, screenshot_config, lang)
-
-                # Process individual screenshots (always check, don't fallback)
-                # Iterate through CONFIG items, not files, to support source_key aliasing
-                for key, meta in screenshot_config.items():
-                    source_key = meta.get('source_key', key)
-                    img_path = src_dir / f"{source_key}.png"
-                    
-                    if not img_path.exists():
-                         # Only warn if it's NOT part of a group? 
-                         # Actually usually we want silent skip for things used only in groups, 
-                         # BUT here we are iterating config. If it's in config, we expect to process it.
-                         # However, some keys ("onboarding") might be JUST for groups and have no output config?
-                         # In samples framed.yaml, "onboarding" is in screenshots.
-                         # If it's in screenshots, we try to process it.
-                         # If image missing, we skip.
-                         print(f"  Skipping {key} (Source image {source_key}.png not found)")
-                         continue
-                         
-                    self._process_image(img_path, dst_dir, meta, lang, key, screenshot_config)
-
-    def _process_groups(self, src_dir: Path, output_dir: Path, screenshot_config: dict, lang: str):
-        """Process screenshots as defined groups (for composite templates)."""
-        for group in self.config.groups:
-            output_name = group.get('output', 'output.png')
-            screen_keys = group.get('screens', [])
-            group_template_name = group.get('template', self.config.template)
-            
-            # Collect device frames and text configs for this group
-            device_frames = []
-            text_configs = []
-            
-            for key in screen_keys:
-                img_path = src_dir / f"{key}.png"
-                if not img_path.exists():
-                    print(f"  ⚠️ Image not found: {key}.png, skipping from group")
+                dedup['outputs'].add(job.output)
+                rendering = dedup['renders'].get(fingerprint)
+                if rendering is not None:
+                    dedup['copies'].setdefault(rendering, []).append(job)
                     continue
-                
-                meta = screenshot_config.get(key, {})
-                
-                # Load and prepare device frame
-                screenshot = Image.open(img_path).convert('RGBA')
-                screenshot_resized = screenshot.resize((self.SCREENSHOT_WIDTH, self.SCREENSHOT_HEIGHT), Image.Resampling.LANCZOS)
-                device_frame = self._create_device_frame(screenshot_resized)
-                device_frames.append(device_frame)
-                
-                # Prepare text config
-                defaults = self.config.template_defaults or {}
-                text_config = defaults.copy()
-                
-                # Merge group configuration (allows passing custom params like panorama_index)
-                text_config.update(group)
-                
-                if 'background_color' in meta: text_config['background_color'] = meta['background_color']
-                if 'text_color' in meta: text_config['text_color'] = meta['text_color']
-                if 'subtitle_color' in meta: text_config['subtitle_color'] = meta['subtitle_color']
-                if 'panoramic_color' in meta: text_config['panoramic_color'] = meta['panoramic_color']
-                if 'panoramic_color' in meta: text_config['panoramic_color'] = meta['panoramic_color']
-                
-                # Resolve text with fallback
-                text_config['title_text'] = self._resolve_text(meta.get('title'), lang)
-                text_config['subtitle_text'] = self._resolve_text(meta.get('subtitle'), lang)
-                
-                text_configs.append(text_config)
-            
-            if not device_frames:
-                print(f"  ⚠️ No valid frames for group '{output_name}', skipping")
-                continue
-            
-            # Select template for this group
-            # Currently only PerspectiveTemplate supports groups specifically
-            if group_template_name == 'perspective':
-                # Re-instantiate to ensure fresh state if needed, or stick with self.template if it is PerspectiveTemplate
-                if isinstance(self.template, PerspectiveTemplate):
-                    template = self.template
-                else:
-                    template = PerspectiveTemplate(self.config)
-                    
-                final_image = template.process_group(device_frames, text_configs, lang)
+                existing = None if self.force else manifest.find(fingerprint, exclude=dedup['outputs'])
+                if existing is not None:
+                    self._reuse(existing, job, manifest, fingerprint)
+                    dedup['reused'] += 1
+                    continue
+                dedup['renders'][fingerprint] = job
+                pending.append(job)
+        return pending, skipped
+
+    @staticmethod
+    def _reuse(src: Path, job: RenderJob, manifest: RenderManifest, fingerprint: str):
+        """Materialize job's output from an identical file instead of rendering it."""
+        how = link_or_copy(src, job.output)
+        manifest.record(job.output, fingerprint)
+        print(f"  🔗 {job.output.parent.name}/{job.output.name} {how} from {src.parent.name}/{src.name} (identical)")
+
+    def _report(self, results, manifest: RenderManifest, fingerprints: dict, dedup: dict, pending: int, skipped: int):
+        """Consume render results in job order, record them in the manifest and print the summary."""
+        failures = []
+        rendered = 0
+        cache_stats = {}
+        group_peak = 0
+        for result in self._encoded(results):
+            group_peak = max(group_peak, result.group_peak_bytes)
+            for k, v in result.cache_stats.items():
+                cache_stats[k] = cache_stats.get(k, 0) + v
+            copies = dedup['copies'].pop(result.job, [])
+            if result.ok:
+                if result.output:
+                    rendered += 1
+                    manifest.record(result.output, fingerprints[result.job])
+                    print(f"  ✅ Generated {result.output.parent.name}/{result.output.name}")
+                    for job in copies:
+                        self._reuse(result.output, job, manifest, fingerprints[job])
+                        dedup['reused'] += 1
             else:
-                # For non-group-aware templates, process first screen only as fallback
-                final_image = self.template.process(None, text_configs[0], device_frames[0], 0, 1)
-            
-            # Save
-            out_path = output_dir / output_name
-            final_image.save(out_path, quality=95)
-            print(f"  ✅ Generated {output_name}")
-
-    def _create_device_frame(self, screenshot):
-        """Create device frame by compositing screenshot with bezel."""
-        if not self.bezel_path.exists():
-            raise FileNotFoundError(f"Bezel file not found at {self.bezel_path}")
-        
-        bezel = Image.open(self.bezel_path).convert("RGBA")
-        
-        if bezel.width >= screenshot.width and bezel.height >= screenshot.height:
-            frame = Image.new('RGBA', bezel.size, (0, 0, 0, 0))
-            
-            sx = (bezel.width - screenshot.width) // 2
-            sy = (bezel.height - screenshot.height) // 2
-            
-            mask = Image.new('L', screenshot.size, 0)
-            mask_draw = ImageDraw.Draw(mask)
-            mask_draw.rounded_rectangle((0, 0, screenshot.width, screenshot.height), radius=80, fill=255)
-            
-            frame.paste(screenshot, (sx, sy), mask)
-            frame.paste(bezel, (0, 0), bezel)
-            return frame
+                failures.append(result)
+                print(f"  ❌ Failed {result.job.describe()}: {result.error}"
+                      + (f" ({len(copies)} identical output(s) not written)" if copies else ""))
+
+        with span('manifest_save'):
+            manifest.save()
+
+        if pending:
+            print(f"  🧩 Bezel cache: {self.bezel_cache.summary(cache_stats)}")
+            if cache_stats.get('text_hits') or cache_stats.get('text_misses'):
+                print(f"  🔤 Text cache: {cache_stats['text_hits']} hits / {cache_stats['text_misses']} misses")
+        if group_peak:
+            print(f"  🧠 Group frames: peak {group_peak / MB:.1f} MB (budget {self.config.group_memory_budget_mb} MB)")
+        print(f"📊 Rendered {rendered}, skipped {skipped} unchanged" + (" (--force)" if self.force else "")
+              + (f", {dedup['reused']} identical output(s) reused instead of rendered" if dedup['reused'] else ""))
+        if failures:
+            print(f"⚠️ {len(failures)} of {pending} renders failed")
+        return rendered + dedup['reused']
+
+    def _encoded(self, results):
+        """
+        Yield results once their files are written. A few results are held back so
+        their background encodes overlap with the renders that follow.
+        """
+        held = []
+        for result in results:
+            held.append(result)
+            if len(held) > self.encoder.threads:
+                yield self._wait_for_encode(held.pop(0))
+        for result in held:
+            yield self._wait_for_encode(result)
+
+    def _collect_jobs(self) -> list[RenderJob]:
+        """The plan's jobs for every device and language whose sources exist."""
+        jobs = []
+        for dev_name, lang in self.plan.dirs():
+            jobs.extend(self._collect_dir_jobs(dev_name, lang))
+        return jobs
+
+    def _collect_dir_jobs(self, dev_name: str, lang: str) -> list[RenderJob]:
+        """The plan's jobs for one device/language source directory (groups first, then screenshots)."""
+        planned = self.plan.for_dir(dev_name, lang)
+        if not planned or not planned[0].src_dir.exists():
+            return []
+
+        if self.verbose:
+            print(f"🎨 Processing {dev_name} ({lang})...")
+        planned[0].output_dir.mkdir(parents=True, exist_ok=True)
+
+        jobs = []
+        for job in planned:
+            # Screens missing from a group are skipped when it renders; a missing screenshot skips its job
+            if job.kind == 'image' and not job.src.exists():
+                if self.verbose:
+                    print(f"  Skipping {job.key} (Source image {job.src.name} not found)")
+                continue
+            jobs.append(job)
+        return jobs
+
+    def cache_stats(self) -> dict:
+        """Snapshot of the process-wide bezel and text cache counters."""
+        return {**self.bezel_cache.stats, **text.stats}
+
+    def render_job(self, job: RenderJob) -> Path | None:
+        """Execute a single render job and return the written file (None if nothing was written)."""
+        with span('render_job', job=job.describe()):
+            if job.kind == 'group':
+                return self._process_group(job)
+            return self._process_image(job)
+
+    def _fingerprint(self, job: RenderJob, manifest: RenderManifest) -> str:
+        """Fingerprint every input that affects a job's output pixels."""
+        if job.kind == 'group':
+            screens = [(src, text_config) for src, text_config in zip(job.sources, job.text_configs) if src.exists()]
+            sources = [src for src, _ in screens]
+            params = {'group': job.group, 'text_configs': [text_config for _, text_config in screens],
+                      'template': job.template}
         else:
-            raise ValueError(f"Bezel {bezel.size} is smaller than screenshot {screenshot.size}")
+            sources = [job.src]
+            params = {'text_config': job.text_configs[0], 'index': job.index, 'total': job.total,
+                      'template': job.template}
 
-    def _process_image(self, img_path: Path, output_dir: Path, meta: dict, lang: str, key: str, screenshots_config: dict):
-        # Load Screenshot
-        screenshot = Image.open(img_path).convert('RGBA')
+        params['encoder'] = self.encoder.settings
+
+        # Fonts of the template that renders this job (groups may use another one)
+        template = self._template(job.template) if job.template else self.template
+        files = [self.bezel_path] + list(getattr(template, 'font_paths', lambda: [])())
+        return manifest.fingerprint(sources, params, files)
+
+    def _process_group(self, job: RenderJob) -> Path | None:
+        """Render a single group (for composite templates)."""
+        # Frames are built on demand (see GroupFrames); only text configs are collected up front
+        loaders = []
+        text_configs = []
         
-        # Prepare Device Frame (Bezel composition happens here for now)
-        # Future: Move bezel composition into a DeviceManager or Template if needed
-        screenshot_resized = screenshot.resize((self.SCREENSHOT_WIDTH, self.SCREENSHOT_HEIGHT), Image.Resampling.LANCZOS)
-        device_frame = self._create_device_frame(screenshot_resized)
+        for key, img_path, text_config in zip(job.keys, job.sources, job.text_configs):
+            if not img_path.exists():
+                print(f"  ⚠️ Image not found: {key}.png, skipping from group")
+                continue
+            loaders.append(lambda img_path=img_path: self._load_device_frame(img_path))
+            text_configs.append(dict(text_config))
         
-        # Prepare Text Config
-        defaults = self.config.template_defaults or {}
+        if not loaders:
+            print(f"  ⚠️ No valid frames for group '{job.output_name}', skipping")
+            return None
         
-        # Start with a copy of defaults (so we inherit everything like perspective_tilt)
-        text_config = defaults.copy()
+        device_frames = GroupFrames(loaders, self.config.group_memory_budget_mb * MB)
         
-        # Override with meta (screenshot specific config)
-        if 'background_color' in meta: text_config['background_color'] = meta['background_color']
-        if 'text_color' in meta: text_config['text_color'] = meta['text_color']
-        if 'subtitle_color' in meta: text_config['subtitle_color'] = meta['subtitle_color']
-        if 'panoramic_color' in meta: text_config['panoramic_color'] = meta['panoramic_color']
+        # Select template for this group
+        template = self._template(job.template)
+        if hasattr(template, 'process_group'):
+            final_image = template.process_group(device_frames, text_configs, job.lang)
+        else:
+            # For non-group-aware templates, process first screen only as fallback
+            final_image = template.process(None, text_configs[0], device_frames[0], 0, 1)
         
-        # Add text content
-        text_config['title_text'] = self._resolve_text(meta.get('title'), lang)
-        text_config['subtitle_text'] = self._resolve_text(meta.get('subtitle'), lang)
+        device_frames.close()
+        self.group_peak_bytes = max(self.group_peak_bytes, device_frames.peak_bytes)
         
-        # Calculate Index and Total for Panoramic Context
-        # We need to find the index of this screenshot in the ordered config list
-        screenshot_keys = list(screenshots_config.keys())
-        try:
-            current_index = screenshot_keys.index(key)
-        except ValueError:
-            current_index = 0
-        total_screenshots = len(screenshot_keys)    
-
-        # Delegate to Template
-        final_image = self.template.process(
-            screenshot, 
-            text_config, 
-            device_frame, 
-            index=current_index, 
-            total=total_screenshots
-        )
+        return self._save(final_image, job.output)
+
+    def _template(self, name: str):
+        """Template instance by name (created once per name)."""
+        template = self._templates.get(name)
+        if template is None:
+            template = self._templates[name] = registry.create(name, self.config)
+        return template
+
+    def _load_device_frame(self, img_path: Path) -> Image.Image:
+        """Decode, resize and frame one group screen (called lazily by GroupFrames)."""
+        with stage('decode'):
+            screenshot = Image.open(img_path).convert('RGBA')
+        with stage('resize'):
+            screenshot_resized = screenshot.resize((self.SCREENSHOT_WIDTH, self.SCREENSHOT_HEIGHT), Image.Resampling.LANCZOS)
+        with stage('device_frame'):
+            return self._create_device_frame(screenshot_resized)
+
+    def _create_device_frame(self, screenshot, reuse_buffer: bool = False):
+        """Create device frame by compositing screenshot with bezel (bezel and mask are cached)."""
+        return self.bezel_cache.frame(self.bezel_path, screenshot, reuse_buffer=reuse_buffer)
+
+    def _process_image(self, job: RenderJob) -> Path:
+        # Load Screenshot
+        with stage('decode'):
+            screenshot = Image.open(job.src).convert('RGBA')
         
-        # Save
-        # Prefix with index to ensure order (e.g. 01_inbox.png)
-        # Use 1-based indexing for display
-        # Prefix with index to ensure order (e.g. 01_inbox.png)
-        # Use 1-based indexing for display
-        # If output file name is specified (e.g. custom key), use that.
-        # But for list generation, we often want numbering.
-        # However, if 'key' is "1", "2", etc., use that directly.
+        # Resolved by the plan; copied so templates can't alter it
+        text_config = dict(job.text_configs[0])
         
-        if key.isdigit():
-            out_filename = f"{key}.png"
+        # Index and Total for Panoramic Context
+        current_index, total_screenshots = job.index, job.total
+
+        if text_config.get('single_resample') and hasattr(self.template, 'process_single_pass'):
+            # Single-resample mode: the template composes straight into the App Store size,
+            # so the screenshot is resampled once instead of up to three times
+            final_image = self.template.process_single_pass(
+                screenshot,
+                text_config,
+                self.bezel_cache,
+                self.bezel_path,
+                index=current_index,
+                total=total_screenshots
+            )
         else:
-            prefix = f"{current_index + 1:02d}_"
-            out_filename = prefix + key + ".png"
-            
-        out_path = output_dir / out_filename
-        final_image.save(out_path, quality=95)
-        print(f"  ✅ Generated {out_path.name}")
+            # Prepare Device Frame (Bezel composition happens here for now)
+            # Future: Move bezel composition into a DeviceManager or Template if needed
+            with stage('resize'):
+                screenshot_resized = screenshot.resize((self.SCREENSHOT_WIDTH, self.SCREENSHOT_HEIGHT), Image.Resampling.LANCZOS)
+            # The frame is consumed by the template before the next image, so the buffer can be shared
+            with stage('device_frame'):
+                device_frame = self._create_device_frame(screenshot_resized, reuse_buffer=True)
+
+            # Delegate to Template
+            final_image = self.template.process(
+                screenshot, 
+                text_config, 
+                device_frame, 
+                index=current_index, 
+                total=total_screenshots
+            )
+        
+        return self._save(final_image, job.output)
+
+    def _save(self, image: Image.Image, out_path: Path) -> Path:
+        """Encode an output (in the background when enabled; _report waits for it)."""
+        future = self.encoder.submit(image, out_path)
+        if future.done():
+            future.result()  # Raise encode errors right away
+        else:
+            self._encodes[out_path] = future
+        return out_path
+
+    def _wait_for_encode(self, result):
+        """Block until a result's background encode is written; encode errors fail the job."""
+        future = self._encodes.pop(result.output, None) if result.output else None
+        if future is not None:
+            try:
+                with span('wait_for_encode'):
+                    future.result()
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+        return result
@@ -0,0 +1,115 @@
+import importlib
+import importlib.util
+import inspect
+from dataclasses import dataclass, field
+from functools import lru_cache
+from importlib.metadata import entry_points
+from pathlib import Path
+
+import yaml
+
+# Template discovery. Templates are found from metadata alone: the built-in
+# directories under templates/ and the `framed.templates` entry point group.
+# A template's module (and with it Pillow / NumPy) is imported only when the
+# template is actually used, so list-templates and template-help stay fast.
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+ENTRY_POINT_GROUP = "framed.templates"
+DEFAULT_TEMPLATE = "standard"
+
+
+@dataclass(frozen=True)
+class TemplateInfo:
+    name: str
+    module: str  # Import path of the module defining the template class
+    attr: str | None = None  # Class name; None = the Template subclass defined in the module
+    path: Path | None = None  # Directory holding template.yaml and samples/
+    description: str = "No description available"
+    defaults: dict = field(default_factory=dict, compare=False)
+    source: str = "built-in"  # 'built-in' or the distribution providing the entry point
+
+    def load(self):
+        """Import the template module and return the template class."""
+        from .api import Template
+
+        module = importlib.import_module(self.module)
+        if self.attr:
+            return getattr(module, self.attr)
+        classes = [obj for obj in vars(module).values()
+                   if inspect.isclass(obj) and issubclass(obj, Template) and obj is not Template
+                   and obj.__module__ == module.__name__]
+        if not classes:
+            raise ImportError(f"No Template subclass found in {self.module}")
+        return classes[0]
+
+
+def _read_template_yaml(path: Path | None) -> dict:
+    if path is None or not (path / "template.yaml").exists():
+        return {}
+    try:
+        with open(path / "template.yaml", 'r', encoding='utf-8') as f:
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"⚠️ Failed to load template config: {e}")
+        return {}
+
+
+def _info(name: str, module: str, attr: str | None, path: Path | None, source: str) -> TemplateInfo:
+    data = _read_template_yaml(path)
+    return TemplateInfo(name, module, attr, path,
+                        description=data.get('description') or "No description available",
+                        defaults=data.get('defaults') or {}, source=source)
+
+
+def _entry_point_dir(module: str) -> Path | None:
+    """
+    Directory of an entry point's module, located without importing it: only the
+    top-level package's spec is resolved, which doesn't execute any code.
+    """
+    parts = module.split('.')
+    try:
+        spec = importlib.util.find_spec(parts[0])
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.submodule_search_locations:
+        return None
+    for location in spec.submodule_search_locations:
+        base = Path(location).joinpath(*parts[1:])
+        for candidate in (base, base.parent):
+            if (candidate / "template.yaml").exists():
+                return candidate
+    return None
+
+
+@lru_cache(maxsize=1)
+def discover() -> dict[str, TemplateInfo]:
+    """All available templates by name (built-ins win over entry points of the same name)."""
+    templates = {}
+    for item in sorted(TEMPLATES_DIR.iterdir()):
+        if item.is_dir() and not item.name.startswith('_') and (item / "__init__.py").exists():
+            templates[item.name] = _info(item.name, f"{__package__}.templates.{item.name}", None, item, "built-in")
+
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name in templates:
+            continue
+        module, _, attr = ep.value.partition(':')
+        source = ep.dist.name if getattr(ep, 'dist', None) else "entry point"
+        templates[ep.name] = _info(ep.name, module.strip(), attr.strip() or None, _entry_point_dir(module.strip()), source)
+    return templates
+
+
+def names() -> list[str]:
+    return sorted(discover())
+
+
+def get(name: str) -> TemplateInfo | None:
+    return discover().get(name)
+
+
+def create(name: str, config):
+    """Instantiate template `name` (falls back to the standard template if unknown)."""
+    info = get(name)
+    if info is None:
+        print(f"⚠️ Unknown template '{name}', using {DEFAULT_TEMPLATE}")
+        info = get(DEFAULT_TEMPLATE)
+    return info.load()(config)
@@ -1,103 +1,254 @@
 import subprocess
 import os
+import re
 import shutil
 import tempfile
-import atexit
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from .config import Config
-from .simctl import Simctl
+from .instrument import span, traced_run
 
 class Runner:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, xcrun: str = "xcrun", xcodebuild: str = "xcodebuild"):
         self.config = config
+        # Overridable so capture can be exercised with fake executables
+        self.xcrun = xcrun
+        self.xcodebuild = xcodebuild
+        # Set while captures run in 'build_once' / 'multi_locale' mode
+        self._xctestrun = None
+        self._locale_xctestrun = None
+        # Processor in streaming mode while capturing (renders overlap with capture)
+        self._renderer = None
+        # Set while captures run in parallel: one DerivedData per simulator for `xcodebuild test`
+        self._worker_derived_data = None
 
-    def run(self, skip_capture: bool = False):
+    def run(self, skip_capture: bool = False, jobs: int = 1, force: bool = False, capture_jobs: int = 1):
         """Execute the screenshot capture pipeline for all configured devices and languages."""
-        from .extractor import Extractor
-        
-        scheme = self.config.scheme
-        project = self.config.project
+        from .extractor import Extractor, ObjectCache
+
         raw_output_dir = Path(self.config.output_dir) / "raw"
-        
+
         # Only clean and capture if NOT skipping
         if not skip_capture:
             if raw_output_dir.exists():
                 shutil.rmtree(raw_output_dir)
             raw_output_dir.mkdir(parents=True)
-            
-            extractor = Extractor()
 
-            for device in self.config.devices:
-                print(f"📱 Preparing device: {device['name']}")
-                for lang in self.config.languages:
-                    print(f"  🌏 Capturing in {lang}...")
-                    
-                    # Cleanup is AUTOMATIC with TemporaryDirectory
-                    with tempfile.TemporaryDirectory(prefix="framed_xcresult_") as temp_dir:
-                        result_bundle_path = Path(temp_dir) / f"Test.xcresult"
-                        
-                        # Explicitly boot the device first (ensures it's running and we can set status bar)
-                        device_name = device['name']
-                        print(f"    🚀 Booting device: {device_name}...")
-                        try:
-                            # Boot device by name (will fail if already booted, which is fine)
-                            subprocess.run(["xcrun", "simctl", "boot", device_name], 
-                                         capture_output=True, check=False)
-                        except Exception:
-                            pass  # Already booted
-
-                        # Set status bar to fixed time (device is now guaranteed to be booted)
-                        print(f"    🕐 Setting status bar to 9:41...")
-                        try:
-                            # Use device name instead of "booted" for more precision
-                            subprocess.run([
-                                "xcrun", "simctl", "status_bar", device_name, "override",
-                                "--time", "9:41",
-                                "--batteryState", "charged",
-                                "--batteryLevel", "100",
-                                "--wifiMode", "active",
-                                "--wifiBars", "3",
-                                "--cellularMode", "active",
-                                "--cellularBars", "4"
-                            ], check=True)
-                            print(f"    ✅ Status bar set successfully")
-                        except Exception as e:
-                            print(f"    ⚠️  Failed to set status bar: {e}")
-
-                        cmd = [
-                            "xcodebuild", "test",
-                            "-scheme", scheme,
-                            "-project", project,
-                            "-destination", f"platform=iOS Simulator,name={device['name']}",
-                            "-testLanguage", lang,
-                            "-testRegion", lang,
-                            "-resultBundlePath", str(result_bundle_path)
-                        ]
-                        
-                        try:
-                            subprocess.run(cmd, check=True, capture_output=True) 
-                        except subprocess.CalledProcessError as e:
-                            print(f"    ❌ Test failed for {lang}:")
-                            print(e.stderr.decode('utf-8') if e.stderr else "Unknown error")
-                            continue
-
-                        print(f"    📦 Extracting screenshots...")
-                        
-                        # Create specific output dir for this run to avoid overwrites
-                        # e.g. docs/screenshots/raw/iPhone 17_ja/
-                        run_output_dir = raw_output_dir / f"{device['name']}_{lang}"
-                        run_output_dir.mkdir(parents=True, exist_ok=True)
-                        
-                        try:
-                            extractor.process_xcresult(result_bundle_path, run_output_dir)
-                        except Exception as e:
-                            print(f"❌ Extractor error: {e}")
+            extractor = Extractor(
+                max_workers=self.config.extract_concurrency,
+                backend=self.config.extract_backend,
+                xcrun=self.xcrun,
+                cache=ObjectCache(self.config.xcresult_cache_dir)
+            )
+
+            # Each device/language is rendered as soon as it has been extracted
+            self._renderer = self._start_renderer(jobs, force)
+
+            # Build the app and tests once; every capture then only runs them
+            with tempfile.TemporaryDirectory(prefix="framed_derived_data_") as derived_data:
+                if self.config.capture_mode in ('build_once', 'multi_locale'):
+                    self._xctestrun = self._build_for_testing(Path(derived_data))
+                if self.config.capture_mode == 'multi_locale' and self._xctestrun:
+                    from .capture import write_locale_xctestrun
+                    try:
+                        self._locale_xctestrun = write_locale_xctestrun(self._xctestrun, self.config.languages)
+                    except ValueError as e:
+                        print(f"  ⚠️  {e}; capturing one language at a time")
+                try:
+                    with span('capture_all', capture_jobs=capture_jobs):
+                        self._capture_all(extractor, raw_output_dir, capture_jobs)
+                finally:
+                    self._xctestrun = None
+                    self._locale_xctestrun = None
+
+            print(f"🗃️  xcresult object cache: {extractor.cache.summary()}")
+
+            if self._renderer:
+                print("\n🎨 Waiting for renders...")
+                renderer, self._renderer = self._renderer, None
+                try:
+                    with span('wait_for_renders'):
+                        renderer.finish_streaming()
+                except Exception as e:
+                    print(f"❌ Processing failed: {e}")
+                return
 
         # 3. Process (Frame & Text)
         print("\n🎨 Processing screenshots...")
         try:
             from .processor import Processor
-            processor = Processor(self.config)
-            processor.process()
+            processor = Processor(self.config, jobs=jobs, force=force)
+            with span('process'):
+                processor.process()
         except Exception as e:
             print(f"❌ Processing failed: {e}")
+
+    def _start_renderer(self, jobs: int, force: bool):
+        """
+        Processor in streaming mode, or None if there is nothing to render or it can't
+        start (processing then runs after capture, which also reports the problem).
+        """
+        if not self.config.plan.has_screenshots():
+            return None
+        try:
+            from .processor import Processor
+            processor = Processor(self.config, jobs=jobs, force=force)
+            return processor if processor.start_streaming() else None
+        except Exception as e:
+            print(f"⚠️ Could not start rendering during capture ({type(e).__name__}: {e}); rendering after capture")
+            return None
+
+    def _build_for_testing(self, derived_data: Path) -> Path | None:
+        """
+        `xcodebuild build-for-testing` once for the scheme. Returns the generated
+        .xctestrun, or None (captures then fall back to a full `xcodebuild test`).
+        """
+        print(f"🔨 Building {self.config.scheme} for testing...")
+        cmd = [
+            self.xcodebuild, "build-for-testing",
+            "-scheme", self.config.scheme,
+            "-project", self.config.project,
+            "-destination", "generic/platform=iOS Simulator",
+            "-derivedDataPath", str(derived_data)
+        ]
+        try:
+            traced_run(cmd, check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            print(f"  ⚠️  build-for-testing failed, falling back to xcodebuild test per capture:")
+            print(e.stderr.decode('utf-8') if e.stderr else "Unknown error")
+            return None
+
+        xctestruns = sorted((derived_data / "Build" / "Products").glob("*.xctestrun"))
+        if not xctestruns:
+            print("  ⚠️  No .xctestrun produced, falling back to xcodebuild test per capture")
+            return None
+        print(f"  ✅ Built {xctestruns[0].name}")
+        return xctestruns[0]
+
+    def _capture_all(self, extractor, raw_output_dir: Path, capture_jobs: int = 1):
+        """
+        Capture every device x language combination. With capture_jobs > 1 several
+        run at once, each on its own simulator (clones when a model is needed twice).
+        """
+        from .capture import SimulatorPool, SimulatorSessions
+
+        sessions = SimulatorSessions(
+            xcrun=self.xcrun,
+            policy=self.config.simulator_policy,
+            appearance=self.config.appearance
+        )
+
+        if self._locale_xctestrun:
+            # One run per device covers every language
+            language_sets = [self.config.languages]
+        else:
+            language_sets = [[lang] for lang in self.config.languages]
+        captures = [(device, langs) for device in self.config.devices for langs in language_sets]
+        capture_jobs = max(1, min(capture_jobs, len(captures) or 1))
+
+        if capture_jobs == 1:
+            try:
+                for device in self.config.devices:
+                    print(f"📱 Preparing device: {device['name']}")
+                    for langs in language_sets:
+                        sim = self._default_simulator(device['name'])
+                        self._capture(sim, langs, sessions, extractor, raw_output_dir)
+            finally:
+                sessions.close()
+            return
+
+        pool = SimulatorPool(xcrun=self.xcrun)
+        print(f"📱 Capturing {len(captures)} device/language combinations, {capture_jobs} at a time")
+        # Concurrent `xcodebuild test` runs must not build into the same DerivedData
+        worker_derived_data = tempfile.TemporaryDirectory(prefix="framed_worker_derived_data_")
+        self._worker_derived_data = Path(worker_derived_data.name)
+        try:
+            for device in self.config.devices:
+                pool.prepare(device['name'], min(capture_jobs, len(language_sets)))
+            for sim_id in pool.shut_down:
+                sessions.note_shut_down(sim_id)
+
+            def capture(item):
+                device, langs = item
+                sim = pool.acquire(device['name'])
+                try:
+                    label = f"[{device['name']} {langs[0] if len(langs) == 1 else 'all'}] "
+                    self._capture(sim, langs, sessions, extractor, raw_output_dir, label=label)
+                finally:
+                    pool.release(sim)
+
+            with ThreadPoolExecutor(max_workers=capture_jobs) as executor:
+                for future in [executor.submit(capture, item) for item in captures]:
+                    future.result()
+        finally:
+            sessions.close()
+            pool.cleanup()
+            self._worker_derived_data = None
+            worker_derived_data.cleanup()
+
+    @staticmethod
+    def _default_simulator(device_name: str):
+        from .capture import Simulator
+        return Simulator(device_name, device_name, f"platform=iOS Simulator,name={device_name}")
+
+    def _capture(self, sim, langs: list[str], sessions, extractor, raw_output_dir: Path, label: str = ""):
+        """Boot `sim`, run the UI tests in `langs` and extract into raw/{device}_{lang}."""
+        print(f"  🌏 {label}Capturing in {', '.join(langs)}...")
+
+        with span('capture', device=sim.model, simulator=sim.sim_id, languages=', '.join(langs)):
+            # Cleanup is AUTOMATIC with TemporaryDirectory (one result bundle per capture)
+            with tempfile.TemporaryDirectory(prefix="framed_xcresult_") as temp_dir:
+                result_bundle_path = Path(temp_dir) / f"Test.xcresult"
+
+                # Boot, status bar and appearance are applied once per simulator and run
+                sessions.prepare(sim, label)
+
+                if len(langs) > 1:
+                    # Every language is a configuration of the generated .xctestrun
+                    cmd = [self.xcodebuild, "test-without-building", "-xctestrun", str(self._locale_xctestrun)]
+                elif self._xctestrun:
+                    # Reuse the products of build-for-testing
+                    cmd = [self.xcodebuild, "test-without-building", "-xctestrun", str(self._xctestrun)]
+                else:
+                    cmd = [self.xcodebuild, "test", "-scheme", self.config.scheme, "-project", self.config.project]
+                    if self._worker_derived_data:
+                        # A simulator runs one capture at a time, so it can own a DerivedData
+                        name = re.sub(r'[^\w.-]+', '_', sim.sim_id)
+                        cmd += ["-derivedDataPath", str(self._worker_derived_data / name)]
+                cmd += ["-destination", sim.destination]
+                if len(langs) == 1:
+                    cmd += ["-testLanguage", langs[0], "-testRegion", langs[0]]
+                cmd += ["-resultBundlePath", str(result_bundle_path)]
+
+                try:
+                    traced_run(cmd, check=True, capture_output=True)
+                except subprocess.CalledProcessError as e:
+                    print(f"    ❌ {label}Test failed for {', '.join(langs)}:")
+                    print(e.stderr.decode('utf-8') if e.stderr else "Unknown error")
+                    return
+
+                print(f"    📦 {label}Extracting screenshots...")
+
+                # Create specific output dir for this run to avoid overwrites
+                # e.g. docs/screenshots/raw/iPhone 17_ja/ (named after the model, also for clones)
+                run_output_dirs = {lang: raw_output_dir / f"{sim.model}_{lang}" for lang in langs}
+                for run_output_dir in run_output_dirs.values():
+                    run_output_dir.mkdir(parents=True, exist_ok=True)
+
+                try:
+                    if len(langs) > 1:
+                        # Split attachments by the configuration (= language) that produced them
+                        extractor.process_xcresult(result_bundle_path, None, configuration_dirs=run_output_dirs)
+                    else:
+                        extractor.process_xcresult(result_bundle_path, run_output_dirs[langs[0]])
+                except Exception as e:
+                    print(f"❌ {label}Extractor error: {e}")
+                    return
+
+                if self._renderer:
+                    # Queue renders while the next capture runs
+                    for lang in langs:
+                        try:
+                            self._renderer.submit_captured(sim.model, lang)
+                        except Exception as e:
+                            print(f"❌ {label}Could not queue renders for {lang}: {e}")
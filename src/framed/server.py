@@ -0,0 +1,328 @@
+import dataclasses
+import json
+import os
+import shutil
+import socketserver
+import stat
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from .bench import percentile
+from .engine import resolve_jobs
+from .plan import RenderJob, resolve_text_config
+
+# Render daemon for CI farms: `framed serve` keeps a pool of worker processes
+# with fonts, bezels, masks and template caches warm, and renders single
+# screenshots on request over localhost HTTP or a Unix socket.
+#
+#   POST /render   {"config": "framed.yaml", "key": "inbox", "lang": "ja",
+#                   "device": "iPhone 17",            (optional, picks the plan's job)
+#                   "source": "/abs/raw/inbox.png",   (optional, overrides the plan's source)
+#                   "meta": {"title": {...}, ...},    (optional, overrides the screenshot config)
+#                   "index": 0, "total": 4,           (optional, with meta for keys not in the config)
+#                   "output": "framed/ja/inbox.png"}  (optional, inside the config's output_dir;
+#                                                      without it the image bytes are returned)
+#   GET  /stats    queue depth, in-flight requests, latency percentiles
+#   GET  /health
+
+# Per-worker Processors, keyed by (config path, mtime): a changed framed.yaml gets a fresh one
+_processors = {}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+    def __reduce__(self):
+        # Raised in worker processes: keep the status when pickled back to the server
+        return (RequestError, (self.status, str(self)))
+
+
+def _processor(config_path: str):
+    from .config import load_config
+    from .processor import Processor
+
+    path = Path(config_path).resolve()
+    try:
+        key = (str(path), path.stat().st_mtime_ns)
+    except OSError:
+        raise RequestError(404, f"Configuration file not found: {config_path}")
+    processor = _processors.get(key)
+    if processor is None:
+        for old in [k for k in _processors if k[0] == key[0]]:
+            del _processors[old]
+        processor = Processor(load_config(str(path)), verbose=False, background_encode=False)
+        _processors[key] = processor
+    return processor
+
+
+def _warm(config_path: str | None) -> int:
+    """Worker start-up: build the default config's Processor and decode its bezel and fonts."""
+    if config_path:
+        processor = _processor(config_path)
+        processor.bezel_cache.bezel(processor.bezel_path)
+        getattr(processor.template, '_fixed_text_bottom', lambda: None)()
+    return os.getpid()
+
+
+def _int_field(request: dict, name: str, default: int, minimum: int) -> int:
+    value = request.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise RequestError(400, f"'{name}' must be an integer")
+    try:
+        value = int(value)
+    except ValueError:
+        raise RequestError(400, f"'{name}' must be an integer")
+    if value < minimum:
+        raise RequestError(400, f"'{name}' must be at least {minimum}")
+    return value
+
+
+def _resolve_job(processor, request: dict) -> RenderJob:
+    """The plan's image job for (key, lang[, device]), with the request's overrides applied."""
+    key, lang = request.get('key'), request.get('lang')
+    if not key or not lang:
+        raise RequestError(400, "'key' and 'lang' are required")
+    device = request.get('device')
+    job = next((j for j in processor.plan.jobs if j.kind == 'image' and j.key == key and j.lang == lang
+                and (device is None or j.device == device)), None)
+
+    meta = request.get('meta')
+    if job is None:
+        if meta is None or not request.get('source'):
+            raise RequestError(404, f"No screenshot '{key}' for language '{lang}' in the config "
+                                    f"(pass 'source' and 'meta' to render one anyway)")
+        source = Path(request['source'])
+        job = RenderJob('image', source.parent, source.parent, f"{key}.png", lang, device=device or "", key=key,
+                        sources=(source,), keys=(key,), template=processor.config.template)
+
+    changes = {}
+    if request.get('source'):
+        changes['sources'] = (Path(request['source']),)
+    if meta is not None:
+        changes['text_configs'] = (resolve_text_config(processor.config.template_defaults, meta, lang),)
+    index = _int_field(request, 'index', job.index, 0)
+    total = _int_field(request, 'total', job.total, 1)
+    if index >= total:
+        raise RequestError(400, f"'index' ({index}) must be less than 'total' ({total})")
+    if (index, total) != (job.index, job.total):
+        changes.update(index=index, total=total)
+    return dataclasses.replace(job, **changes) if changes else job
+
+
+def _output_path(processor, output: str) -> Path:
+    """The requested output path; relative paths are taken from the config's output_dir, which it must stay in."""
+    root = Path(processor.config.output_dir).resolve()
+    path = (root / output).resolve()
+    if not path.is_relative_to(root) or path == root:
+        raise RequestError(403, f"'output' must be a file inside the config's output_dir ({root})")
+    return path
+
+
+def _render(request: dict, default_config: str | None) -> dict:
+    """Runs in a worker process. Returns the output path, or the encoded bytes."""
+    start = time.perf_counter()
+    config_path = request.get('config') or default_config
+    if not config_path:
+        raise RequestError(400, "'config' is required (the server has no default config)")
+    processor = _processor(config_path)
+    job = _resolve_job(processor, request)
+    if not job.src.exists():
+        raise RequestError(404, f"Source image not found: {job.src}")
+
+    output = request.get('output')
+    if output:
+        output = _output_path(processor, output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        job = dataclasses.replace(job, output_dir=output.parent, output_name=output.name)
+        processor.render_job(job)
+        return {'output': str(output), 'render_ms': (time.perf_counter() - start) * 1000}
+
+    temp_dir = tempfile.mkdtemp(prefix="framed_serve_")
+    try:
+        job = dataclasses.replace(job, output_dir=Path(temp_dir))
+        path = processor.render_job(job)
+        data = path.read_bytes()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    content_type = 'image/jpeg' if processor.encoder.format == 'jpeg' else 'image/png'
+    return {'data': data, 'content_type': content_type, 'render_ms': (time.perf_counter() - start) * 1000}
+
+
+class RenderService:
+    """Worker pool plus request statistics (shared by every connection thread)."""
+
+    def __init__(self, config_path: str | None = None, workers: int = 0):
+        self.config_path = str(Path(config_path).resolve()) if config_path else None
+        self.workers = resolve_jobs(workers)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.restarts = 0  # Worker pools replaced after a crash
+        self.latencies = deque(maxlen=1000)  # Request latency (queue wait + render), ms
+        self.render_times = deque(maxlen=1000)  # Time spent rendering in a worker, ms
+
+    def warm_up(self):
+        """Start every worker and load the default config, bezel and fonts in each."""
+        futures = [self.pool.submit(_warm, self.config_path) for _ in range(self.workers)]
+        return sorted({future.result() for future in futures})
+
+    def render(self, request: dict) -> dict:
+        start = time.perf_counter()
+        with self._lock:
+            self.in_flight += 1
+        ok = False
+        try:
+            pool = self.pool
+            try:
+                result = pool.submit(_render, request, self.config_path).result()
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+                raise RequestError(500, "A render worker died; the worker pool has been restarted")
+            ok = True
+            return result
+        finally:
+            latency = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self.in_flight -= 1
+                if ok:
+                    self.completed += 1
+                    self.latencies.append(latency)
+                    self.render_times.append(result['render_ms'])
+                else:
+                    self.failed += 1
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        """Swap in a fresh pool after a worker crashed (once, however many requests saw it)."""
+        with self._lock:
+            if self.pool is not broken:
+                return
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            self.restarts += 1
+        print(f"⚠️  A render worker died; restarted the pool ({self.workers} worker(s))")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            latencies, render_times = list(self.latencies), list(self.render_times)
+            in_flight = self.in_flight
+            data = {'workers': self.workers, 'in_flight': in_flight,
+                    'queue_depth': max(0, in_flight - self.workers),
+                    'completed': self.completed, 'failed': self.failed, 'pool_restarts': self.restarts,
+                    'uptime_s': round(time.time() - self.started, 1)}
+        for name, values in (('latency_ms', latencies), ('render_ms', render_times)):
+            data[name] = {'p50': round(percentile(values, 50), 1), 'p95': round(percentile(values, 95), 1),
+                          'max': round(max(values), 1)} if values else None
+        return data
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "framed"
+    service: RenderService = None  # Set on the server-specific subclass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, data: dict):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'), 'application/json')
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._json(200, self.service.stats())
+        elif self.path == '/health':
+            self._json(200, {'ok': True})
+        else:
+            self._json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/render':
+            self._json(404, {'error': f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(request, dict):
+                raise RequestError(400, "Request body must be a JSON object")
+            result = self.service.render(request)
+        except json.JSONDecodeError as e:
+            self._json(400, {'error': f"Invalid JSON: {e}"})
+            return
+        except RequestError as e:
+            self._json(e.status, {'error': str(e)})
+            return
+        except Exception as e:
+            self._json(500, {'error': f"{type(e).__name__}: {e}"})
+            return
+
+        headers = {'X-Render-Ms': f"{result['render_ms']:.1f}"}
+        if 'data' in result:
+            self._send(200, result['data'], result['content_type'], headers)
+        else:
+            self._json(200, {'output': result['output'], 'render_ms': round(result['render_ms'], 1)})
+
+    def address_string(self):
+        # Unix socket peers have no (host, port)
+        return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass  # Requests are summarized by /stats instead of one line each
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def create_server(service: RenderService, host: str = "127.0.0.1", port: int = 8787, socket_path: str | None = None):
+    handler = type('Handler', (_Handler,), {'service': service})
+    if socket_path:
+        try:
+            if stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                os.unlink(socket_path)  # Stale socket from a previous run
+            # Anything else is left alone: binding then fails with "Address already in use"
+        except FileNotFoundError:
+            pass
+        return _UnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(config_path: str | None, host: str, port: int, socket_path: str | None, workers: int):
+    service = RenderService(config_path, workers)
+    server = create_server(service, host, port, socket_path)
+    where = f"unix:{socket_path}" if socket_path else f"http://{host}:{server.server_address[1]}"
+    print(f"🔥 Warming up {service.workers} worker(s)...")
+    service.warm_up()
+    print(f"🛰️  Serving renders on {where} (POST /render, GET /stats; Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+        service.shutdown()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
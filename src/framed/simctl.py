@@ -1,26 +1,80 @@
-import subprocess
 import json
 import time
+from .instrument import traced_run
 
 class Simctl:
     @staticmethod
-    def list_devices():
+    def list_devices(xcrun: str = "xcrun"):
         """List all available devices using xcrun simctl list"""
-        cmd = ["xcrun", "simctl", "list", "devices", "available", "--json"]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        cmd = [xcrun, "simctl", "list", "devices", "available", "--json"]
+        result = traced_run(cmd, capture_output=True, text=True)
         return json.loads(result.stdout)
 
     @staticmethod
-    def boot_device(device_id: str):
+    def device_states(xcrun: str = "xcrun") -> dict:
+        """Map of device name and UDID -> state ("Booted", "Shutdown", ...); empty if simctl can't be queried"""
+        try:
+            runtimes = Simctl.list_devices(xcrun).get('devices', {})
+        except (OSError, ValueError):
+            return {}
+        states = {}
+        for devices in runtimes.values():
+            for device in devices:
+                state = device.get('state')
+                states[device.get('udid')] = state
+                # A name may exist for several runtimes; any booted one counts
+                if states.get(device.get('name')) != "Booted":
+                    states[device.get('name')] = state
+        return states
+
+    @staticmethod
+    def device_udids(xcrun: str = "xcrun") -> dict:
+        """Map of device name -> UDID (first match per name); empty if simctl can't be queried"""
+        try:
+            runtimes = Simctl.list_devices(xcrun).get('devices', {})
+        except (OSError, ValueError):
+            return {}
+        udids = {}
+        for devices in runtimes.values():
+            for device in devices:
+                udids.setdefault(device.get('name'), device.get('udid'))
+        return udids
+
+    @staticmethod
+    def clone_device(device_id: str, name: str, xcrun: str = "xcrun") -> str | None:
+        """Clone a (shut down) device, returning the new device's UDID or None on failure"""
+        result = traced_run([xcrun, "simctl", "clone", device_id, name], capture_output=True, text=True)
+        udid = result.stdout.strip()
+        return udid if result.returncode == 0 and udid else None
+
+    @staticmethod
+    def delete_device(device_id: str, xcrun: str = "xcrun"):
+        """Shut down and delete a device (e.g. a clone made for parallel capture)"""
+        traced_run([xcrun, "simctl", "shutdown", device_id], capture_output=True, check=False)
+        traced_run([xcrun, "simctl", "delete", device_id], capture_output=True, check=False)
+
+    @staticmethod
+    def boot_device(device_id: str, xcrun: str = "xcrun"):
         """Boot a device if not already booted"""
-        subprocess.run(["xcrun", "simctl", "boot", device_id], check=False)
+        traced_run([xcrun, "simctl", "boot", device_id], check=False)
         # Wait for boot? usually handled by xcodebuild verify, but explicit wait is good
-        
+
+    @staticmethod
+    def wait_for_boot(device_id: str, xcrun: str = "xcrun") -> bool:
+        """Boot the device if needed and block until it has finished booting"""
+        result = traced_run([xcrun, "simctl", "bootstatus", device_id, "-b"], capture_output=True, text=True)
+        return result.returncode == 0
+
+    @staticmethod
+    def shutdown_device(device_id: str, xcrun: str = "xcrun"):
+        """Shut a device down"""
+        traced_run([xcrun, "simctl", "shutdown", device_id], capture_output=True, check=False)
+
     @staticmethod
-    def set_status_bar(device_id: str):
+    def set_status_bar(device_id: str, xcrun: str = "xcrun"):
         """Override status bar to show 9:41 AM and full battery"""
         cmd = [
-            "xcrun", "simctl", "status_bar", device_id, "override",
+            xcrun, "simctl", "status_bar", device_id, "override",
             "--time", "9:41",
             "--dataNetwork", "wifi",
             "--wifiMode", "active",
@@ -30,15 +84,15 @@ class Simctl:
             "--batteryState", "charged",
             "--batteryLevel", "100"
         ]
-        subprocess.run(cmd, check=True)
+        traced_run(cmd, check=True, capture_output=True)
 
     @staticmethod
-    def clear_status_bar(device_id: str):
+    def clear_status_bar(device_id: str, xcrun: str = "xcrun"):
         """Clear status bar override"""
-        subprocess.run(["xcrun", "simctl", "status_bar", device_id, "clear"], check=False)
+        traced_run([xcrun, "simctl", "status_bar", device_id, "clear"], check=False)
 
     @staticmethod
-    def set_dark_mode(device_id: str, is_dark: bool):
+    def set_dark_mode(device_id: str, is_dark: bool, xcrun: str = "xcrun"):
         """Set UI style"""
         style = "dark" if is_dark else "light"
-        subprocess.run(["xcrun", "simctl", "ui", device_id, "appearance", style], check=True)
+        traced_run([xcrun, "simctl", "ui", device_id, "appearance", style], check=True, capture_output=True)
@@ -1,7 +1,9 @@
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
 import math
+import numpy as np
 from PIL import ImageColor
 from ..standard import StandardTemplate
+from ...instrument import stage
 
 class PanoramicTemplate(StandardTemplate):
     """
@@ -9,6 +11,11 @@ class PanoramicTemplate(StandardTemplate):
     across multiple screenshots.
     """
     
+    def __init__(self, config):
+        super().__init__(config)
+        # Rasterized wave strips, keyed by (width, height, total, screens, scale)
+        self._wave_strips = {}
+    
     def process(self, screenshot: Image.Image, text_config: dict, device_frame: Image.Image | None = None, index: int = 0, total: int = 1) -> Image.Image:
         # Configuration
         bg_color = text_config.get('background_color', '#F5F5F7')
@@ -19,151 +26,145 @@ class PanoramicTemplate(StandardTemplate):
         # === Draw Panoramic Background ===
         # Default to enabled, but check config just in case
         wave_color = text_config.get('panoramic_color', '#C7C7CC')
-        self._draw_panoramic_wave(canvas, wave_color, index, total)
-        
-        # === Delegate Rest to Parent ===
-        # We want to reuse text and device drawing, but StandardTemplate.process creates a NEW canvas.
-        # So we cannot just super().process() easily if we want to draw on OUR canvas.
-        # Alternatively, we can let StandardTemplate handle everything and we just hook in?
-        # No, StandardTemplate.process creates the canvas.
-        
-        # Strategy: Re-implement process but reuse helper methods if any.
-        # Since StandardTemplate logic is simple, we will duplicate the high-level flow 
-        # but inject the wave drawing.
+        with stage('background'):
+            self._draw_panoramic_wave(canvas, wave_color, index, total)
         
+        # === Text ===
+        # StandardTemplate.process creates its own canvas, so the high-level flow is
+        # duplicated here to inject the wave, but the text goes through the shared
+        # (cached) StandardTemplate._draw_text.
         draw = ImageDraw.Draw(canvas)
-        
-        # Texts
-        title = text_config.get('title_text', "")
-        subtitle = text_config.get('subtitle_text', "")
-        
-        # Fonts
-        title_font = self._load_font(95, bold=True)
-        subtitle_font = self._load_font(45, bold=False)
-        
-        # Draw Text
-        current_y = self.HEADER_MARGIN
-        
-        # Title
-        text_color = text_config.get('text_color', '#1D1D1F')
-        if title:
-            lines = title.split('\n')
-            for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=title_font)
-                w = bbox[2] - bbox[0]
-                h = bbox[3] - bbox[1]
-                draw.text(((self.CANVAS_WIDTH - w) / 2, current_y), line, font=title_font, fill=text_color)
-                current_y += h + self.LINE_SPACING
-                
-        current_y += (self.CAPTION_SPACING - self.LINE_SPACING)
-        
-        # Subtitle
-        subtitle_color = text_config.get('subtitle_color', '#86868B')
-        bbox = draw.textbbox((0, 0), subtitle, font=subtitle_font)
-        w = bbox[2] - bbox[0]
-        draw.text(((self.CANVAS_WIDTH - w) / 2, current_y), subtitle, font=subtitle_font, fill=subtitle_color)
+        with stage('text'):
+            self._draw_text(draw, text_config)
         
         # Device Frame
         if device_frame:
-            # Calculate position using FIXED layout to prevent shifting
-            # We assume a maximum of 3 lines for title and 1 line for subtitle
-            # This ensures device size/pos is constant regardless of actual text length
-            
-            # Simulate max text height
-            max_title_lines = 2
-            # Approx height per line (font 95 + spacing 30 + buffer) -> ~125px
-            # Let's derive it or hardcode a safe visual anchor.
-            # Using bbox on dummy text is safer to respect font metrics.
-            dummy_line_h = draw.textbbox((0, 0), "Aj", font=title_font)[3] - draw.textbbox((0, 0), "Aj", font=title_font)[1]
-            fixed_title_h = max_title_lines * (dummy_line_h + self.LINE_SPACING)
-            
-            # Subtitle
-            dummy_sub_h = draw.textbbox((0, 0), "Aj", font=subtitle_font)[3] - draw.textbbox((0, 0), "Aj", font=subtitle_font)[1]
-            
-            fixed_text_bottom = self.HEADER_MARGIN + fixed_title_h + (self.CAPTION_SPACING - self.LINE_SPACING) + dummy_sub_h
-            
-            # Use a compact offset for the fixed layout to maximize device size
-            # Standard offset is 150, but since we reserve max height, the visual gap will be large for short text.
-            # reducing this specific offset pulls the device up.
-            compact_offset = 110 
-            device_y = fixed_text_bottom + compact_offset
-            
-            # Check if it fits
-            remaining_height = self.CANVAS_HEIGHT - device_y
-            if device_frame.height > remaining_height:
-                # Need to scale down
-                # Use legacy logic: (remaining_height - 100) buffer
-                scale = (remaining_height - 100) / device_frame.height
-                new_size = (int(device_frame.width * scale), int(device_frame.height * scale))
-                device_frame = device_frame.resize(new_size, Image.Resampling.LANCZOS)
-            
-            # Center horizontally
-            device_x = (self.CANVAS_WIDTH - device_frame.width) // 2
-            
-            # Paste (using mask for transparency)
-            canvas.paste(device_frame, (device_x, int(device_y)), device_frame)
+            with stage('compose'):
+                # Calculate position using FIXED layout to prevent shifting
+                # This ensures device size/pos is constant regardless of actual text length
+                device_x, device_y, new_w, new_h = self._device_box(device_frame.width, device_frame.height)
+                if (new_w, new_h) != device_frame.size:
+                    device_frame = device_frame.resize((new_w, new_h), Image.Resampling.LANCZOS)
+                
+                # Paste (using mask for transparency)
+                canvas.paste(device_frame, (device_x, device_y), device_frame)
             
         # Final Resize
-        return canvas.resize(self.APP_STORE_SIZE, Image.Resampling.LANCZOS)
+        with stage('final_resize'):
+            return canvas.resize(self.APP_STORE_SIZE, Image.Resampling.LANCZOS)
 
-    def _draw_panoramic_wave(self, canvas, wave_color, index, total_screens):
+    def _draw_background(self, canvas, text_config, index, total, scale=1.0):
+        wave_color = text_config.get('panoramic_color', '#C7C7CC')
+        self._draw_panoramic_wave(canvas, wave_color, index, total, scale=scale)
+
+    # Define layers: (amplitude, freq_mult, phase, opacity, stroke_width)
+    # RESTORED FROM LEGACY SCRIPT
+    WAVE_LAYERS = [
+        (350, 0.8, 0, 0.2, 16),      # Thick, faint background
+        (250, 1.5, 2.0, 0.4, 10),    # Medium defined wave
+        (180, 2.2, 4.0, 0.7, 6),     # Main sharp voice line
+        (160, 2.2, 4.2, 0.5, 3),     # Accent line (Matched legacy: 160 amp, 3 stroke)
+    ]
+
+    def _draw_panoramic_wave(self, canvas, wave_color, index, total_screens, scale=1.0):
         """
         Draws a multi-layered 'voice-like' waveform across the background using LINES.
-        Calculates global coordinates based on index and width to ensure continuity.
+        The whole panorama is rasterized once (see _wave_strip) and each screenshot
+        blends its own slice, so neighbouring screenshots join pixel-exactly.
         The wave amplitude tapers to a single point at both ends of the panorama.
+        Amplitudes and strokes are in working-canvas pixels; `scale` maps them to
+        a canvas of a different resolution (single-pass mode).
         """
-        draw = ImageDraw.Draw(canvas, 'RGBA')
         width, height = canvas.size
-        
-        # Wave Configuration
-        base_y = height * 0.70
-        global_offset = index * width
-        total_width = total_screens * width  # Total panoramic width
+        # An index past `total` (e.g. a render request for a key not in the config)
+        # continues the wave to the right, as drawing each screen separately did
+        screens = max(total_screens, index + 1)
+        coverage, band_top, rows = self._wave_strip(width, height, total_screens, scale, screens)
+        top, bottom = rows[index]
+        if bottom <= top:
+            return
         
         # Parse color
         try:
-            rgb = ImageColor.getrgb(wave_color)
-        except:
+            rgb = ImageColor.getrgb(wave_color)[:3]
+        except ValueError:
             rgb = (199, 199, 204)  # Default #C7C7CC
         
-        # Define layers: (amplitude, freq_mult, phase, opacity, stroke_width)
-        # RESTORED FROM LEGACY SCRIPT
-        layers = [
-            (350, 0.8, 0, 0.2, 16),      # Thick, faint background
-            (250, 1.5, 2.0, 0.4, 10),    # Medium defined wave
-            (180, 2.2, 4.0, 0.7, 6),     # Main sharp voice line
-            (160, 2.2, 4.2, 0.5, 3),     # Accent line (Matched legacy: 160 amp, 3 stroke)
-        ]
+        # Blend this screenshot's slice over the canvas. The slice is a contiguous view
+        # into the cached strip, wrapped without copying.
+        mask = Image.frombuffer('L', (width, bottom - top), coverage[index, top:bottom], 'raw', 'L', 0, 1)
+        canvas.paste(rgb, (0, band_top + top, width, band_top + bottom), mask)
+
+    def _wave_strip(self, width, height, total_screens, scale=1.0, screens=None):
+        """
+        Wave coverage for the full `total_screens * width` panorama (extended to
+        `screens` screens if that is more), restricted to the
+        vertical band the wave can reach, as (screen, band_height, width) so every
+        screenshot's slice is contiguous. All layers share one color, so their
+        opacity-weighted strokes are flattened into a single alpha mask
+        (1 - prod(1 - alpha_i)), same as drawing them one over another.
+        Cached per geometry and independent of the color.
+        """
+        screens = max(screens or total_screens, total_screens)
+        key = (width, height, total_screens, screens, scale)
+        cached = self._wave_strips.get(key)
+        if cached is not None:
+            return cached
         
-        for amplitude, freq_mult, phase, opacity, stroke_width in layers:
-            rgba_color = rgb + (int(opacity * 255),)
-            points = []
+        # Wave Configuration
+        base_y = height * 0.70
+        total_width = total_screens * width  # Total panoramic width
+        strip_width = screens * width
+        step = 5
+        
+        curves = []
+        for amplitude, freq_mult, phase, opacity, stroke_width in self.WAVE_LAYERS:
+            amplitude *= scale
+            stroke_width = max(1, round(stroke_width * scale))
             
-            # Generate wave points. 
-            step = 5
-            for x in range(-stroke_width, width + stroke_width + step, step):
-                global_x = global_offset + x
-                
-                # Normalized X (0.0 to 1.0 across entire panorama)
-                norm_global = global_x / total_width
-                
-                # Envelope logic: Map 0.0-1.0 to a range that doesn't hit 0.0 (e.g. 0.1pi - 0.9pi)
-                # This ensures the wave has amplitude at the start/end
-                taper_range = 0.6
-                taper_offset = 0.2
-                envelope_angle = (taper_offset + norm_global * taper_range) * math.pi
-                envelope = math.sin(envelope_angle)
-                
-                # Composite Sine Function (Harmonics for voice-like effect)
-                # Legacy logic: sin(base) + 0.3 * sin(harmonic)
-                val = math.sin(norm_global * (4 * math.pi) * freq_mult + phase)
-                val += 0.3 * math.sin(norm_global * (10 * math.pi) * freq_mult)
-                
-                # Apply envelope and amplitude
-                y = base_y + (val * amplitude * envelope)
-                
-                points.append((x, y))
+            # Wave points over the whole panorama (same sample grid as per-screen drawing)
+            global_x = np.arange(-stroke_width, strip_width + stroke_width + step, step, dtype=np.float64)
+            norm_global = global_x / total_width
+            
+            # Envelope logic: Map 0.0-1.0 to a range that doesn't hit 0.0 (0.2pi - 0.8pi)
+            # This ensures the wave has amplitude at the start/end
+            taper_range = 0.6
+            taper_offset = 0.2
+            envelope = np.sin((taper_offset + norm_global * taper_range) * np.pi)
+            
+            # Composite Sine Function (Harmonics for voice-like effect)
+            # Legacy logic: sin(base) + 0.3 * sin(harmonic)
+            val = np.sin(norm_global * (4 * np.pi) * freq_mult + phase)
+            val += 0.3 * np.sin(norm_global * (10 * np.pi) * freq_mult)
             
-            # Draw the wave line
-            if len(points) > 1:
-                draw.line(points, fill=rgba_color, width=stroke_width, joint='curve')
+            # Apply envelope and amplitude
+            y = base_y + val * amplitude * envelope
+            curves.append((global_x, y, opacity, stroke_width))
+        
+        # Only the band the strokes can touch is stored
+        reach = max(np.abs(y - base_y).max() + stroke for _, y, _, stroke in curves)
+        band_top = max(0, int(math.floor(base_y - reach)) - 1)
+        band_height = min(height, int(math.ceil(base_y + reach)) + 1) - band_top
+        
+        transparency = np.full((band_height, strip_width), 255, dtype=np.uint16)
+        for global_x, y, opacity, stroke_width in curves:
+            # Rasterize the whole panorama in one pass per layer
+            strip = Image.new('L', (strip_width, band_height), 0)
+            points = list(zip(global_x.tolist(), (y - band_top).tolist()))
+            ImageDraw.Draw(strip).line(points, fill=int(opacity * 255), width=stroke_width, joint='curve')
+            transparency *= 255 - np.asarray(strip, dtype=np.uint16)
+            transparency += 127
+            transparency //= 255
+        
+        alpha = (255 - transparency).astype(np.uint8)
+        coverage = np.ascontiguousarray(alpha.reshape(band_height, screens, width).transpose(1, 0, 2))
+        
+        # Band rows each screen's slice actually touches
+        rows = []
+        for screen in coverage:
+            touched = np.flatnonzero(screen.any(axis=1))
+            rows.append((int(touched[0]), int(touched[-1]) + 1) if touched.size else (0, 0))
+        
+        cached = (coverage, band_top, rows)
+        self._wave_strips[key] = cached
+        return cached
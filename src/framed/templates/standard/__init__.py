@@ -1,6 +1,9 @@
-from PIL import Image, ImageDraw, ImageFont
+import os
+from PIL import Image, ImageDraw
 from ...api import Template
 from ...config import Config
+from ... import fonts, text
+from ...instrument import stage
 
 class StandardTemplate(Template):
     """
@@ -22,6 +25,9 @@ class StandardTemplate(Template):
         self.PHONE_TOP_OFFSET = 150
         self.APP_STORE_SIZE = (1290, 2796)
 
+        # Memoized constant layout measurements (see _fixed_text_bottom)
+        self._layout_metrics = None
+
     def process(self, screenshot: Image.Image, text_config: dict, device_frame: Image.Image | None = None, index: int = 0, total: int = 1) -> Image.Image:
         # Configuration
         bg_color = text_config.get('background_color', '#F5F5F7')
@@ -33,102 +39,142 @@ class StandardTemplate(Template):
         draw = ImageDraw.Draw(canvas)
         
         # === Draw Text ===
-        current_y = self._draw_text(draw, text_config)
+        with stage('text'):
+            current_y = self._draw_text(draw, text_config)
             
         # === Place Device ===
         if device_frame:
-             # Position Phone: Using FIXED layout logic (same as Panoramic)
-             # This ensures device size/pos is constant regardless of actual text length
-             
-             # Fonts (Load here to calculate fixed height)
-             # Reuse helper or load directly. To avoid modifying _load_font visibility/signature risks, just load again.
-             # It's quick.
-             title_font = self._load_font(95, bold=True)
-             subtitle_font = self._load_font(45, bold=False)
-
-            # Simulate max text height (Max 2 lines for Title, 1 for Subtitle)
-             max_title_lines = 2
-            
-             dummy_line_h = draw.textbbox((0, 0), "Aj", font=title_font)[3] - draw.textbbox((0, 0), "Aj", font=title_font)[1]
-             fixed_title_h = max_title_lines * (dummy_line_h + self.LINE_SPACING)
-            
-             dummy_sub_h = draw.textbbox((0, 0), "Aj", font=subtitle_font)[3] - draw.textbbox((0, 0), "Aj", font=subtitle_font)[1]
-            
-             fixed_text_bottom = self.HEADER_MARGIN + fixed_title_h + (self.CAPTION_SPACING - self.LINE_SPACING) + dummy_sub_h
-            
-             compact_offset = 110
-             phone_y = fixed_text_bottom + compact_offset
-            
-             phone_x = (self.CANVAS_WIDTH - device_frame.width) // 2
-            
-             # Dynamic scaling if device doesn't fit
-             remaining_height = self.CANVAS_HEIGHT - phone_y
-             if device_frame.height > remaining_height:
-                 scale = (remaining_height - 100) / device_frame.height
-                 if scale < 1.0:
-                     new_w = int(device_frame.width * scale)
-                     new_h = int(device_frame.height * scale)
-                     device_frame = device_frame.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                     phone_x = (self.CANVAS_WIDTH - new_w) // 2
-            
-             canvas.paste(device_frame, (phone_x, int(phone_y)), device_frame)
+            with stage('compose'):
+                # Position Phone: Using FIXED layout logic (same as Panoramic)
+                # This ensures device size/pos is constant regardless of actual text length
+                phone_x, phone_y, new_w, new_h = self._device_box(device_frame.width, device_frame.height)
+                if (new_w, new_h) != device_frame.size:
+                    device_frame = device_frame.resize((new_w, new_h), Image.Resampling.LANCZOS)
+                
+                canvas.paste(device_frame, (phone_x, phone_y), device_frame)
 
         # Final Resize
-        return canvas.resize(self.APP_STORE_SIZE, Image.Resampling.LANCZOS)
+        with stage('final_resize'):
+            return canvas.resize(self.APP_STORE_SIZE, Image.Resampling.LANCZOS)
+
+    def process_single_pass(self, screenshot: Image.Image, text_config: dict, bezel_cache, bezel_path, index: int = 0, total: int = 1) -> Image.Image:
+        """
+        Compose straight into APP_STORE_SIZE (enabled with `single_resample: true`).
+        The layout is computed on the working canvas and mapped to the target first,
+        so the raw screenshot and the bezel are each resampled exactly once and the
+        text is rasterized at its final size instead of being downscaled.
+        """
+        target_w, target_h = self.APP_STORE_SIZE
+        sx = target_w / self.CANVAS_WIDTH
+        sy = target_h / self.CANVAS_HEIGHT
+        
+        bg_color = text_config.get('background_color', '#F5F5F7')
+        canvas = Image.new('RGB', self.APP_STORE_SIZE, bg_color)
+        with stage('background'):
+            self._draw_background(canvas, text_config, index, total, scale=sy)
+        
+        draw = ImageDraw.Draw(canvas)
+        with stage('text'):
+            self._draw_text(draw, text_config, scale=sy, canvas_width=target_w)
+        
+        with stage('compose'):
+            bezel = bezel_cache.bezel(bezel_path)
+            x, y, w, h = self._device_box(bezel.width, bezel.height)
+            box = (round(x * sx), round(y * sy), round(w * sx), round(h * sy))
+            bezel_cache.compose_into(canvas, bezel_path, screenshot, (self.SCREENSHOT_WIDTH, self.SCREENSHOT_HEIGHT), box)
+        return canvas
 
-    def _draw_text(self, draw: ImageDraw.ImageDraw, text_config: dict) -> int:
+    def _draw_background(self, canvas: Image.Image, text_config: dict, index: int, total: int, scale: float = 1.0):
+        """Hook for templates that paint behind the text and device (single-pass mode)."""
+        pass
+
+    def _device_box(self, frame_width: int, frame_height: int) -> tuple[int, int, int, int]:
+        """Position and size (x, y, w, h) of the device frame on the working canvas."""
+        # Use a compact offset for the fixed layout to maximize device size
+        compact_offset = 110
+        phone_y = self._fixed_text_bottom() + compact_offset
+        
+        # Dynamic scaling if device doesn't fit
+        remaining_height = self.CANVAS_HEIGHT - phone_y
+        if frame_height > remaining_height:
+            scale = (remaining_height - 100) / frame_height
+            if scale < 1.0:
+                frame_width = int(frame_width * scale)
+                frame_height = int(frame_height * scale)
+        
+        phone_x = (self.CANVAS_WIDTH - frame_width) // 2
+        return phone_x, int(phone_y), frame_width, frame_height
+
+    def _draw_text(self, draw: ImageDraw.ImageDraw, text_config: dict, scale: float = 1.0, canvas_width: int | None = None) -> int:
         text_color = text_config.get('text_color', '#1D1D1F')
         subtitle_color = text_config.get('subtitle_color', '#86868B')
         title = text_config.get('title_text', "")
         subtitle = text_config.get('subtitle_text', "")
+        canvas_width = canvas_width or self.CANVAS_WIDTH
+        line_spacing = self.LINE_SPACING * scale
         
         # Fonts
-        title_font = self._load_font(95, bold=True)
-        subtitle_font = self._load_font(45, bold=False)
+        title_font = self._load_font(round(95 * scale), bold=True)
+        subtitle_font = self._load_font(round(45 * scale), bold=False)
         
-        current_y = self.HEADER_MARGIN
+        current_y = self.HEADER_MARGIN * scale
         
         # Title
         if title:
             lines = title.split('\n')
             for line in lines:
-                bbox = draw.textbbox((0, 0), line, font=title_font)
-                w = bbox[2] - bbox[0]
-                h = bbox[3] - bbox[1]
-                draw.text(((self.CANVAS_WIDTH - w) / 2, current_y), line, font=title_font, fill=text_color)
-                current_y += h + self.LINE_SPACING
+                # Lines are rasterized once per font and reused across devices/indexes
+                block = text.text_block(draw, line, title_font)
+                block.draw(draw, ((canvas_width - block.width) / 2, current_y), text_color)
+                current_y += block.height + line_spacing
         
-        current_y += (self.CAPTION_SPACING - self.LINE_SPACING)
+        current_y += (self.CAPTION_SPACING - self.LINE_SPACING) * scale
         
         # Subtitle
         if subtitle:
-            bbox = draw.textbbox((0, 0), subtitle, font=subtitle_font)
-            w = bbox[2] - bbox[0]
-            draw.text(((self.CANVAS_WIDTH - w) / 2, current_y), subtitle, font=subtitle_font, fill=subtitle_color)
-            current_y += bbox[3] - bbox[1]
+            block = text.text_block(draw, subtitle, subtitle_font)
+            block.draw(draw, ((canvas_width - block.width) / 2, current_y), subtitle_color)
+            current_y += block.height
             
         return current_y
 
     def _load_font(self, size: int, bold: bool = False):
-        # ... logic ported from processor.py ...
-        # Ideally this should be a utility helper, but for now we keep it here or pass from processor
-        # To avoid duplicating logic, we might want to move font loading to a helper or keep it here.
-        # For simplicity in this step, I'll copy the font loading logic but refer to self.config
-        
-        # Reusing the exact logic from existing processor.py
-        import os
+        # Fonts come from the shared registry, so each file/size is parsed once per run
+        return fonts.load_font(self._font_candidates(bold), size)
+
+    def _fixed_text_bottom(self) -> int:
+        """
+        Bottom of the reserved text block (max 2 title lines + 1 subtitle line).
+        Depends only on the fonts and layout constants, so it is memoized per instance.
+        """
+        if self._layout_metrics is None:
+            title_font = self._load_font(95, bold=True)
+            subtitle_font = self._load_font(45, bold=False)
+            draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
+            # Simulate max text height (Max 2 lines for Title, 1 for Subtitle)
+            max_title_lines = 2
+            title_bbox = draw.textbbox((0, 0), "Aj", font=title_font)
+            dummy_line_h = title_bbox[3] - title_bbox[1]
+            fixed_title_h = max_title_lines * (dummy_line_h + self.LINE_SPACING)
+
+            sub_bbox = draw.textbbox((0, 0), "Aj", font=subtitle_font)
+            dummy_sub_h = sub_bbox[3] - sub_bbox[1]
+
+            self._layout_metrics = {
+                'fixed_text_bottom': self.HEADER_MARGIN + fixed_title_h + (self.CAPTION_SPACING - self.LINE_SPACING) + dummy_sub_h,
+            }
+        return self._layout_metrics['fixed_text_bottom']
+
+    def _font_candidates(self, bold: bool) -> list[str]:
         candidates = []
         if bold and self.config.font_bold: candidates.append(self.config.font_bold)
         elif not bold and self.config.font_regular: candidates.append(self.config.font_regular)
         
         if bold: candidates.extend(["/System/Library/Fonts/ヒラギノ角ゴシック W8.ttc", "/System/Library/Fonts/Hiragino Sans GB.ttc"])
         else: candidates.extend(["/System/Library/Fonts/ヒラギノ角ゴシック W6.ttc", "/System/Library/Fonts/Hiragino Sans GB.ttc"])
-            
-        for path in candidates:
-            if os.path.exists(path):
-                try:
-                    index = 0 if path.endswith('.ttc') else 0
-                    return ImageFont.truetype(path, size, index=index)
-                except Exception: continue
-        return ImageFont.load_default()
+        return candidates
 
+    def font_paths(self) -> list[str]:
+        """Font files that may be used for rendering (used to fingerprint outputs)."""
+        return [p for bold in (True, False) for p in self._font_candidates(bold) if os.path.exists(p)]
@@ -0,0 +1,92 @@
+import math
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
+
+# Process-wide LRU of rasterized text lines. The same title and subtitle are
+# drawn for every device sharing a language (and every panoramic index), and
+# rasterizing 95pt CJK glyphs from a large .ttc is the expensive part, so each
+# line is measured and rendered once as an alpha mask; the color is applied
+# when the mask is pasted, so one block serves every color.
+
+MAX_BLOCKS = 256
+
+_blocks = OrderedDict()
+stats = {'text_hits': 0, 'text_misses': 0}
+
+
+class TextBlock:
+    """One line of text in one font: its bbox (as textbbox at (0, 0)) and rendered glyph masks."""
+
+    def __init__(self, text: str, font, bbox: tuple):
+        self.text = text
+        self.font = font
+        self.bbox = bbox
+        # Pillow positions glyphs at subpixel precision, so the mask depends on the
+        # fractional part of the position: (x fraction, y fraction) -> (mask image, offset)
+        self._masks = {}
+
+    @property
+    def width(self) -> int:
+        return self.bbox[2] - self.bbox[0]
+
+    @property
+    def height(self) -> int:
+        return self.bbox[3] - self.bbox[1]
+
+    def draw(self, draw: ImageDraw.ImageDraw, xy: tuple[float, float], fill):
+        """Same pixels as `draw.text(xy, text, font=font, fill=fill)`."""
+        x, y = xy
+        if ('\n' in self.text or x < 0 or y < 0
+                or not isinstance(self.font, ImageFont.FreeTypeFont) or draw.fontmode != 'L'):
+            # Multiline text (laid out by Pillow) and unusual cases are drawn directly
+            draw.text(xy, self.text, font=self.font, fill=fill)
+            return
+
+        ix, iy = int(x), int(y)
+        start = (x - ix, y - iy)
+        cached = self._masks.get(start)
+        if cached is None:
+            cached = self._render_mask(start)
+            self._masks[start] = cached
+        mask, (ox, oy) = cached
+        # ImageDraw.bitmap fills through the mask exactly like ImageDraw.text does
+        draw.bitmap((ix + ox, iy + oy), mask, fill=fill)
+
+    def _render_mask(self, start: tuple[float, float]):
+        """The line's coverage drawn at subpixel position `start`, and its integer offset from it."""
+        left, top, right, bottom = self.font.getbbox(self.text)
+        # Drawn at a non-negative position with the same fraction (Pillow splits the
+        # position into int + fraction), then cropped to the pixels it covers
+        pad = 1 + max(0, -math.floor(left), -math.floor(top))
+        mask = Image.new('L', (math.ceil(right) + pad + 2, math.ceil(bottom) + pad + 2), 0)
+        ImageDraw.Draw(mask).text((start[0] + pad, start[1] + pad), self.text, font=self.font, fill=255)
+        box = mask.getbbox() or (0, 0, 0, 0)
+        return mask.crop(box), (box[0] - pad, box[1] - pad)
+
+
+def _font_key(font):
+    path = getattr(font, 'path', None)
+    # Fonts from the fonts registry are keyed by file; anything else by identity
+    return (path, font.size, getattr(font, 'index', 0)) if isinstance(path, str) else ('id', id(font))
+
+
+def text_block(draw: ImageDraw.ImageDraw, text: str, font) -> TextBlock:
+    """Return the cached block for `text` in `font`, measuring it on first use."""
+    key = (text, _font_key(font))
+    block = _blocks.get(key)
+    if block is not None:
+        stats['text_hits'] += 1
+        _blocks.move_to_end(key)
+        return block
+
+    stats['text_misses'] += 1
+    block = TextBlock(text, font, tuple(draw.textbbox((0, 0), text, font=font)))
+    _blocks[key] = block
+    if len(_blocks) > MAX_BLOCKS:
+        _blocks.popitem(last=False)
+    return block
+
+
+def clear():
+    """Drop all cached text blocks (e.g. after font files changed on disk)."""
+    _blocks.clear()
@@ -0,0 +1,181 @@
+import importlib
+import os
+import sys
+import time
+from pathlib import Path
+
+from . import fonts, registry, text
+from .config import Config, load_config
+from .manifest import RenderManifest
+from .processor import Processor
+
+
+class Watcher:
+    """
+    Keeps a Processor resident and re-renders when framed.yaml, a raw screenshot,
+    a template or the bezel changes (polled every `interval` seconds).
+
+    Affected outputs are found with the render fingerprints, compared against an
+    in-memory manifest: after an edit to one title in one locale, only that
+    output's fingerprint differs. Fonts, bezels, template instances (and their
+    memoized layout / wave strips) and source hashes stay warm between edits.
+    Template code is not part of the fingerprint, so editing it reloads the
+    template modules and re-renders every output of the templates in use.
+    Editing a font file drops the parsed fonts and rendered text and rebuilds
+    the template instances, whose layout metrics depend on the fonts.
+    """
+
+    def __init__(self, config_path: str = "framed.yaml", interval: float = 0.2):
+        self.config_path = Path(config_path)
+        self.interval = interval
+        self.config = None
+        self.processor = None
+        self.manifest = None
+        self._mtimes = {}
+
+    # --- Watched files ---
+
+    def _watched(self) -> dict[Path, str]:
+        """Watched paths -> kind ('config', 'template', 'font', 'input')."""
+        watched = {self.config_path: 'config'}
+        for info in registry.discover().values():
+            if info.path is not None:
+                watched[info.path / "template.yaml"] = 'config'  # Defaults end up in the plan
+                for path in info.path.glob("*.py"):
+                    watched[path] = 'template'
+        if self.config is not None:
+            watched[self.processor.bezel_path] = 'input'
+            for font in (self.config.font_bold, self.config.font_regular):
+                if font:
+                    watched[Path(font)] = 'font'
+            for template in self.processor._templates.values():
+                for font in getattr(template, 'font_paths', lambda: [])():
+                    watched[Path(font)] = 'font'
+            raw_dir = self.processor.plan.raw_dir
+            for root, _, files in os.walk(raw_dir):
+                for name in files:
+                    if name.endswith('.png'):
+                        watched[Path(root) / name] = 'input'
+        return watched
+
+    @staticmethod
+    def _stat(path: Path):
+        try:
+            stat = path.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def _changes(self) -> dict[Path, str]:
+        """Paths created, modified or deleted since the last call."""
+        watched = self._watched()
+        mtimes = {path: mtime for path in watched if (mtime := self._stat(path)) is not None}
+        changed = {path: watched.get(path, 'input') for path in mtimes.keys() | self._mtimes.keys()
+                   if mtimes.get(path) != self._mtimes.get(path)}
+        self._mtimes = mtimes
+        return changed
+
+    def _track_new(self):
+        """Start tracking paths that became watched (e.g. a new raw_dir) without reporting them as changed."""
+        for path in self._watched():
+            if path not in self._mtimes and (mtime := self._stat(path)) is not None:
+                self._mtimes[path] = mtime
+
+    # --- Rendering ---
+
+    def _load(self, reload_templates: bool = False) -> bool:
+        """(Re)load framed.yaml and rebuild the Processor, reusing warm templates when possible."""
+        try:
+            config = load_config(str(self.config_path))  # Compiles the plan too
+        except Exception as e:
+            print(f"❌ {self.config_path}: {e} (keeping the previous config)")
+            return False
+
+        templates = None
+        if self.processor is not None and not reload_templates and self._same_templates(self.config, config):
+            templates = self.processor._templates
+        if self.processor is not None:
+            self.processor.encoder.shutdown()
+
+        self.config = config
+        self.processor = Processor(config, verbose=False, templates=templates)
+        final_dir = self.processor.plan.final_dir
+        if self.manifest is None or self.manifest.final_dir != final_dir:
+            self.manifest = RenderManifest(final_dir)
+        return True
+
+    @staticmethod
+    def _same_templates(old: Config, new: Config) -> bool:
+        """True if template instances built for `old` are valid for `new` (they only read fonts from it)."""
+        return (old.template == new.template
+                and (old.font_bold, old.font_regular) == (new.font_bold, new.font_regular))
+
+    def _reload_template_modules(self):
+        """Re-import loaded template modules (in import order, so subclasses see the new base classes)."""
+        registry.discover.cache_clear()
+        dirs = {info.path.resolve() for info in registry.discover().values() if info.path is not None}
+        for name, module in list(sys.modules.items()):
+            file = getattr(module, '__file__', None)
+            if file and Path(file).resolve().parent in dirs:
+                try:
+                    importlib.reload(module)
+                except Exception as e:
+                    print(f"❌ Failed to reload {name}: {e}")
+
+    def _render(self, force: bool = False) -> int:
+        processor = self.processor
+        processor.force = force
+        try:
+            return processor.render(processor._collect_jobs(), self.manifest)
+        finally:
+            processor.force = False
+
+    def update(self, changed: dict[Path, str]) -> int:
+        """React to changed files; returns the number of outputs written."""
+        kinds = set(changed.values())
+        if 'template' in kinds:
+            self._reload_template_modules()
+            if not self._load(reload_templates=True):
+                return 0
+            return self._render(force=True)
+        if 'font' in kinds:
+            # Parsed fonts, rendered text and template layout metrics all come from the old files
+            fonts.clear()
+            text.clear()
+            if 'config' in kinds:
+                registry.discover.cache_clear()
+            if not self._load(reload_templates=True):
+                return 0
+            return self._render()
+        if 'config' in kinds:
+            registry.discover.cache_clear()  # template.yaml defaults may have changed
+            if not self._load():
+                return 0
+        return self._render()
+
+    def run(self):
+        print(f"👀 Watching {self.config_path}, raw screenshots and templates (Ctrl+C to stop)")
+        if not self._load():
+            raise SystemExit(1)
+        self._changes()
+        self._render()
+        print("👀 Waiting for changes...")
+
+        try:
+            while True:
+                time.sleep(self.interval)
+                changed = self._changes()
+                if not changed:
+                    continue
+                start = time.perf_counter()
+                names = ", ".join(sorted(path.name for path in changed))
+                print(f"\n✏️  Changed: {names}")
+                written = self.update(changed)
+                elapsed = (time.perf_counter() - start) * 1000
+                print(f"⚡ {written} output(s) updated in {elapsed:.0f} ms")
+                self._track_new()  # A config reload can change which raw files are watched
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+        finally:
+            if self.processor is not None:
+                self.processor.encoder.shutdown()
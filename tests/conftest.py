@@ -0,0 +1,216 @@
+import json
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+import yaml
+
+import framed
+
+SAMPLE_RAWS = Path(framed.__file__).parent / "templates" / "_raw_samples" / "ja"
+
+# Stand-ins for `xcrun` and `xcodebuild`, so capture and extraction run without Xcode.
+# Every invocation is appended (one JSON list of arguments per line) to $FAKE_LOG.
+# xcresulttool and xcodebuild calls also log when they start and end.
+# Result bundles are fixture directories (see make_bundle): objects/<id>.json for
+# `get object`, payloads/<id> for the legacy export, attachments/ for the bulk one.
+
+FAKE_XCRUN = r'''
+import atexit, json, os, shutil, sys, time
+args = sys.argv[1:]
+log = os.environ['FAKE_LOG']
+with open(log, 'a') as f:
+    f.write(json.dumps(['xcrun'] + args) + '\n')
+
+if args[0] == 'xcresulttool':
+    # Slow enough (FAKE_XCRESULT_DELAY) to observe concurrency; each call logs its span when done
+    start = time.time()
+    time.sleep(float(os.environ.get('FAKE_XCRESULT_DELAY', '0')))
+
+    @atexit.register
+    def log_span():
+        with open(log, 'a') as f:
+            f.write(json.dumps(['xcresulttool-span', start, time.time()] + args[1:]) + '\n')
+
+def opt(name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+
+if args[0] == 'xcodebuild' and args[1:2] == ['-version']:
+    time.sleep(float(os.environ.get('FAKE_VERSION_DELAY', '0')))
+    print(os.environ.get('FAKE_XCODE', 'Xcode 16.3') + '\nBuild version 16E140')
+elif args[0] == 'xcresulttool' and args[1] == 'get':
+    path = opt('--path')
+    print(open(os.path.join(path, 'objects', opt('--id', 'root') + '.json')).read())
+elif args[0] == 'xcresulttool' and args[1:3] == ['export', 'attachments']:
+    if os.environ.get('FAKE_NO_BULK'):
+        sys.exit(64)
+    out = opt('--output-path')
+    os.makedirs(out, exist_ok=True)
+    for name in os.listdir(os.path.join(opt('--path'), 'attachments')):
+        shutil.copy(os.path.join(opt('--path'), 'attachments', name), os.path.join(out, name))
+elif args[0] == 'xcresulttool' and args[1] == 'export':
+    shutil.copy(os.path.join(opt('--path'), 'payloads', opt('--id')), opt('--output-path'))
+elif args[0] == 'simctl' and args[1] in ('list', 'shutdown', 'bootstatus', 'boot'):
+    # Device states live next to the log, seeded from
+    # FAKE_DEVICES="iPhone 17=Booted,iPad Pro" (state defaults to Shutdown)
+    state_path = log + '.devices'
+    if os.path.exists(state_path):
+        states = json.load(open(state_path))
+    else:
+        states = {name: state or 'Shutdown' for name, _, state in
+                  (item.partition('=') for item in os.environ.get('FAKE_DEVICES', '').split(',')) if name}
+    if args[1] == 'list':
+        devices = [{'name': name, 'udid': 'UDID-' + name, 'state': state} for name, state in states.items()]
+        print(json.dumps({'devices': {'com.apple.CoreSimulator.SimRuntime.iOS-26-0': devices}}))
+    elif args[2] in states:
+        states[args[2]] = 'Shutdown' if args[1] == 'shutdown' else 'Booted'
+    json.dump(states, open(state_path, 'w'))
+elif args[0] == 'simctl' and args[1] == 'clone':
+    print('CLONE-' + args[3].replace(' ', '-'))
+'''
+
+FAKE_XCODEBUILD = r'''
+import json, os, plistlib, shutil, sys, time
+args = sys.argv[1:]
+log = os.environ['FAKE_LOG']
+with open(log, 'a') as f:
+    f.write(json.dumps(['xcodebuild-start', time.time()] + args) + '\n')
+time.sleep(float(os.environ.get('FAKE_TEST_DELAY', '0')))
+if 'build-for-testing' in args:
+    if os.environ.get('FAKE_BUILD_FAILS'):
+        sys.stderr.write('** TEST BUILD FAILED **\n')
+        sys.exit(65)
+    products = os.path.join(args[args.index('-derivedDataPath') + 1], 'Build', 'Products')
+    os.makedirs(products)
+    with open(os.path.join(products, 'App_iphonesimulator26.0-arm64.xctestrun'), 'wb') as f:
+        plistlib.dump(json.loads(os.environ['FAKE_XCTESTRUN']), f)
+if 'test' in args or 'test-without-building' in args:
+    # The generated multi-language .xctestrun produces a bundle with one configuration per language
+    multi = '-xctestrun' in args and args[args.index('-xctestrun') + 1].endswith('framed_locales.xctestrun')
+    shutil.copytree(os.environ['FAKE_BUNDLE_MULTI' if multi else 'FAKE_BUNDLE'],
+                    args[args.index('-resultBundlePath') + 1])
+with open(log, 'a') as f:
+    f.write(json.dumps(['xcodebuild-end', time.time()] + args) + '\n')
+'''
+
+# What build-for-testing writes (override FAKE_XCTESTRUN for other layouts)
+XCTESTRUN_V1 = {
+    'AppUITests': {
+        'BlueprintName': 'AppUITests',
+        'TestBundlePath': '__TESTHOST__/PlugIns/AppUITests.xctest',
+        'CommandLineArguments': ['-UITests'],
+        'UITargetAppCommandLineArguments': ['-ResetState'],
+    },
+    '__xctestrun_metadata__': {'FormatVersion': 1},
+}
+
+
+class FakeTools:
+    def __init__(self, root: Path):
+        self.xcrun = str(root / "xcrun")
+        self.xcodebuild = str(root / "xcodebuild")
+        self.log = root / "calls.log"
+        for path, source in ((self.xcrun, FAKE_XCRUN), (self.xcodebuild, FAKE_XCODEBUILD)):
+            Path(path).write_text(f"#!{sys.executable}\n{source}")
+            os.chmod(path, 0o755)
+
+    def calls(self, *prefix) -> list[list]:
+        """Logged invocations whose arguments start with `prefix`."""
+        if not self.log.exists():
+            return []
+        calls = [json.loads(line) for line in self.log.read_text().splitlines()]
+        return [call for call in calls if call[:len(prefix)] == list(prefix)]
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    root = tmp_path / "bin"
+    root.mkdir()
+    tools = FakeTools(root)
+    monkeypatch.setenv('FAKE_LOG', str(tools.log))
+    monkeypatch.setenv('FAKE_XCTESTRUN', json.dumps(XCTESTRUN_V1))
+    return tools
+
+
+def make_bundle(path: Path, names: list[str], configurations: list[str] | None = None) -> Path:
+    """
+    A fake result bundle with one test per name, each attaching `{name}` as a screenshot.
+    With `configurations`, every test runs once per test plan configuration and the
+    attachment contents name the configuration that produced them.
+    """
+    for sub in ('objects', 'payloads', 'attachments'):
+        (path / sub).mkdir(parents=True)
+    (path / "Info.plist").write_text(f"<plist>{uuid.uuid4()}</plist>")
+
+    def value(v):
+        return {'_value': v}
+
+    def write(name, obj):
+        (path / "objects" / f"{name}.json").write_text(json.dumps(obj))
+
+    summaries, manifest = [], []
+    for configuration in configurations or ["Configuration 1"]:
+        tag = f"{configuration} " if configurations else ""
+        tests = []
+        for i, name in enumerate(names):
+            ref = f"{configuration}-{i}".replace(" ", "_")
+            tests.append({'summaryRef': {'id': value(f"summary-{ref}")}})
+            write(f"summary-{ref}", {'activitySummaries': {'_values': [{'attachments': {'_values': [
+                {'name': value(name), 'payloadRef': {'id': value(f"payload-{ref}")}}]}}]}})
+            (path / "payloads" / f"payload-{ref}").write_text(f"legacy {tag}{name}")
+            exported = f"{uuid.uuid4()}.png"
+            (path / "attachments" / exported).write_text(f"bulk {tag}{name}")
+            manifest.append({'testIdentifier': f"UITests/test{i}()", 'attachments': [{
+                'exportedFileName': exported,
+                'suggestedHumanReadableName': f"{name}_0_{uuid.uuid4()}.png",
+                'configurationName': configuration}]})
+        summaries.append({'name': value(configuration), 'testableSummaries': {'_values': [
+            {'tests': {'_values': [{'subtests': {'_values': tests}}]}}]}})
+    (path / "attachments" / "manifest.json").write_text(json.dumps(manifest))
+    write("root", {'actions': {'_values': [{'actionResult': {'testsRef': {'id': value("tests")}}}]}})
+    write("tests", {'summaries': {'_values': summaries}})
+    return path
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    return make_bundle(tmp_path / "Test.xcresult", ["home", "inbox", "settings"])
+
+
+def write_project(root: Path, keys=("inbox", "recording"), languages=("ja", "en"), devices=("iPhone 17",),
+                  settings: dict | None = None, **sections) -> str:
+    """
+    A framed.yaml rendering the sample screenshots `keys` for every device and
+    language (raw screenshots copied to output_dir/raw), returning its path.
+    `settings` go into the config section, other keyword arguments at the root.
+    """
+    output_dir = root / "out"
+    for device in devices:
+        for lang in languages:
+            raw = output_dir / "raw" / f"{device}_{lang}"
+            raw.mkdir(parents=True)
+            for key in keys:
+                shutil.copy(SAMPLE_RAWS / f"{key}.png", raw / f"{key}.png")
+    data = {
+        'template': 'standard',
+        'config': {'project': "App.xcodeproj", 'scheme': "App", 'output_dir': str(output_dir), **(settings or {})},
+        'devices': [{'name': device} for device in devices],
+        'languages': list(languages),
+        'screenshots': {key: {'title': {lang: f"{key} {lang}" for lang in languages},
+                              'subtitle': {lang: f"{lang} subtitle" for lang in languages}}
+                        for key in keys},
+        **sections,
+    }
+    path = root / "framed.yaml"
+    path.write_text(yaml.safe_dump(data, allow_unicode=True, sort_keys=False))
+    return str(path)
+
+
+def output_files(config) -> dict:
+    """Rendered images under output_dir/framed, relative path -> bytes."""
+    final_dir = Path(config.output_dir) / "framed"
+    return {path.relative_to(final_dir).as_posix(): path.read_bytes()
+            for path in sorted(final_dir.rglob("*")) if path.suffix in ('.png', '.jpg')}
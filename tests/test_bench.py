@@ -0,0 +1,16 @@
+from framed.bench import compare, format_report
+
+
+def stats(p50):
+    return {'count': 4, 'p50_ms': p50, 'p95_ms': p50, 'max_ms': p50, 'total_ms': 4 * p50}
+
+
+def report(**stages):
+    return {'iterations': 1, 'peak_rss_mb': None,
+            'templates': {'standard': {'images': 4, 'stages': {name: stats(p50) for name, p50 in stages.items()}}}}
+
+
+def test_compare_flags_slower_stages_only():
+    baseline = report(decode=40.0, compose=200.0, total=600.0)
+    current = report(decode=41.0, compose=260.0, total=660.0)
+    assert [line.split(':')[0] for line in compare(current, baseline)] == ['standard/compose']
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from framed.bezel import BezelCache
+
+SCREEN_SIZE = (260, 560)
+
+
+@pytest.fixture
+def bezel_path(tmp_path):
+    """A 300x600 bezel with a clear screen, anti-aliased (partially transparent) edges and an island."""
+    bezel = Image.new('RGBA', (300, 600), (30, 30, 30, 255))
+    draw = ImageDraw.Draw(bezel)
+    draw.rectangle((20, 20, 279, 579), fill=(0, 0, 0, 0))
+    for i in range(6):
+        draw.rectangle((i, i, 299 - i, 599 - i), outline=(200, 100, 50, 20 + 40 * i))
+        draw.rectangle((20 + i, 20 + i, 279 - i, 579 - i), outline=(10, 20, 30, 255 - 40 * i))
+    draw.rounded_rectangle((100, 35, 200, 75), radius=18, fill=(0, 0, 0, 128))
+    draw.rounded_rectangle((110, 40, 190, 70), radius=15, fill=(0, 0, 0, 255))
+    path = tmp_path / "bezel.png"
+    bezel.save(path)
+    return path
+
+
+def noise(size, seed, mode='RGB'):
+    pixels = np.random.default_rng(seed).integers(0, 256, (size[1], size[0], len(mode)), dtype=np.uint8)
+    return Image.fromarray(pixels, mode)
+
+
+def pasted_frame(cache, canvas, bezel_path, screenshot, box):
+    """The reference: a framed device built at box size, pasted with its own alpha."""
+    x, y, width, height = box
+    [scaled] = cache._scaled.values()
+    left, top, _, _ = scaled.screen_box
+    frame = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    frame.paste(screenshot.resize(scaled.screen_size, Image.Resampling.LANCZOS), (left, top), scaled.mask)
+    frame = Image.alpha_composite(frame, scaled.bezel)
+    canvas = canvas.copy()
+    canvas.paste(frame, (x, y), frame)
+    return canvas
+
+
+@pytest.mark.parametrize("box", [(37, 53, 151, 301), (1, 0, 300, 600), (99, 3, 77, 155), (12, 7, 233, 441)])
+def test_compose_into_matches_pasting_the_frame(bezel_path, box):
+    canvas = noise((500, 700), seed=1)
+    screenshot = noise(SCREEN_SIZE, seed=2)
+    cache = BezelCache()
+
+    composed = canvas.copy()
+    cache.compose_into(composed, bezel_path, screenshot, SCREEN_SIZE, box)
+
+    assert composed.tobytes() == pasted_frame(cache, canvas, bezel_path, screenshot, box).tobytes()
+
+
+def test_compose_into_is_the_same_on_rgba_canvases(bezel_path):
+    canvas = noise((500, 700), seed=3)
+    screenshot = noise(SCREEN_SIZE, seed=4, mode='RGBA')
+    box = (41, 17, 151, 301)
+
+    composed = canvas.copy()
+    BezelCache().compose_into(composed, bezel_path, screenshot, SCREEN_SIZE, box)
+    fallback = canvas.convert('RGBA')
+    BezelCache().compose_into(fallback, bezel_path, screenshot, SCREEN_SIZE, box)
+
+    assert composed.tobytes() == fallback.convert('RGB').tobytes()
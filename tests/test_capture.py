@@ -0,0 +1,136 @@
+import plistlib
+
+import pytest
+
+from framed.capture import Simulator, SimulatorPool, SimulatorSessions, write_locale_xctestrun
+
+from conftest import XCTESTRUN_V1
+
+LOCALE_ARGS = {lang: ['-AppleLanguages', f'({lang})', '-AppleLocale', lang] for lang in ("ja", "en")}
+
+
+def write_plist(path, data):
+    with open(path, 'wb') as f:
+        plistlib.dump(data, f)
+    return path
+
+
+def read_plist(path):
+    with open(path, 'rb') as f:
+        return plistlib.load(f)
+
+
+def test_locale_xctestrun_from_format_version_1(tmp_path):
+    source = write_plist(tmp_path / "App.xctestrun", XCTESTRUN_V1)
+
+    out = write_locale_xctestrun(source, ["ja", "en"])
+
+    assert out == tmp_path / "framed_locales.xctestrun"
+    data = read_plist(out)
+    assert data['__xctestrun_metadata__'] == {'FormatVersion': 2}
+    assert [c['Name'] for c in data['TestConfigurations']] == ["ja", "en"]
+    for configuration in data['TestConfigurations']:
+        [target] = configuration['TestTargets']
+        args = LOCALE_ARGS[configuration['Name']]
+        assert target['BlueprintName'] == "AppUITests"
+        assert target['TestBundlePath'] == "__TESTHOST__/PlugIns/AppUITests.xctest"
+        assert target['CommandLineArguments'] == ['-UITests'] + args
+        assert target['UITargetAppCommandLineArguments'] == ['-ResetState'] + args
+
+
+def test_locale_xctestrun_keeps_the_rest_of_a_format_version_2_file(tmp_path):
+    original = {
+        'CodeCoverageBuildableInfos': [{'Name': 'App.app', 'IsStatic': False}],
+        'ContainerInfo': {'ContainerName': 'App', 'SchemeName': 'App'},
+        'TestPlan': {'Name': 'Screenshots', 'IsDefault': True},
+        'TestConfigurations': [{
+            'Name': 'Configuration 1',
+            'TestTargets': [{'BlueprintName': 'AppUITests', 'CommandLineArguments': ['-UITests'],
+                             'EnvironmentVariables': {'MODE': 'screenshots'}}],
+        }],
+        '__xctestrun_metadata__': {'FormatVersion': 2},
+    }
+    source = write_plist(tmp_path / "App.xctestrun", original)
+
+    data = read_plist(write_locale_xctestrun(source, ["ja", "en"]))
+
+    assert {k: v for k, v in data.items() if k != 'TestConfigurations'} == \
+        {k: v for k, v in original.items() if k != 'TestConfigurations'}
+    assert [c['Name'] for c in data['TestConfigurations']] == ["ja", "en"]
+    for configuration in data['TestConfigurations']:
+        [target] = configuration['TestTargets']
+        assert target['EnvironmentVariables'] == {'MODE': 'screenshots'}
+        assert target['CommandLineArguments'] == ['-UITests'] + LOCALE_ARGS[configuration['Name']]
+        assert target['UITargetAppCommandLineArguments'] == LOCALE_ARGS[configuration['Name']]
+
+
+def test_locale_xctestrun_rejects_several_configurations(tmp_path):
+    source = write_plist(tmp_path / "App.xctestrun", {
+        'TestConfigurations': [{'Name': name, 'TestTargets': []} for name in ("Light", "Dark")],
+        '__xctestrun_metadata__': {'FormatVersion': 2},
+    })
+    with pytest.raises(ValueError, match="2 test configurations"):
+        write_locale_xctestrun(source, ["ja"])
+    assert not (tmp_path / "framed_locales.xctestrun").exists()
+
+
+def sim(name):
+    return Simulator(name, name, f"platform=iOS Simulator,name={name}")
+
+
+@pytest.fixture
+def two_simulators(fake_tools, monkeypatch):
+    """'iPhone 17' is already booted, 'iPad Pro' is shut down."""
+    monkeypatch.setenv('FAKE_DEVICES', "iPhone 17=Booted,iPad Pro")
+    return sim("iPhone 17"), sim("iPad Pro")
+
+
+def simctl(fake_tools, command):
+    return [call[3] for call in fake_tools.calls('xcrun', 'simctl', command)]
+
+
+def test_sessions_prepare_each_simulator_once(fake_tools, two_simulators):
+    booted, shut_down = two_simulators
+    sessions = SimulatorSessions(xcrun=fake_tools.xcrun, appearance='dark')
+
+    for _ in range(2):
+        sessions.prepare(booted)
+        sessions.prepare(shut_down)
+
+    # Already booted is not rebooted; everything else happens once per simulator
+    assert simctl(fake_tools, 'bootstatus') == ["iPad Pro"]
+    assert simctl(fake_tools, 'status_bar') == ["iPhone 17", "iPad Pro"]
+    assert fake_tools.calls('xcrun', 'simctl', 'ui') == [
+        ['xcrun', 'simctl', 'ui', name, 'appearance', 'dark'] for name in ("iPhone 17", "iPad Pro")]
+    assert len(fake_tools.calls('xcrun', 'simctl', 'list')) == 1
+
+
+@pytest.mark.parametrize("policy, shut_down", [
+    ('keep', []),
+    ('restore', ["iPad Pro"]),
+    ('shutdown', ["iPhone 17", "iPad Pro"]),
+])
+def test_sessions_close_policy(fake_tools, two_simulators, policy, shut_down):
+    sessions = SimulatorSessions(xcrun=fake_tools.xcrun, policy=policy)
+    for simulator in two_simulators:
+        sessions.prepare(simulator)
+
+    sessions.close()
+
+    assert simctl(fake_tools, 'shutdown') == shut_down
+
+
+def test_restore_keeps_a_simulator_shut_down_for_cloning_running(fake_tools, two_simulators):
+    booted, _ = two_simulators
+    pool = SimulatorPool(xcrun=fake_tools.xcrun)
+    pool.prepare("iPhone 17", 2)
+    assert pool.shut_down == ["iPhone 17"]
+
+    sessions = SimulatorSessions(xcrun=fake_tools.xcrun, policy='restore')
+    sessions.note_shut_down("iPhone 17")
+    sessions.prepare(booted)
+    sessions.close()
+
+    # Booted again for capture, and left running as it was before the run
+    assert simctl(fake_tools, 'bootstatus') == ["iPhone 17"]
+    assert simctl(fake_tools, 'shutdown') == ["iPhone 17"]  # Only the one for cloning
@@ -0,0 +1,26 @@
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from framed.cli import main
+
+from conftest import write_project
+
+
+def test_plan_lists_the_outputs_run_writes(tmp_path, monkeypatch):
+    write_project(tmp_path, groups=[{'screens': ["inbox", "recording"], 'output': "pair.png"}])
+    monkeypatch.chdir(tmp_path)
+    cli = CliRunner()
+
+    result = cli.invoke(main, ["plan", "--json", "-"])
+    assert result.exit_code == 0, result.output
+    plan = json.loads(result.output)
+    planned = sorted(Path(job['output']) for job in plan['jobs'])
+
+    result = cli.invoke(main, ["run", "--skip-capture"])
+    assert result.exit_code == 0, result.output
+    final_dir = Path(plan['final_dir'])
+    written = sorted(path for path in final_dir.rglob("*") if path.suffix in ('.png', '.jpg'))
+    assert len(planned) == 6
+    assert written == planned
@@ -0,0 +1,29 @@
+import pytest
+
+from framed.config import load_config
+
+
+def write_config(tmp_path, **settings):
+    lines = ["config:", "  project: App.xcodeproj", "  scheme: App"]
+    lines += [f"  {name}: {value}" for name, value in settings.items()]
+    path = tmp_path / "framed.yaml"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_capture_settings_are_read(tmp_path):
+    config = load_config(write_config(tmp_path, simulator_policy="restore", appearance="dark",
+                                      capture_mode="multi_locale", extract_backend="legacy"))
+    assert (config.simulator_policy, config.appearance, config.capture_mode, config.extract_backend) == \
+        ("restore", "dark", "multi_locale", "legacy")
+
+
+@pytest.mark.parametrize("name, value", [
+    ("simulator_policy", "restart"),
+    ("appearance", "dim"),
+    ("capture_mode", "build-once"),
+    ("extract_backend", "fast"),
+])
+def test_unknown_capture_settings_fail_at_load(tmp_path, name, value):
+    with pytest.raises(ValueError, match=f"Unknown {name} '{value}'"):
+        load_config(write_config(tmp_path, **{name: value}))
@@ -0,0 +1,63 @@
+import io
+import time
+
+import numpy as np
+from PIL import Image
+
+from framed.config import load_config
+from framed.encoder import Encoder
+from framed.processor import Processor
+
+from conftest import output_files, write_project
+
+
+def image():
+    pixels = np.random.default_rng(0).integers(0, 256, (120, 80, 3), dtype=np.uint8)
+    return Image.fromarray(pixels)
+
+
+def encoder(tmp_path, **settings):
+    return Encoder(load_config(write_project(tmp_path, settings=settings)))
+
+
+def test_jpeg_uses_the_configured_quality(tmp_path):
+    sizes = {}
+    for quality in (30, 95):
+        path = tmp_path / f"q{quality}.jpg"
+        encoder(tmp_path / str(quality), image_format='jpg', jpeg_quality=quality).encode(image(), path)
+
+        expected = io.BytesIO()
+        image().save(expected, 'JPEG', quality=quality)
+        assert path.read_bytes() == expected.getvalue()
+        sizes[quality] = path.stat().st_size
+    assert sizes[30] < sizes[95]
+
+
+def test_png_quantize_writes_a_palette_image(tmp_path):
+    path = tmp_path / "out.png"
+    encoder(tmp_path, png_quantize=16).encode(image(), path)
+
+    with Image.open(path) as written:
+        assert written.mode == 'P'
+        assert len(written.getcolors()) <= 16
+
+
+def test_background_encodes_are_complete_when_render_returns(tmp_path, monkeypatch):
+    inline = load_config(write_project(tmp_path / "inline"))
+    Processor(inline, verbose=False, background_encode=False).process()
+
+    # Slow encodes, so render() would return before them if it didn't wait
+    encode = Encoder.encode
+    def slow_encode(self, image, path):
+        time.sleep(0.2)
+        encode(self, image, path)
+    monkeypatch.setattr(Encoder, 'encode', slow_encode)
+
+    background = load_config(write_project(tmp_path / "background", settings={'encode_threads': 2}))
+    processor = Processor(background, verbose=False, background_encode=True)
+    processor.process()
+
+    assert processor.encoder.background
+    expected = output_files(inline)
+    assert len(expected) == 4
+    assert output_files(background) == expected
@@ -0,0 +1,186 @@
+import json
+import shutil
+import threading
+
+import pytest
+
+from framed.extractor import Extractor, ObjectCache
+
+from conftest import make_bundle
+
+
+def extracted(output_dir):
+    return {path.name: path.read_text() for path in output_dir.iterdir()}
+
+
+def max_concurrency(spans) -> int:
+    events = sorted([(start, 1) for start, _ in spans] + [(end, -1) for _, end in spans])
+    running = peak = 0
+    for _, delta in events:
+        running += delta
+        peak = max(peak, running)
+    return peak
+
+
+def test_legacy_export_runs_calls_concurrently_within_the_limit(fake_tools, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_XCRESULT_DELAY', '0.2')
+    names = [f"screen{i}" for i in range(6)]
+    bundle = make_bundle(tmp_path / "Test.xcresult", names)
+    out = tmp_path / "out"
+    out.mkdir()
+
+    Extractor(max_workers=3, xcrun=fake_tools.xcrun, backend='legacy').process_xcresult(bundle, out)
+
+    assert extracted(out) == {f"{name}.png": f"legacy {name}" for name in names}
+    spans = fake_tools.calls('xcresulttool-span')
+    summaries = [(c[1], c[2]) for c in spans if c[3] == 'get' and '--id' in c and 'summary' in c[c.index('--id') + 1]]
+    exports = [(c[1], c[2]) for c in spans if c[3] == 'export']
+    assert len(summaries) == len(exports) == 6
+    # Summaries are fetched, and payloads exported, several at a time but never more than max_workers
+    assert max_concurrency(summaries) == 3
+    assert max_concurrency(exports) == 3
+    assert max_concurrency(summaries + exports) <= 3
+
+
+@pytest.mark.parametrize("xcode, backend, expected", [
+    ("Xcode 16.3", 'auto', 'bulk'),
+    ("Xcode 26.0", 'auto', 'bulk'),
+    ("Xcode 16.2", 'auto', 'legacy'),
+    ("Xcode 16.2", 'bulk', 'bulk'),
+    ("Xcode 26.0", 'legacy', 'legacy'),
+])
+def test_export_backend_selection(fake_tools, bundle, tmp_path, monkeypatch, xcode, backend, expected):
+    monkeypatch.setenv('FAKE_XCODE', xcode)
+    out = tmp_path / "out"
+    out.mkdir()
+
+    Extractor(xcrun=fake_tools.xcrun, backend=backend).process_xcresult(bundle, out)
+
+    assert extracted(out) == {f"{name}.png": f"{expected} {name}" for name in ("home", "inbox", "settings")}
+    assert bool(fake_tools.calls('xcrun', 'xcresulttool', 'export', 'attachments')) == (expected == 'bulk')
+    assert bool(fake_tools.calls('xcrun', 'xcresulttool', 'get')) == (expected == 'legacy')
+
+
+def test_bulk_export_failure_falls_back_to_legacy(fake_tools, bundle, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_NO_BULK', '1')
+    out = tmp_path / "out"
+    out.mkdir()
+
+    Extractor(xcrun=fake_tools.xcrun, backend='bulk').process_xcresult(bundle, out)
+
+    assert extracted(out)["inbox.png"] == "legacy inbox"
+
+
+def test_xcode_version_is_detected_once_across_threads(fake_tools, monkeypatch):
+    monkeypatch.setenv('FAKE_XCODE', "Xcode 16.4")
+    monkeypatch.setenv('FAKE_VERSION_DELAY', '0.3')
+    extractor = Extractor(xcrun=fake_tools.xcrun)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(extractor._use_bulk_export())) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # No caller may see an undetected version and pick the legacy export
+    assert results == [True] * 6
+    assert len(fake_tools.calls('xcrun', 'xcodebuild', '-version')) == 1
+
+
+def test_object_cache_reuses_objects_across_extractors(fake_tools, bundle, tmp_path):
+    cache_dir = tmp_path / "cache"
+    for run in range(2):
+        out = tmp_path / f"out{run}"
+        out.mkdir()
+        cache = ObjectCache(cache_dir)
+        Extractor(xcrun=fake_tools.xcrun, backend='legacy', cache=cache).process_xcresult(bundle, out)
+        assert extracted(out)["settings.png"] == "legacy settings"
+        if run == 0:
+            gets = len(fake_tools.calls('xcrun', 'xcresulttool', 'get'))
+            assert cache.misses == gets == 5  # root, tests and one summary per test
+
+    # The second run is served from disk: no further `get object` calls
+    assert len(fake_tools.calls('xcrun', 'xcresulttool', 'get')) == gets
+    assert (cache.hits, cache.misses) == (5, 0)
+
+
+def test_object_cache_recognizes_a_copied_bundle(fake_tools, bundle, tmp_path):
+    extractor = Extractor(xcrun=fake_tools.xcrun, backend='legacy')
+    copy = shutil.copytree(bundle, tmp_path / "Copy.xcresult")
+    for source, target in ((bundle, "a"), (copy, "b")):
+        out = tmp_path / target
+        out.mkdir()
+        extractor.process_xcresult(source, out)
+        assert extracted(out)["home.png"] == "legacy home"
+
+    # Same Info.plist, so the copy hits the objects cached for the original
+    assert (extractor.cache.hits, extractor.cache.misses) == (5, 5)
+
+
+@pytest.mark.parametrize("backend", ['bulk', 'legacy'])
+def test_attachments_are_split_by_configuration(fake_tools, tmp_path, backend):
+    bundle = make_bundle(tmp_path / "Multi.xcresult", ["home", "inbox"], configurations=["ja", "en", "fr"])
+    dirs = {lang: tmp_path / lang for lang in ("ja", "en")}
+    for path in dirs.values():
+        path.mkdir()
+
+    Extractor(xcrun=fake_tools.xcrun, backend=backend).process_xcresult(bundle, None, configuration_dirs=dirs)
+
+    # Each language's screenshots land in its own directory; configurations without one are dropped
+    for lang, path in dirs.items():
+        assert extracted(path) == {f"{name}.png": f"{backend} {lang} {name}" for name in ("home", "inbox")}
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_dir()) == ["Multi.xcresult", "bin", "en", "ja"]
+
+
+@pytest.mark.parametrize("suggested, name", [
+    ("inbox_0_1A2B3C4D-1234-5678-9ABC-DEF012345678.png", "inbox"),
+    ("home_empty_12_1a2b3c4d-1234-5678-9abc-def012345678.png", "home_empty"),
+    ("Launch Screen_0_1A2B3C4D-1234-5678-9ABC-DEF012345678.png", "Launch Screen"),
+    ("plain.png", "plain"),
+    ("inbox_0_not-a-uuid.png", "inbox_0_not-a-uuid"),
+])
+def test_bulk_names_are_recovered_from_suggested_names(suggested, name):
+    assert Extractor._attachment_name(suggested) == name
+
+
+def test_bulk_export_is_a_single_call_mapped_through_the_manifest(fake_tools, tmp_path):
+    bundle = make_bundle(tmp_path / "Test.xcresult", ["home", "inbox", "settings", "extra"])
+    manifest_path = bundle / "attachments" / "manifest.json"
+    manifest = json.loads(manifest_path.read_text())
+    # A repeated name (last one wins, as in legacy mode), a missing file and a nameless attachment
+    manifest[2]['attachments'][0]['suggestedHumanReadableName'] = "home_0_1A2B3C4D-1234-5678-9ABC-DEF012345678.png"
+    (bundle / "attachments" / manifest[3]['attachments'][0]['exportedFileName']).unlink()
+    manifest.append({'testIdentifier': "UITests/testNameless()", 'attachments': [{'configurationName': "Configuration 1"}]})
+    manifest_path.write_text(json.dumps(manifest))
+    out = tmp_path / "out"
+    out.mkdir()
+
+    Extractor(xcrun=fake_tools.xcrun, backend='bulk').process_xcresult(bundle, out)
+
+    assert extracted(out) == {"home.png": "bulk settings", "inbox.png": "bulk inbox"}
+    assert [call[2:4] for call in fake_tools.calls('xcrun', 'xcresulttool')] == [["export", "attachments"]]
+
+
+def test_object_cache_fetches_each_object_once_per_run(fake_tools, bundle):
+    extractor = Extractor(xcrun=fake_tools.xcrun, backend='legacy')
+    first = extractor._get_object(bundle, "tests")
+    assert extractor._get_object(bundle, "tests") == first
+    assert extractor._get_object(bundle) == extractor._get_object(bundle)
+    assert len(fake_tools.calls('xcrun', 'xcresulttool', 'get')) == 2
+    assert extractor.cache.summary() == "2 hits, 2 misses"
+
+
+def test_unreadable_disk_cache_entries_are_fetched_again(fake_tools, bundle, tmp_path):
+    cache = ObjectCache(tmp_path / "cache")
+    Extractor(xcrun=fake_tools.xcrun, cache=cache)._get_object(bundle, "tests")
+    [entry] = (tmp_path / "cache").rglob("*.json")
+    entry.write_text("{truncated")
+
+    cache = ObjectCache(tmp_path / "cache")
+    obj = Extractor(xcrun=fake_tools.xcrun, cache=cache)._get_object(bundle, "tests")
+
+    assert obj == json.loads((bundle / "objects" / "tests.json").read_text())
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert len(fake_tools.calls('xcrun', 'xcresulttool', 'get')) == 2
+    assert json.loads(entry.read_text()) == obj  # Rewritten
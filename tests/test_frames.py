@@ -0,0 +1,38 @@
+import pytest
+from PIL import Image
+
+from framed.frames import MB, FrameBudgetExceeded, GroupFrames
+
+
+def group(count, budget_mb):
+    """GroupFrames of 1 MB frames; `loads` records (index, live MB when the build started)."""
+    loads = []
+
+    def loader(i):
+        def load():
+            loads.append((i, frames.live_bytes / MB))
+            return Image.new('RGBA', (512, 512))
+        return load
+    frames = GroupFrames([loader(i) for i in range(count)], budget_mb * MB)
+    return frames, loads
+
+
+def test_cached_frames_are_evicted_before_the_next_build():
+    frames, loads = group(5, 2)
+    for frame in frames:
+        frame.load()
+    # The cache holds the two most recent frames at most, and makes room before building
+    assert [i for i, _ in loads] == [0, 1, 2, 3, 4]
+    assert all(live <= 2 for _, live in loads)
+    frames[4]
+    frames[3]
+    assert len(loads) == 5
+
+
+def test_budget_is_checked_before_building():
+    frames, loads = group(4, 2)
+    kept = [frames[0], frames[1], frames[2]]
+    with pytest.raises(FrameBudgetExceeded):
+        kept.append(frames[3])
+    # The frame that could not fit was never built
+    assert [i for i, _ in loads] == [0, 1, 2]
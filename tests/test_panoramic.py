@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from framed import registry
+from framed.config import load_config
+
+
+@pytest.fixture
+def template(tmp_path):
+    path = tmp_path / "framed.yaml"
+    path.write_text("template: panoramic\nconfig:\n  project: App.xcodeproj\n  scheme: App\n")
+    return registry.create('panoramic', load_config(str(path)))
+
+
+def wave(template, index, total, width=300, color='#336699'):
+    canvas = Image.new('RGB', (width, 600), 'white')
+    template._draw_panoramic_wave(canvas, color, index, total)
+    return np.asarray(canvas)
+
+
+def test_wave_index_past_total_extends_the_panorama(template):
+    in_range = [wave(template, index, 3) for index in range(3)]
+
+    # Rendering a screen past the end (e.g. a server request with index >= total) must not fail...
+    past_end = wave(template, 4, 3)
+    assert (past_end != 255).any()
+
+    # ...nor change the screens inside the panorama, which are cached separately
+    fresh = template.__class__(template.config)
+    assert all(np.array_equal(wave(fresh, index, 3), image) for index, image in enumerate(in_range))
+    assert np.array_equal(wave(template, 1, 3), in_range[1])
+
+
+def test_neighbouring_slices_join_into_one_strip(template):
+    slices = [wave(template, index, 3) for index in range(3)]
+    strip = wave(template, 0, 1, width=900)
+
+    # Side by side, the slices are the panorama rendered on one canvas three screens wide,
+    # so the columns on either side of each boundary are those of the single strip
+    assert np.array_equal(np.concatenate(slices, axis=1), strip)
+    for boundary in (300, 600):
+        assert (strip[:, boundary - 1] != 255).any() and (strip[:, boundary] != 255).any()
+
+
+def test_unparsable_wave_color_falls_back_to_the_default(template):
+    assert np.array_equal(wave(template, 0, 3, color='not-a-color'), wave(template, 0, 3, color='#C7C7CC'))
@@ -0,0 +1,67 @@
+from pathlib import Path
+
+from framed.config import load_config
+from framed.manifest import RenderManifest
+from framed.processor import Processor
+from framed.runner import Runner
+from framed.templates.standard import StandardTemplate
+
+from conftest import output_files, write_project
+
+
+class ShowcaseTemplate(StandardTemplate):
+    """A group template with fonts of its own."""
+
+    def font_paths(self):
+        return [str(Path(self.config.output_dir).parent / "showcase.ttf")]
+
+
+def test_group_fingerprint_uses_the_group_templates_fonts(tmp_path):
+    fonts = {name: tmp_path / f"{name}.ttf" for name in ('standard', 'showcase')}
+    for path in fonts.values():
+        path.write_bytes(b"font v1")
+    config = load_config(write_project(tmp_path, settings={'font_bold': str(fonts['standard'])},
+                                       groups=[{'screens': ["inbox"], 'output': "group.png", 'template': "showcase"}]))
+    processor = Processor(config, verbose=False, templates={'showcase': ShowcaseTemplate(config)})
+    job = next(job for job in processor.plan.jobs if job.kind == 'group')
+    assert job.template == 'showcase'
+    assert str(fonts['standard']) in processor.template.font_paths()
+
+    def fingerprint():
+        # A fresh manifest, so font hashes aren't memoized across edits
+        return processor._fingerprint(job, RenderManifest(processor.plan.final_dir))
+
+    before = fingerprint()
+    fonts['standard'].write_bytes(b"font v2, other template")
+    assert fingerprint() == before
+    fonts['showcase'].write_bytes(b"font v2")
+    assert fingerprint() != before
+
+
+def test_streaming_renders_match_a_batch_render(tmp_path):
+    batch = load_config(write_project(tmp_path / "batch"))
+    Processor(batch).process()
+
+    streamed = load_config(write_project(tmp_path / "stream"))
+    processor = Processor(streamed, jobs=2)
+    assert processor.start_streaming()
+    # One capture per language, queued as each one is extracted
+    processor.submit_captured("iPhone 17", "ja")
+    processor.submit_captured("iPhone 17", "en")
+    processor.finish_streaming()
+
+    expected = output_files(batch)
+    assert sorted(expected) == [f"iPhone 17_{lang}/{i:02d}_{key}.png"
+                                for lang in ("en", "ja") for i, key in ((1, "inbox"), (2, "recording"))]
+    assert output_files(streamed) == expected
+
+
+def test_renderer_start_failure_is_reported(tmp_path, monkeypatch, capsys):
+    config = load_config(write_project(tmp_path))
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("no bezel")
+    monkeypatch.setattr(Processor, '__init__', broken)
+
+    assert Runner(config)._start_renderer(jobs=1, force=False) is None
+    assert "Could not start rendering during capture (RuntimeError: no bezel)" in capsys.readouterr().out
@@ -0,0 +1,170 @@
+import json
+
+from framed.config import Config, load_config
+from framed.extractor import Extractor
+from framed.runner import Runner
+
+from conftest import make_bundle
+
+
+def make_runner(fake_tools, tmp_path, devices, languages, capture_mode='test'):
+    config = Config(project="App.xcodeproj", scheme="App", output_dir=str(tmp_path / "screenshots"),
+                    devices=[{'name': name} for name in devices], languages=languages, raw_config={},
+                    capture_mode=capture_mode)
+    return Runner(config, xcrun=fake_tools.xcrun, xcodebuild=fake_tools.xcodebuild)
+
+
+def overlapping_pairs(runs):
+    """Pairs of (args, start, end) runs that were in flight at the same time."""
+    return [(a, b) for i, a in enumerate(runs) for b in runs[i + 1:] if a[1] < b[2] and b[1] < a[2]]
+
+
+def test_concurrent_captures(fake_tools, bundle, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BUNDLE', str(bundle))
+    monkeypatch.setenv('FAKE_TEST_DELAY', '0.3')
+    monkeypatch.setenv('FAKE_XCODE', "Xcode 16.2")
+    runner = make_runner(fake_tools, tmp_path, ["iPhone 17", "iPad Pro"], ["ja", "en", "fr"])
+    raw_dir = tmp_path / "raw"
+    extractor = Extractor(xcrun=fake_tools.xcrun)
+
+    runner._capture_all(extractor, raw_dir, capture_jobs=3)
+
+    # Every device x language is captured and extracted into its own directory
+    assert sorted(path.name for path in raw_dir.iterdir()) == [
+        f"{device}_{lang}" for device in ("iPad Pro", "iPhone 17") for lang in ("en", "fr", "ja")]
+    for run_dir in raw_dir.iterdir():
+        assert sorted(path.name for path in run_dir.iterdir()) == ["home.png", "inbox.png", "settings.png"]
+
+    # Extra simulators are clones, deleted afterwards; the shared extractor detected Xcode once
+    clones = fake_tools.calls('xcrun', 'simctl', 'clone')
+    assert sorted(call[4] for call in clones) == [
+        f"{device} (framed {i})" for device in ("iPad Pro", "iPhone 17") for i in (2, 3)]
+    assert len(fake_tools.calls('xcrun', 'simctl', 'delete')) == 4
+    assert len(fake_tools.calls('xcrun', 'xcodebuild', '-version')) == 1
+
+    # Captures overlapped, each on its own simulator with its own DerivedData
+    starts = {tuple(call[2:]): call[1] for call in fake_tools.calls('xcodebuild-start')}
+    runs = [(call[2:], starts[tuple(call[2:])], call[1]) for call in fake_tools.calls('xcodebuild-end')]
+    assert len(runs) == 6
+    pairs = overlapping_pairs(runs)
+    assert pairs
+    for (a, _, _), (b, _, _) in pairs:
+        for option in ("-destination", "-derivedDataPath"):
+            assert a[a.index(option) + 1] != b[b.index(option) + 1]
+
+
+def test_existing_clones_are_reused(fake_tools, bundle, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BUNDLE', str(bundle))
+    monkeypatch.setenv('FAKE_DEVICES', "iPhone 17,iPhone 17 (framed 2)")
+    runner = make_runner(fake_tools, tmp_path, ["iPhone 17"], ["ja", "en"])
+
+    runner._capture_all(Extractor(xcrun=fake_tools.xcrun), tmp_path / "raw", capture_jobs=2)
+
+    assert fake_tools.calls('xcrun', 'simctl', 'clone') == []
+    destinations = {call[call.index("-destination") + 1] for call in fake_tools.calls('xcodebuild-end')}
+    assert destinations == {"platform=iOS Simulator,name=iPhone 17", "platform=iOS Simulator,id=UDID-iPhone 17 (framed 2)"}
+
+
+def test_sequential_captures_use_default_derived_data(fake_tools, bundle, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BUNDLE', str(bundle))
+    runner = make_runner(fake_tools, tmp_path, ["iPhone 17"], ["ja", "en"])
+
+    runner._capture_all(Extractor(xcrun=fake_tools.xcrun), tmp_path / "raw", capture_jobs=1)
+
+    runs = fake_tools.calls('xcodebuild-end')
+    assert len(runs) == 2
+    assert all("-derivedDataPath" not in call for call in runs)
+    assert fake_tools.calls('xcrun', 'simctl', 'clone') == []
+
+
+def test_capture_mode_defaults_to_xcodebuild_test(tmp_path):
+    path = tmp_path / "framed.yaml"
+    path.write_text("config:\n  project: App.xcodeproj\n  scheme: App\n")
+    assert load_config(str(path)).capture_mode == 'test'
+
+
+def test_build_once_runs_test_without_building_per_capture(fake_tools, bundle, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BUNDLE', str(bundle))
+    runner = make_runner(fake_tools, tmp_path, ["iPhone 17", "iPad Pro"], ["ja", "en"], capture_mode='build_once')
+
+    runner.run()
+
+    builds = [call[2:] for call in fake_tools.calls('xcodebuild-end') if 'build-for-testing' in call]
+    assert len(builds) == 1
+    derived_data = builds[0][builds[0].index("-derivedDataPath") + 1]
+    assert builds[0][:5] == ["build-for-testing", "-scheme", "App", "-project", "App.xcodeproj"]
+
+    runs = [call[2:] for call in fake_tools.calls('xcodebuild-end') if 'build-for-testing' not in call]
+    assert all(args[0] == "test-without-building" for args in runs)
+    xctestrun = f"{derived_data}/Build/Products/App_iphonesimulator26.0-arm64.xctestrun"
+    expected = {(device, lang) for device in ("iPhone 17", "iPad Pro") for lang in ("ja", "en")}
+    assert sorted(
+        (args[args.index("-destination") + 1].split("name=")[1], args[args.index("-testLanguage") + 1])
+        for args in runs) == sorted(expected)
+    for args in runs:
+        lang = args[args.index("-testLanguage") + 1]
+        assert args[1:3] == ["-xctestrun", xctestrun]
+        assert args[args.index("-testRegion") + 1] == lang
+        assert "-resultBundlePath" in args
+
+    raw_dir = tmp_path / "screenshots" / "raw"
+    assert sorted(path.name for path in raw_dir.iterdir()) == sorted(f"{d}_{l}" for d, l in expected)
+
+
+def test_build_once_falls_back_to_xcodebuild_test(fake_tools, bundle, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BUNDLE', str(bundle))
+    monkeypatch.setenv('FAKE_BUILD_FAILS', '1')
+    runner = make_runner(fake_tools, tmp_path, ["iPhone 17"], ["ja", "en"], capture_mode='build_once')
+
+    runner.run()
+
+    runs = [call[2:] for call in fake_tools.calls('xcodebuild-end')]
+    assert [args[0] for args in runs] == ["test", "test"]
+    assert (tmp_path / "screenshots" / "raw" / "iPhone 17_en" / "inbox.png").exists()
+
+
+def test_multi_locale_runs_every_language_in_one_invocation(fake_tools, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BUNDLE_MULTI', str(make_bundle(tmp_path / "Multi.xcresult", ["home", "inbox"],
+                                                             configurations=["ja", "en"])))
+    runner = make_runner(fake_tools, tmp_path, ["iPhone 17", "iPad Pro"], ["ja", "en"], capture_mode='multi_locale')
+
+    runner.run()
+
+    runs = [call[2:] for call in fake_tools.calls('xcodebuild-end') if 'build-for-testing' not in call]
+    assert sorted(args[args.index("-destination") + 1] for args in runs) == [
+        "platform=iOS Simulator,name=iPad Pro", "platform=iOS Simulator,name=iPhone 17"]
+    for args in runs:
+        assert args[0] == "test-without-building"
+        assert args[2].endswith("/Build/Products/framed_locales.xctestrun")
+        assert "-testLanguage" not in args
+
+    raw_dir = tmp_path / "screenshots" / "raw"
+    for device in ("iPhone 17", "iPad Pro"):
+        for lang in ("ja", "en"):
+            assert (raw_dir / f"{device}_{lang}" / "inbox.png").read_text() == f"bulk {lang} inbox"
+
+
+def test_multi_locale_with_several_configurations_captures_per_language(fake_tools, bundle, tmp_path, monkeypatch):
+    monkeypatch.setenv('FAKE_BUNDLE', str(bundle))
+    monkeypatch.setenv('FAKE_XCTESTRUN', json.dumps({
+        'TestConfigurations': [{'Name': name, 'TestTargets': []} for name in ("Light", "Dark")],
+        '__xctestrun_metadata__': {'FormatVersion': 2}}))
+    runner = make_runner(fake_tools, tmp_path, ["iPhone 17"], ["ja", "en"], capture_mode='multi_locale')
+
+    runner.run()
+
+    runs = [call[2:] for call in fake_tools.calls('xcodebuild-end') if 'build-for-testing' not in call]
+    assert sorted(args[args.index("-testLanguage") + 1] for args in runs) == ["en", "ja"]
+    assert all(args[2].endswith("App_iphonesimulator26.0-arm64.xctestrun") for args in runs)
+
+
+def test_run_reports_object_cache_counts(fake_tools, bundle, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('FAKE_BUNDLE', str(bundle))
+    monkeypatch.setenv('FAKE_XCODE', "Xcode 16.2")
+    runner = make_runner(fake_tools, tmp_path, ["iPhone 17"], ["ja", "en"])
+
+    runner.run()
+
+    # Both captures return copies of one bundle (same Info.plist): root, tests and
+    # three summaries are fetched for the first and served from the cache for the second
+    assert "🗃️  xcresult object cache: 5 hits, 5 misses" in capsys.readouterr().out
@@ -0,0 +1,78 @@
+import os
+import signal
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from framed.plan import RenderJob
+from framed.server import RenderService, RequestError, _output_path, _resolve_job, create_server
+
+
+def make_processor(tmp_path):
+    job = RenderJob('image', tmp_path / "raw", tmp_path / "framed", "01_inbox.png", "ja", device="iPhone 17",
+                    key="inbox", sources=(tmp_path / "raw" / "inbox.png",), keys=("inbox",), index=1, total=3)
+    config = SimpleNamespace(output_dir=str(tmp_path / "out"), template='standard', template_defaults={})
+    return SimpleNamespace(plan=SimpleNamespace(jobs=[job]), config=config)
+
+
+def test_resolve_job_applies_index_and_total(tmp_path):
+    processor = make_processor(tmp_path)
+    job = _resolve_job(processor, {'key': "inbox", 'lang': "ja"})
+    assert (job.index, job.total) == (1, 3)
+    job = _resolve_job(processor, {'key': "inbox", 'lang': "ja", 'index': "2", 'total': 4})
+    assert (job.index, job.total) == (2, 4)
+
+
+@pytest.mark.parametrize("fields", [
+    {'index': "two"}, {'index': None}, {'index': 1.5}, {'total': [3]}, {'total': True},
+    {'index': -1}, {'total': 0}, {'index': 3}, {'index': 5, 'total': 4},
+])
+def test_resolve_job_rejects_bad_index_and_total(tmp_path, fields):
+    with pytest.raises(RequestError) as e:
+        _resolve_job(make_processor(tmp_path), {'key': "inbox", 'lang': "ja", **fields})
+    assert e.value.status == 400
+
+
+def test_output_must_stay_in_output_dir(tmp_path):
+    processor = make_processor(tmp_path)
+    root = (tmp_path / "out").resolve()
+    assert _output_path(processor, "framed/ja/inbox.png") == root / "framed" / "ja" / "inbox.png"
+    assert _output_path(processor, str(root / "inbox.png")) == root / "inbox.png"
+    for output in ("../inbox.png", "/etc/passwd", str(tmp_path / "inbox.png"), "."):
+        with pytest.raises(RequestError) as e:
+            _output_path(processor, output)
+        assert e.value.status == 403
+
+
+def test_unix_socket_replaces_only_a_stale_socket(tmp_path):
+    service = SimpleNamespace()
+    path = str(tmp_path / "framed.sock")
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    create_server(service, socket_path=path).server_close()
+
+    regular = tmp_path / "not-a-socket"
+    regular.write_text("keep me")
+    with pytest.raises(OSError):
+        create_server(service, socket_path=str(regular))
+    assert regular.read_text() == "keep me"
+
+
+def test_pool_is_restarted_after_a_worker_dies(tmp_path):
+    service = RenderService(workers=1)
+    try:
+        [pid] = service.warm_up()
+        os.kill(pid, signal.SIGKILL)
+        with pytest.raises(RequestError) as e:
+            service.render({'key': "inbox", 'lang': "ja"})
+        assert e.value.status == 500
+        assert service.stats()['pool_restarts'] == 1
+
+        # The next request reaches a live worker
+        with pytest.raises(RequestError) as e:
+            service.render({'config': str(tmp_path / "missing.yaml"), 'key': "inbox", 'lang': "ja"})
+        assert e.value.status == 404
+    finally:
+        service.shutdown()